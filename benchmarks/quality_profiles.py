@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the chart quality profiles.
+
+Runs the checks once on a CSV file, then renders the charts and builds the
+PDF report with each quality profile, and prints the rendering time and
+the size of the report.
+
+Usage:
+    python benchmarks/quality_profiles.py -filename <csv_file> -pfi <timeline_id> -sn <event_id> -t <timestamp>
+
+Example:
+    python benchmarks/quality_profiles.py -filename samples/data.csv -pfi TimelineID -sn Event -t Date
+"""
+
+__author__ = "Benoit CAYLA"
+__email__ = "benoit@datacorner.fr"
+__license__ = "GPL"
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydqa4pm import Dqa4PM, Logger
+from pydqa4pm.reports.store import MemoryReportStore
+from pydqa4pm.utils import constants as C
+
+
+def main() -> int:
+    """Render the report of a file with every quality profile."""
+    parser = argparse.ArgumentParser(description="Benchmark of the chart quality profiles")
+    parser.add_argument("-filename", required=True)
+    parser.add_argument("-pfi", required=True)
+    parser.add_argument("-sn", required=True)
+    parser.add_argument("-t", required=True)
+    parser.add_argument("-separator", default=",")
+    parser.add_argument("-runs", type=int, default=3, help="Runs per profile (best time is kept)")
+    args = parser.parse_args()
+
+    logger = Logger("benchmark")
+    dqa = Dqa4PM(logger)
+    ds = dqa.open_dataset(args.filename, args.separator, args.pfi, args.sn, args.t)
+    if not ds.isOpened():
+        return 1
+    report_data = dqa.make_dqa_checks(ds)
+
+    print(f"{'Profile':<10} {'Charts (s)':>11} {'PDF (s)':>9} {'PDF size (KB)':>14}")
+    with tempfile.TemporaryDirectory() as folder:
+        for quality in C.QUALITY_PROFILES:
+            profile = Dqa4PM(logger, quality=quality)
+            report_name = os.path.join(folder, f"{quality}.pdf")
+            charts_time, pdf_time = float("inf"), float("inf")
+            for _ in range(args.runs):
+                store = MemoryReportStore()
+                start = time.perf_counter()
+                profile.build_charts(report_data, store)
+                charts_time = min(charts_time, time.perf_counter() - start)
+                start = time.perf_counter()
+                profile.generate_report(report_data, report_name, store)
+                pdf_time = min(pdf_time, time.perf_counter() - start)
+                store.finalize()
+            size = os.path.getsize(report_name) / 1024
+            print(f"{quality:<10} {charts_time:>11.2f} {pdf_time:>9.2f} {size:>14.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,33 @@ import argparse
 import sys
 
 from pydqa4pm import Dqa4PM, Logger, __version__
+from pydqa4pm.utils import constants as C
+
+
+def sample_rate(value: str) -> float:
+    """Parse the -sample option: a share of the timelines in (0, 1]."""
+    try:
+        rate = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid sample rate '{value}': expected a number")
+    if not 0 < rate <= 1:
+        raise argparse.ArgumentTypeError(
+            f"invalid sample rate {value}: expected a share of the timelines, greater than 0 and at most 1"
+        )
+    return rate
+
+
+def sketch_error(value: str) -> float:
+    """Parse the -error option: a relative error in (0, 1)."""
+    try:
+        error = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid error '{value}': expected a number")
+    if not 0 < error < 1:
+        raise argparse.ArgumentTypeError(
+            f"invalid error {value}: expected a relative error, greater than 0 and less than 1"
+        )
+    return error
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -36,7 +63,8 @@ def create_parser() -> argparse.ArgumentParser:
     
     parser.add_argument(
         "-filename",
-        help="Path to the CSV file to analyze",
+        help="Path to the CSV file to analyze (several files are assessed as shards of one log)",
+        nargs="+",
         required=True
     )
     parser.add_argument(
@@ -59,6 +87,72 @@ def create_parser() -> argparse.ArgumentParser:
         help="CSV field separator (default: comma)",
         default=","
     )
+    parser.add_argument(
+        "-approximate",
+        help="Estimate distinct counts and top values with sketches, without exact value counts (for very large files; the rows are still loaded in memory for the duplicate, near duplicate and waiting time checks)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "-error",
+        help=f"Target relative error of the -approximate distinct counts (default: {C.HLL_ERROR})",
+        type=sketch_error,
+        default=C.HLL_ERROR
+    )
+    parser.add_argument(
+        "-export",
+        help="Export the dataset with per-row quality flags (flagged) or without flagged rows (clean)",
+        choices=["flagged", "clean"],
+        default=None
+    )
+    parser.add_argument(
+        "-sample",
+        help="Share of the timelines to assess, greater than 0 and at most 1 (default: 1, whole file)",
+        type=sample_rate,
+        default=1.0
+    )
+    parser.add_argument(
+        "-incremental",
+        help="Only read the rows appended since the previous run (append-only logs)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "-cache",
+        help=f"Reuse the result of a previous run on an unchanged file (cache folder, default: {C.CACHE_FOLDER})",
+        nargs="?",
+        const=C.CACHE_FOLDER,
+        default=None
+    )
+    parser.add_argument(
+        "-chartcache",
+        help=f"Reuse the chart images already rendered from the same data and settings (cache folder, default: {C.CHART_CACHE_FOLDER})",
+        nargs="?",
+        const=C.CHART_CACHE_FOLDER,
+        default=None
+    )
+    parser.add_argument(
+        "-store",
+        help="Keep the chart images in memory, or write them to a temporary folder for debugging (default: memory)",
+        choices=[C.STORE_MEMORY, C.STORE_DISK],
+        default=C.STORE_MEMORY
+    )
+    parser.add_argument(
+        "-quality",
+        help="Chart quality: draft (fast, small report), standard or print (lossless, high resolution) (default: standard)",
+        choices=list(C.QUALITY_PROFILES),
+        default=C.DEFAULT_QUALITY
+    )
+    parser.add_argument(
+        "-backend",
+        help="Chart library: matplotlib (fast) or seaborn, both draw the same charts (default: matplotlib)",
+        choices=C.CHART_BACKENDS,
+        default=C.DEFAULT_CHART_BACKEND
+    )
+    parser.add_argument(
+        "-format",
+        help="Output: pdf report with charts, or json metrics only (no charts, faster) (default: pdf)",
+        choices=[C.FORMAT_PDF, C.FORMAT_JSON],
+        default=C.FORMAT_PDF
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -79,7 +173,20 @@ def main() -> int:
     
     # Initialize logger and DQA processor
     logger = Logger(__name__)
-    dqa = Dqa4PM(logger)
+    dqa = Dqa4PM(
+        logger,
+        approximate=args.approximate,
+        export=args.export,
+        sample_rate=args.sample,
+        incremental=args.incremental,
+        cache=args.cache,
+        store=args.store,
+        quality=args.quality,
+        chart_backend=args.backend,
+        chart_cache=args.chartcache,
+        output_format=args.format,
+        error=args.error
+    )
     
     # Run analysis
     logger.info("=" * 60)
@@ -88,13 +195,22 @@ def main() -> int:
     logger.info("Starting Analysis")
     
     try:
-        dqa.process(
-            args.filename,
-            args.separator,
-            args.pfi,
-            args.sn,
-            args.t
-        )
+        if len(args.filename) > 1:
+            dqa.process_shards(
+                args.filename,
+                args.separator,
+                args.pfi,
+                args.sn,
+                args.t
+            )
+        else:
+            dqa.process(
+                args.filename[0],
+                args.separator,
+                args.pfi,
+                args.sn,
+                args.t
+            )
         logger.info("Analysis Complete")
         return 0
         
@@ -5,11 +5,19 @@ This package contains:
 - base: Base Chart class with table generation
 - seaborn_chart: Seaborn-based chart implementations
 - matplotlib_chart: Matplotlib-based chart implementations
+- cache: Chart image cache
 """
 
 from pydqa4pm.charts.base import Chart
-from pydqa4pm.charts.seaborn_chart import SeabornChart
 from pydqa4pm.charts.matplotlib_chart import MatplotlibChart
+from pydqa4pm.charts.cache import ChartCache
 
-__all__ = ["Chart", "SeabornChart", "MatplotlibChart"]
+__all__ = ["Chart", "SeabornChart", "MatplotlibChart", "ChartCache"]
 
+
+def __getattr__(name):
+    # Seaborn is only loaded when its chart backend is used
+    if name == "SeabornChart":
+        from pydqa4pm.charts.seaborn_chart import SeabornChart
+        return SeabornChart
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
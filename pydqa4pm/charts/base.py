@@ -8,16 +8,92 @@ __author__ = "Benoit CAYLA"
 __email__ = "benoit@datacorner.fr"
 __license__ = "GPL"
 
-from typing import Optional
+import functools
+import inspect
+import os
+from typing import Optional, Tuple
 
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap, LogNorm
+from matplotlib.figure import Figure
 import numpy as np
 import pandas as pd
 
+from pydqa4pm.charts.cache import ChartCache
 from pydqa4pm.utils import constants as C
 
 
+def cached_chart(method):
+    """
+    Decorator of the Create* methods: consult the chart cache of the chart.
+    
+    On a hit the cached image is written to the output file or buffer
+    without drawing the chart; on a miss the chart is drawn and its image
+    is stored. Charts without a cache, data that cannot be hashed and
+    cache errors fall back to drawing the chart.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, filename, data, *args, **kwargs):
+        cache = self.cache
+        if cache is None or self._caching:
+            return method(self, filename, data, *args, **kwargs)
+        try:
+            arguments = signature.bind(self, filename, data, *args, **kwargs)
+            arguments.apply_defaults()
+            key = cache.key(
+                data,
+                chart=type(self).__name__,
+                method=method.__name__,
+                arguments={name: value for name, value in arguments.arguments.items()
+                           if name not in ("self", "filename", "data")},
+                size=[self.m_widthInch, self.m_heightInch],
+                quality=self._quality,
+                format=self._image_format(filename)
+            )
+        except TypeError:
+            return method(self, filename, data, *args, **kwargs)
+
+        image = cache.get(key)
+        if image is not None:
+            _write_image(filename, image)
+            return filename
+
+        # Charts delegating to another Create* method are stored once
+        self._caching = True
+        try:
+            result = method(self, filename, data, *args, **kwargs)
+        finally:
+            self._caching = False
+        if result is filename:
+            try:
+                cache.put(key, _read_image(filename))
+            except (OSError, AttributeError):
+                pass
+        return result
+
+    return wrapper
+
+
+def _read_image(filename) -> bytes:
+    """Read the image written to a file or a binary buffer."""
+    if isinstance(filename, (str, os.PathLike)):
+        with open(filename, "rb") as f:
+            return f.read()
+    return filename.getvalue()
+
+
+def _write_image(filename, image: bytes) -> None:
+    """Write an encoded image to a file or a binary buffer."""
+    if isinstance(filename, (str, os.PathLike)):
+        with open(filename, "wb") as f:
+            f.write(image)
+    else:
+        filename.write(image)
+
+
 class Chart:
     """
     Base class for chart generation.
@@ -25,6 +101,19 @@ class Chart:
     Provides common chart functionality and table generation capabilities.
     Subclasses (SeabornChart, MatplotlibChart) implement specific chart types.
     
+    Each chart is drawn on its own Figure with an Agg canvas: pyplot and
+    its global figure registry are not used, and the chart style is set
+    on the chart axes instead of the global rcParams. Charts can therefore
+    be rendered concurrently in threads, and a figure is freed as soon as
+    its image is saved.
+    
+    The resolution and image format come from a quality profile
+    (C.QUALITY_PROFILES): draft and standard JPEG, or lossless print PNG.
+    
+    With a ChartCache, the Create* methods (decorated with cached_chart)
+    return the cached image of a chart already drawn from the same data
+    with the same settings.
+    
     Attributes:
         m_widthInch: Chart width in inches.
         m_heightInch: Chart height in inches.
@@ -34,51 +123,145 @@ class Chart:
         >>> chart.CreateTable("output.jpg", dataframe)
     """
     
-    def __init__(self, width_inch: float = 12, height_inch: float = 4):
+    def __init__(self, width_inch: float = 12, height_inch: float = 4,
+                 quality: str = C.DEFAULT_QUALITY,
+                 cache: Optional[ChartCache] = None):
         """
         Initialize the chart with given dimensions.
         
         Args:
             width_inch: Width in inches.
             height_inch: Height in inches.
+            quality: Quality profile, a key of C.QUALITY_PROFILES.
+            cache: Chart image cache (None = charts always drawn).
+        
+        Raises:
+            ValueError: If the quality profile does not exist.
         """
-        rcParams['axes.spines.top'] = False
-        rcParams['axes.spines.right'] = False
-        rcParams["figure.autolayout"] = True
-        rcParams["axes.labelpad"] = 4.0
+        if quality not in C.QUALITY_PROFILES:
+            raise ValueError("Unknown quality profile: {}".format(quality))
+        self._quality = quality
+        self._cache = cache
+        self._caching = False
         self.set_figure_size(width_inch, height_inch)
     
+    @property
+    def quality(self) -> str:
+        """Quality profile of the images."""
+        return self._quality
+    
+    @property
+    def imageFormat(self) -> str:
+        """Image format (file extension) of the quality profile."""
+        return C.QUALITY_PROFILES[self._quality]["format"]
+    
+    @property
+    def cache(self) -> Optional[ChartCache]:
+        """Chart image cache, None when charts are always drawn."""
+        return self._cache
+    
     def set_figure_size(self, width_inch: float, height_inch: float) -> None:
         """Set the figure size for charts."""
         self.m_widthInch = width_inch
         self.m_heightInch = height_inch
-        plt.figure(figsize=(width_inch, height_inch))
     
     # Backward compatibility alias
     def setFigureSize(self, p_widthInch, p_heightInch):
         self.set_figure_size(p_widthInch, p_heightInch)
 
+    def _new_figure(self, layout: Optional[str] = "tight") -> Figure:
+        """Create a figure of the chart size, attached to its own Agg canvas."""
+        fig = Figure(figsize=(self.m_widthInch, self.m_heightInch), layout=layout)
+        FigureCanvasAgg(fig)
+        return fig
+
+    def _new_axes(self) -> Tuple[Figure, Axes]:
+        """Create a figure with one styled axes."""
+        fig = self._new_figure()
+        ax = fig.add_subplot()
+        self._apply_style(ax)
+        return fig, ax
+
+    def _apply_style(self, ax: Axes) -> None:
+        """Apply the chart style to an axes (top and right spines hidden)."""
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    def _image_format(self, filename) -> str:
+        """Image format of an output: the file extension, or the quality profile format."""
+        if isinstance(filename, (str, os.PathLike)):
+            return os.path.splitext(filename)[1][1:].lower() or self.imageFormat
+        return self.imageFormat
+
+    def _save(self, fig: Figure, filename, **kwargs) -> None:
+        """Save a figure to a file or a binary buffer, with the quality profile settings."""
+        profile = C.QUALITY_PROFILES[self._quality]
+        kwargs.setdefault("dpi", profile["dpi"])
+        kwargs.setdefault("format", self._image_format(filename))
+        if kwargs["format"] in ("jpg", "jpeg") and profile["jpeg_quality"]:
+            kwargs.setdefault("pil_kwargs", {"quality": profile["jpeg_quality"]})
+        fig.savefig(filename, **kwargs)
+
+    def _show_values(self, axes, orient: str = "v", space: float = 0.01) -> None:
+        """
+        Add value labels to bar chart patches.
+        
+        Args:
+            axes: Matplotlib axes or array of axes.
+            orient: Orientation - "v" for vertical, "h" for horizontal.
+            space: Spacing factor for label positioning.
+        """
+        def _single(ax):
+            if orient == "v":
+                for patch in ax.patches:
+                    x = patch.get_x() + patch.get_width() / 2
+                    y = patch.get_y() + patch.get_height() + (patch.get_height() * 0.01)
+                    value = '{:.0f}'.format(patch.get_height())
+                    ax.text(x, y, value, ha="center")
+            elif orient == "h":
+                for patch in ax.patches:
+                    x = patch.get_x() + patch.get_width() + float(space)
+                    y = patch.get_y() + patch.get_height() - (patch.get_height() * 0.5)
+                    value = '{:.0f}'.format(patch.get_width())
+                    ax.text(x, y, value, ha="left")
+
+        if isinstance(axes, np.ndarray):
+            for idx, ax in np.ndenumerate(axes):
+                _single(ax)
+        else:
+            _single(axes)
+    
+    # Backward compatibility alias
+    def show_values(self, axs, orient="v", space=.01):
+        self._show_values(axs, orient, space)
+
     def add_axis_info(self, col_x: str, col_y: str, 
                       label_x: Optional[str] = None, 
-                      label_y: Optional[str] = None) -> None:
+                      label_y: Optional[str] = None,
+                      ax: Optional[Axes] = None) -> None:
         """Add axis labels and formatting to the chart."""
+        if ax is None:
+            import matplotlib.pyplot as plt
+            ax = plt.gca()
         x_label = col_x if label_x is None else label_x
         y_label = col_y if label_y is None else label_y
         
-        plt.xlabel(x_label, fontsize=13)
-        plt.xticks(fontsize=9)
-        plt.ylabel(y_label, fontsize=13)
-        plt.yticks(fontsize=9)
-        plt.xticks(rotation=45)
+        ax.set_xlabel(x_label, fontsize=13, labelpad=4.0)
+        ax.set_ylabel(y_label, fontsize=13, labelpad=4.0)
+        ax.tick_params(axis='x', labelsize=9, labelrotation=45)
+        ax.tick_params(axis='y', labelsize=9)
     
     # Backward compatibility alias
     def addAxisInfos(self, p_colX, p_colY, p_labelX, p_labelY):
         self.add_axis_info(p_colX, p_colY, p_labelX, p_labelY)
 
-    def add_labels(self, y_values) -> None:
+    def add_labels(self, y_values, ax: Optional[Axes] = None) -> None:
         """Add value labels to horizontal bar chart."""
+        if ax is None:
+            import matplotlib.pyplot as plt
+            ax = plt.gca()
         for i, v in enumerate(y_values):
-            plt.text(v + 3, i + 0.25, str(v), color='black')
+            ax.text(v + 3, i + 0.25, str(v), color='black')
     
     # Backward compatibility alias
     def addlabels(self, p_y):
@@ -108,6 +291,54 @@ class Chart:
         """Create a vertical bar chart. Override in subclasses."""
         return C.NO_FILE_CREATED
 
+    @cached_chart
+    def CreateDensity(self, filename: str, data: pd.DataFrame,
+                      col_x: str, col_y: str,
+                      label_x: Optional[str] = None,
+                      label_y: Optional[str] = None,
+                      color: str = '#087E8B',
+                      bins: int = C.DENSITY_BINS) -> str:
+        """
+        Create a binned density chart of two numeric columns.
+        
+        The points are counted in a bins x bins grid with numpy.histogram2d
+        and only the grid is drawn (log color scale, empty bins left
+        blank), so the rendering time and memory do not depend on the
+        number of points.
+        
+        Args:
+            filename: Output file path, or binary buffer.
+            data: DataFrame with the data.
+            col_x: Column name for x-axis.
+            col_y: Column name for y-axis.
+            label_x: Optional x-axis label.
+            label_y: Optional y-axis label.
+            color: Color of the densest bins.
+            bins: Number of bins per axis.
+        
+        Returns:
+            Filename if successful, NO_FILE_CREATED otherwise.
+        """
+        try:
+            x = pd.to_numeric(data[col_x], errors='coerce').to_numpy(dtype=float)
+            y = pd.to_numeric(data[col_y], errors='coerce').to_numpy(dtype=float)
+            valid = ~(np.isnan(x) | np.isnan(y))
+            counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+            
+            fig, ax = self._new_axes()
+            mesh = ax.pcolormesh(
+                x_edges, y_edges, np.ma.masked_equal(counts.T, 0),
+                cmap=LinearSegmentedColormap.from_list("density", ["#E6F2F3", color]),
+                norm=LogNorm(vmin=1, vmax=max(counts.max(), 2))
+            )
+            fig.colorbar(mesh, ax=ax, label="Count")
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
+            return filename
+        except Exception:
+            return C.NO_FILE_CREATED
+
+    @cached_chart
     def CreateTable(self, filename: str, data: pd.DataFrame, 
                     max_cols_per_view: int = 5) -> str:
         """
@@ -117,7 +348,7 @@ class Chart:
         it will be split into multiple sub-tables.
         
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame to display.
             max_cols_per_view: Maximum columns per sub-table.
         
@@ -126,30 +357,24 @@ class Chart:
         """
         try:
             num_cols = len(data.columns)
-            cols_to_show = min(max_cols_per_view, num_cols)
             num_tables = (num_cols + max_cols_per_view - 1) // max_cols_per_view
 
             if num_tables == 1:
                 # Single table
-                table_data = np.asarray(data)
-                fig = plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-                ax = plt.Axes(fig, [0., 0., 1., 1.])
+                fig = self._new_figure(layout=None)
+                ax = fig.add_axes([0., 0., 1., 1.])
                 ax.set_axis_off()
-                fig.add_axes(ax)
-                plt.table(
-                    cellText=table_data,
+                ax.table(
+                    cellText=np.asarray(data),
                     colLabels=data.columns,
                     cellLoc='center',
                     loc='center'
                 )
-                fig.set_tight_layout(False)
             else:
                 # Multiple sub-tables
-                fig, axes = plt.subplots(
-                    nrows=num_tables,
-                    ncols=1,
-                    figsize=(self.m_widthInch, self.m_heightInch * num_tables * 2)
-                )
+                fig = self._new_figure(layout=None)
+                fig.set_size_inches(self.m_widthInch, self.m_heightInch * num_tables * 2)
+                axes = fig.subplots(nrows=num_tables, ncols=1)
                 
                 idx = 0
                 for i in range(num_tables):
@@ -167,13 +392,9 @@ class Chart:
                     )
                     
                     idx += max_cols_per_view
-                
-                fig.set_tight_layout(False)
 
-            plt.savefig(filename, dpi=300, bbox_inches='tight', pad_inches=0)
-            plt.close()
+            self._save(fig, filename, bbox_inches='tight', pad_inches=0)
             return filename
             
         except Exception as e:
             return C.NO_FILE_CREATED
-
@@ -0,0 +1,169 @@
+"""
+Chart image cache for pyDQA4ProcessMining.
+
+Stores rendered chart images on disk so a chart drawn from the same data
+with the same settings is not rendered again.
+"""
+
+__author__ = "Benoit CAYLA"
+__email__ = "benoit@datacorner.fr"
+__license__ = "GPL"
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+import pandas as pd
+
+from pydqa4pm.utils import constants as C
+
+
+class ChartCache:
+    """
+    Content-addressed cache of chart images.
+
+    An image is keyed by a fingerprint of the chart DataFrame (values,
+    index, column names and types) and the chart settings: chart class and
+    method, other arguments, size, quality profile and image format. The
+    report data is aggregated, so the fingerprint is cheap to compute, and
+    reports regenerated from the same log with other settings reuse the
+    charts that did not change.
+
+    The cache is a flat folder of image files, bounded in size on disk;
+    the least recently used images are evicted first. Writes are atomic,
+    so the cache can be shared by the chart rendering processes.
+
+    Example:
+        >>> cache = ChartCache("~/.cache/pydqa4pm-charts")
+        >>> chart = MatplotlibChart(10, 6, cache=cache)
+        >>> chart.CreateBarH("output.jpg", df, "Category", "Value")
+    """
+
+    def __init__(self, path: str = C.CHART_CACHE_FOLDER, max_bytes: int = C.CHART_CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache folder (created when needed).
+            max_bytes: Maximum size of the cache on disk.
+        """
+        self._path = os.path.expanduser(path)
+        self._max_bytes = max_bytes
+
+    @property
+    def path(self) -> str:
+        """Cache folder."""
+        return self._path
+
+    @property
+    def maxBytes(self) -> int:
+        """Maximum size of the cache on disk."""
+        return self._max_bytes
+
+    def key(self, data: pd.DataFrame, **settings) -> str:
+        """
+        Build the cache key of a chart.
+
+        Args:
+            data: DataFrame drawn by the chart.
+            **settings: Chart settings changing the image (class, size...).
+
+        Returns:
+            Hexadecimal key of the image.
+
+        Raises:
+            TypeError: If the data cannot be hashed (unhashable values).
+        """
+        from pydqa4pm import __version__
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        parts = [
+            [str(column) for column in data.columns],
+            [str(dtype) for dtype in data.dtypes],
+            __version__,
+            sorted(settings.items())
+        ]
+        digest.update(json.dumps(parts, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a cached image.
+
+        Args:
+            key: Key built with key().
+
+        Returns:
+            The encoded image, or None when it is not cached.
+        """
+        filename = os.path.join(self._path, key)
+        try:
+            with open(filename, "rb") as f:
+                image = f.read()
+            # Mark the image as recently used
+            now = time.time()
+            os.utime(filename, (now, now))
+        except OSError:
+            return None
+        return image
+
+    def put(self, key: str, image: bytes) -> None:
+        """
+        Store an image, then evict old images above the size limit.
+
+        Args:
+            key: Key built with key().
+            image: Encoded image.
+        """
+        os.makedirs(self._path, exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=self._path, prefix=".writing-")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(image)
+            os.replace(temp, os.path.join(self._path, key))
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used images until the cache fits its size.
+
+        Returns:
+            Number of images removed.
+        """
+        if not os.path.isdir(self._path):
+            return 0
+        images = []
+        for name in os.listdir(self._path):
+            filename = os.path.join(self._path, name)
+            try:
+                if not name.startswith("."):
+                    stat = os.stat(filename)
+                    images.append((stat.st_mtime, stat.st_size, filename))
+            except OSError:
+                # Evicted by another process
+                continue
+
+        total = sum(size for _, size, _ in images)
+        removed = 0
+        for _, size, filename in sorted(images):
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(filename)
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+        return removed
+
+    def clear(self) -> None:
+        """Remove every image of the cache."""
+        if os.path.isdir(self._path):
+            for name in os.listdir(self._path):
+                os.remove(os.path.join(self._path, name))
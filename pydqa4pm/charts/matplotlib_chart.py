@@ -10,24 +10,29 @@ __license__ = "GPL"
 
 from typing import Optional
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
-from pydqa4pm.charts.base import Chart
+from pydqa4pm.charts.base import Chart, cached_chart
 from pydqa4pm.utils import constants as C
 
 
 class MatplotlibChart(Chart):
     """
     Pure Matplotlib chart generator.
-    
-    Provides bar charts and line charts using Matplotlib without Seaborn.
-    
+
+    Provides bar charts, line charts and scatter plots using Matplotlib
+    without Seaborn. The data is already aggregated, so the charts are
+    drawn directly; they look the same as those of SeabornChart
+    (categories in data order, value labels, same markers), and render
+    faster.
+
     Example:
         >>> chart = MatplotlibChart(10, 6)
         >>> chart.CreateLine("output.png", df, "X", "Y")
     """
 
+    @cached_chart
     def CreateLine(self, filename: str, data: pd.DataFrame,
                    col_x: str, col_y: str,
                    label_x: Optional[str] = None,
@@ -35,31 +40,30 @@ class MatplotlibChart(Chart):
                    color: str = '#087E8B') -> str:
         """
         Create a line chart.
-        
+
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
             col_x: Column name for x-axis.
             col_y: Column name for y-axis.
             label_x: Optional x-axis label.
             label_y: Optional y-axis label.
             color: Line color.
-        
+
         Returns:
             Filename if successful, NO_FILE_CREATED otherwise.
         """
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            plt.grid(color='#F2F2F2', alpha=1, zorder=0)
-            plt.plot(data[col_x], data[col_y], color=color, lw=3, zorder=5)
-            self.add_axis_info(col_x, col_y, label_x, label_y)
-            plt.savefig(filename, dpi=300, bbox_inches='tight', pad_inches=0)
-            plt.close()
+            fig, ax = self._new_axes()
+            ordered = data.sort_values(col_x)
+            ax.plot(ordered[col_x], ordered[col_y], color=color)
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception:
-            plt.close()
             return C.NO_FILE_CREATED
 
+    @cached_chart
     def CreateBarH(self, filename: str, data: pd.DataFrame,
                    col_x: str, col_y: str,
                    label_x: Optional[str] = None,
@@ -67,31 +71,34 @@ class MatplotlibChart(Chart):
                    color: str = '#087E8B') -> str:
         """
         Create a horizontal bar chart.
-        
+
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
-            col_x: Column name for categories.
-            col_y: Column name for values.
+            col_x: Column name for categories (y-axis in horizontal bar).
+            col_y: Column name for values (x-axis in horizontal bar).
             label_x: Optional x-axis label.
             label_y: Optional y-axis label.
             color: Bar color.
-        
+
         Returns:
             Filename if successful, NO_FILE_CREATED otherwise.
         """
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            plt.barh(data[col_x], data[col_y], color=color)
-            self.add_labels(data[col_y])
-            self.add_axis_info(col_x, col_y, label_y, label_x)
-            plt.savefig(filename, dpi=300)
-            plt.close()
+            fig, ax = self._new_axes()
+            positions = np.arange(len(data))
+            ax.barh(positions, data[col_y], height=0.8, color=color)
+            ax.set_yticks(positions, [str(v) for v in data[col_x]])
+            # First category on top
+            ax.set_ylim(len(data) - 0.5, -0.5)
+            self._show_values(ax, "h")
+            self.add_axis_info(col_x, col_y, label_y, label_x, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception:
-            plt.close()
             return C.NO_FILE_CREATED
 
+    @cached_chart
     def CreateBarV(self, filename: str, data: pd.DataFrame,
                    col_x: str, col_y: str,
                    label_x: Optional[str] = None,
@@ -99,27 +106,65 @@ class MatplotlibChart(Chart):
                    color: str = '#087E8B') -> str:
         """
         Create a vertical bar chart.
-        
+
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
-            col_x: Column name for categories.
-            col_y: Column name for values.
+            col_x: Column name for categories (x-axis).
+            col_y: Column name for values (y-axis).
             label_x: Optional x-axis label.
             label_y: Optional y-axis label.
             color: Bar color.
-        
+
         Returns:
             Filename if successful, NO_FILE_CREATED otherwise.
         """
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            plt.bar(data[col_x], data[col_y], color=color)
-            self.add_axis_info(col_x, col_y, label_x, label_y)
-            plt.savefig(filename, dpi=300, bbox_inches='tight', pad_inches=0)
-            plt.close()
+            fig, ax = self._new_axes()
+            positions = np.arange(len(data))
+            ax.bar(positions, data[col_y], width=0.8, color=color)
+            ax.set_xticks(positions, [str(v) for v in data[col_x]])
+            ax.set_xlim(-0.5, len(data) - 0.5)
+            self._show_values(ax, "v")
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception:
-            plt.close()
             return C.NO_FILE_CREATED
 
+    @cached_chart
+    def CreateScatter(self, filename: str, data: pd.DataFrame,
+                      col_x: str, col_y: str,
+                      label_x: Optional[str] = None,
+                      label_y: Optional[str] = None,
+                      color: str = '#087E8B') -> str:
+        """
+        Create a scatter plot.
+
+        Above C.SCATTER_MAX_POINTS rows, a binned density chart is drawn
+        instead (see CreateDensity()).
+
+        Args:
+            filename: Output file path, or binary buffer.
+            data: DataFrame with the data.
+            col_x: Column name for x-axis.
+            col_y: Column name for y-axis.
+            label_x: Optional x-axis label.
+            label_y: Optional y-axis label.
+            color: Point color.
+
+        Returns:
+            Filename if successful, NO_FILE_CREATED otherwise.
+        """
+        if len(data) > C.SCATTER_MAX_POINTS:
+            return self.CreateDensity(filename, data, col_x, col_y, label_x, label_y, color)
+        try:
+            fig, ax = self._new_axes()
+            # Same markers as seaborn.scatterplot
+            ax.scatter(data[col_x], data[col_y], s=36, color=color,
+                       edgecolors='white', linewidths=0.48)
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
+            return filename
+        except Exception:
+            return C.NO_FILE_CREATED
@@ -10,12 +10,10 @@ __license__ = "GPL"
 
 from typing import Optional
 
-import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
 import seaborn as sns
 
-from pydqa4pm.charts.base import Chart
+from pydqa4pm.charts.base import Chart, cached_chart
 from pydqa4pm.utils import constants as C
 
 
@@ -24,45 +22,15 @@ class SeabornChart(Chart):
     Seaborn-based chart generator.
     
     Provides bar charts, line charts, and scatter plots using Seaborn.
+    The charts look the same as those of MatplotlibChart, which draws
+    them faster without Seaborn.
     
     Example:
         >>> chart = SeabornChart(10, 6)
         >>> chart.CreateBarH("output.png", df, "Category", "Value")
     """
     
-    def _show_values(self, axes, orient: str = "v", space: float = 0.01) -> None:
-        """
-        Add value labels to bar chart patches.
-        
-        Args:
-            axes: Matplotlib axes or array of axes.
-            orient: Orientation - "v" for vertical, "h" for horizontal.
-            space: Spacing factor for label positioning.
-        """
-        def _single(ax):
-            if orient == "v":
-                for patch in ax.patches:
-                    x = patch.get_x() + patch.get_width() / 2
-                    y = patch.get_y() + patch.get_height() + (patch.get_height() * 0.01)
-                    value = '{:.0f}'.format(patch.get_height())
-                    ax.text(x, y, value, ha="center")
-            elif orient == "h":
-                for patch in ax.patches:
-                    x = patch.get_x() + patch.get_width() + float(space)
-                    y = patch.get_y() + patch.get_height() - (patch.get_height() * 0.5)
-                    value = '{:.0f}'.format(patch.get_width())
-                    ax.text(x, y, value, ha="left")
-
-        if isinstance(axes, np.ndarray):
-            for idx, ax in np.ndenumerate(axes):
-                _single(ax)
-        else:
-            _single(axes)
-    
-    # Backward compatibility alias
-    def show_values(self, axs, orient="v", space=.01):
-        self._show_values(axs, orient, space)
-
+    @cached_chart
     def CreateBarH(self, filename: str, data: pd.DataFrame,
                    col_x: str, col_y: str,
                    label_x: Optional[str] = None,
@@ -72,35 +40,36 @@ class SeabornChart(Chart):
         Create a horizontal bar chart.
         
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
             col_x: Column name for categories (y-axis in horizontal bar).
             col_y: Column name for values (x-axis in horizontal bar).
             label_x: Optional x-axis label.
             label_y: Optional y-axis label.
-            color: Bar color (default: teal).
+            color: Bar color.
         
         Returns:
             Filename if successful, NO_FILE_CREATED otherwise.
         """
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            ax = sns.barplot(
+            fig, ax = self._new_axes()
+            sns.barplot(
                 x=data[col_y],
                 y=data[col_x],
                 orient='h',
-                order=data[col_x]
+                order=data[col_x],
+                color=color,
+                saturation=1,
+                ax=ax
             )
             self._show_values(ax, "h")
-            self.add_axis_info(col_x, col_y, label_y, label_x)
-            plt.tight_layout()
-            plt.savefig(filename)
-            plt.close()
+            self.add_axis_info(col_x, col_y, label_y, label_x, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception as e:
-            plt.close()
             return C.NO_FILE_CREATED
 
+    @cached_chart
     def CreateBarV(self, filename: str, data: pd.DataFrame,
                    col_x: str, col_y: str,
                    label_x: Optional[str] = None,
@@ -110,7 +79,7 @@ class SeabornChart(Chart):
         Create a vertical bar chart.
         
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
             col_x: Column name for categories (x-axis).
             col_y: Column name for values (y-axis).
@@ -122,23 +91,24 @@ class SeabornChart(Chart):
             Filename if successful, NO_FILE_CREATED otherwise.
         """
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            ax = sns.barplot(
+            fig, ax = self._new_axes()
+            sns.barplot(
                 x=data[col_x],
                 y=data[col_y],
                 orient='v',
-                order=data[col_x]
+                order=data[col_x],
+                color=color,
+                saturation=1,
+                ax=ax
             )
             self._show_values(ax, "v")
-            self.add_axis_info(col_x, col_y, label_x, label_y)
-            plt.tight_layout()
-            plt.savefig(filename)
-            plt.close()
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception as e:
-            plt.close()
             return C.NO_FILE_CREATED
 
+    @cached_chart
     def CreateLine(self, filename: str, data: pd.DataFrame,
                    col_x: str, col_y: str,
                    label_x: Optional[str] = None,
@@ -148,7 +118,7 @@ class SeabornChart(Chart):
         Create a line chart.
         
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
             col_x: Column name for x-axis.
             col_y: Column name for y-axis.
@@ -160,17 +130,15 @@ class SeabornChart(Chart):
             Filename if successful, NO_FILE_CREATED otherwise.
         """
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            ax = sns.lineplot(data=data, x=col_x, y=col_y, sort=True)
-            self.add_axis_info(col_x, col_y, label_x, label_y)
-            plt.tight_layout()
-            plt.savefig(filename)
-            plt.close()
+            fig, ax = self._new_axes()
+            sns.lineplot(data=data, x=col_x, y=col_y, sort=True, color=color, ax=ax)
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception as e:
-            plt.close()
             return C.NO_FILE_CREATED
 
+    @cached_chart
     def CreateScatter(self, filename: str, data: pd.DataFrame,
                       col_x: str, col_y: str,
                       label_x: Optional[str] = None,
@@ -179,8 +147,11 @@ class SeabornChart(Chart):
         """
         Create a scatter plot.
         
+        Above C.SCATTER_MAX_POINTS rows, a binned density chart is drawn
+        instead (see CreateDensity()).
+        
         Args:
-            filename: Output file path.
+            filename: Output file path, or binary buffer.
             data: DataFrame with the data.
             col_x: Column name for x-axis.
             col_y: Column name for y-axis.
@@ -191,15 +162,14 @@ class SeabornChart(Chart):
         Returns:
             Filename if successful, NO_FILE_CREATED otherwise.
         """
+        if len(data) > C.SCATTER_MAX_POINTS:
+            return self.CreateDensity(filename, data, col_x, col_y, label_x, label_y, color)
         try:
-            plt.figure(figsize=(self.m_widthInch, self.m_heightInch))
-            ax = sns.scatterplot(data=data, x=col_x, y=col_y)
-            self.add_axis_info(col_x, col_y, label_x, label_y)
-            plt.tight_layout()
-            plt.savefig(filename)
-            plt.close()
+            fig, ax = self._new_axes()
+            sns.scatterplot(data=data, x=col_x, y=col_y, color=color, ax=ax)
+            self.add_axis_info(col_x, col_y, label_x, label_y, ax=ax)
+            self._save(fig, filename)
             return filename
         except Exception as e:
-            plt.close()
             return C.NO_FILE_CREATED
 
@@ -5,11 +5,15 @@ This package contains:
 - dqa: Main DQA processing orchestrator
 - datasource: CSV data source handling and analysis
 - report_data: Data container for DQA report results
+- profile_state: Mergeable profile state for sharded logs
+- checkpoint: Incremental assessment checkpoints for append-only logs
 """
 
 from pydqa4pm.core.dqa import Dqa4PM
 from pydqa4pm.core.datasource import DataSource
 from pydqa4pm.core.report_data import DQAReportData
+from pydqa4pm.core.profile_state import ProfileState, profileShards
+from pydqa4pm.core.checkpoint import Checkpoint
 
-__all__ = ["Dqa4PM", "DataSource", "DQAReportData"]
+__all__ = ["Dqa4PM", "DataSource", "DQAReportData", "ProfileState", "profileShards", "Checkpoint"]
 
@@ -0,0 +1,241 @@
+"""
+Incremental assessment checkpoints for pyDQA4ProcessMining.
+
+Provides the Checkpoint class, which stores what a run has learned about
+an append-only event log so the next run only reads the rows appended
+since then.
+"""
+
+__author__ = "Benoit CAYLA"
+__email__ = "benoit@datacorner.fr"
+__license__ = "GPL"
+
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+from pydqa4pm.core.datasource import DataSource
+from pydqa4pm.core.profile_state import ProfileState
+from pydqa4pm.core.report_data import DQAReportData
+from pydqa4pm.utils import constants as C
+from pydqa4pm.utils.events import SNList
+
+
+def _file_signature(filename: str, offset: int) -> str:
+    """Hash the bytes just before an offset, to detect a rewritten file."""
+    start = max(0, offset - C.CHECKPOINT_SIGNATURE_BYTES)
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+class Checkpoint:
+    """
+    State of an append-only event log after an assessment run.
+
+    The checkpoint holds the byte offset of the rows already read, a
+    signature of the bytes before it, and the ProfileState of those rows.
+    Each run profiles the appended rows and merges their state, so the
+    report is identical to a full run on the file: duplicates are counted
+    on the key values, and the first and last event of each timeline pair
+    the events that straddle two runs for the waiting time, out-of-order,
+    near duplicate and attribute checks.
+
+    The checkpoint grows with the number of distinct (PFI, SN, T) rows
+    (see ProfileState).
+
+    Example:
+        >>> cp = Checkpoint.load(path) if os.path.exists(path) else Checkpoint(...)
+        >>> ds = DataSource(filename, pfi, sn, t)
+        >>> ds.openTail(",", cp.offset, cp.columns)
+        >>> cp.update(ds)
+        >>> cp.save(path)
+    """
+
+    def __init__(self, filename: str, sep: str, pfi: str, sn: str, t: str):
+        """
+        Initialize a checkpoint before any row has been read.
+
+        Args:
+            filename: Path to the CSV file.
+            sep: Field separator character.
+            pfi: Timeline ID column name.
+            sn: Event ID column name.
+            t: Timestamp column name.
+        """
+        self._filename = filename
+        self._separator = sep
+        self._offset = 0
+        self._signature = ""
+        self._state = ProfileState(pfi, sn, t)
+
+    # =========================================================================
+    # Properties
+    # =========================================================================
+
+    @property
+    def filename(self) -> str:
+        """Path to the CSV file."""
+        return self._filename
+
+    @property
+    def offset(self) -> int:
+        """Byte offset of the first row not read yet."""
+        return self._offset
+
+    @property
+    def rowsRead(self) -> int:
+        """Number of rows read so far."""
+        return self._state.rows + self._state.rejects
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """Column names of the file, or None before the header has been read."""
+        return self._state.columns or None
+
+    @property
+    def keys(self) -> List[str]:
+        """Key column names [PFI, SN, T]."""
+        return self._state.keys
+
+    @property
+    def state(self) -> ProfileState:
+        """Profile state of the rows read so far."""
+        return self._state
+
+    @property
+    def openCases(self) -> int:
+        """Number of timelines summarized."""
+        return self._state.timelines
+
+    def matches(self, filename: str, sep: str, pfi: str, sn: str, t: str) -> bool:
+        """
+        Check the checkpoint can be resumed on a file.
+
+        The parameters must be the same, and the file must still hold the
+        bytes read by the previous run (it has only been appended to).
+        """
+        if (filename, sep, [pfi, sn, t]) != (self._filename, self._separator, self.keys):
+            return False
+        if not os.path.exists(filename) or os.path.getsize(filename) < self._offset:
+            return False
+        return _file_signature(filename, self._offset) == self._signature
+
+    # =========================================================================
+    # Update
+    # =========================================================================
+
+    def update(self, ds: DataSource) -> "Checkpoint":
+        """
+        Merge the rows of a DataSource opened with openTail() at our offset.
+
+        Rows with a missing key are removed from the DataSource, as done
+        by the report checks. The column names are recorded as soon as the
+        header has been read, even when no row follows it yet.
+
+        Args:
+            ds: DataSource holding the appended rows.
+
+        Returns:
+            This checkpoint, updated.
+
+        Raises:
+            ValueError: If the rows do not have the columns of the previous runs.
+        """
+        if ds.columns:
+            self._state.merge(ProfileState.fromDataSource(ds))
+        self._offset = ds.endOffset
+        self._signature = _file_signature(self._filename, self._offset)
+        return self
+
+    # =========================================================================
+    # Report Data
+    # =========================================================================
+
+    def toReportData(self, buckets: int = C.ACTIVE_CASES_BUCKETS) -> DQAReportData:
+        """
+        Build the report data of all the rows read so far.
+
+        Args:
+            buckets: Number of time buckets of the open timelines chart.
+
+        Returns:
+            DQAReportData with the same checks as a full run on the file.
+        """
+        return self._state.toReportData(self._filename, buckets)
+
+    def dumpUniqueEvents(self, filename: str) -> int:
+        """
+        Export the unique events of all the rows read so far with their frequencies.
+
+        Args:
+            filename: Path to the unique events CSV file.
+
+        Returns:
+            Number of unique events.
+        """
+        df = self._state.getCountValuesForField(self.keys[1])
+        if df.empty:
+            return 0
+        events = SNList(df)
+        events.cleanse()
+        events.SNList.to_csv(filename, index=False)
+        return events.SNList.shape[0]
+
+    def dumpDuplicatesFile(self, filename: str) -> int:
+        """
+        Write the duplicate groups of all the rows read so far with their multiplicity.
+
+        Args:
+            filename: Path to the duplicates CSV file.
+
+        Returns:
+            Number of duplicate groups.
+        """
+        groups = self._state.getDuplicateGroups()
+        groups.to_csv(filename, index=False)
+        return groups.shape[0]
+
+    # =========================================================================
+    # Serialization
+    # =========================================================================
+
+    def to_dict(self) -> dict:
+        """Serialize the checkpoint to a JSON-compatible dictionary."""
+        return {
+            "version": C.CHECKPOINT_VERSION,
+            "filename": self._filename,
+            "separator": self._separator,
+            "offset": self._offset,
+            "signature": self._signature,
+            "state": self._state.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Checkpoint":
+        """
+        Rebuild a checkpoint serialized with to_dict().
+
+        Raises:
+            ValueError: If the checkpoint was written by an incompatible version.
+        """
+        if data.get("version") != C.CHECKPOINT_VERSION:
+            raise ValueError("Unsupported checkpoint version: {}".format(data.get("version")))
+        state = ProfileState.from_dict(data["state"])
+        checkpoint = cls(data["filename"], data["separator"], *state.keys)
+        checkpoint._offset = data["offset"]
+        checkpoint._signature = data["signature"]
+        checkpoint._state = state
+        return checkpoint
+
+    def save(self, filename: str) -> None:
+        """Write the checkpoint to a JSON file."""
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename: str) -> "Checkpoint":
+        """Read a checkpoint written by save()."""
+        with open(filename, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -8,13 +8,18 @@ __author__ = "Benoit CAYLA"
 __email__ = "benoit@datacorner.fr"
 __license__ = "GPL"
 
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from pydqa4pm.utils import constants as C
 from pydqa4pm.utils.events import SNList
+from pydqa4pm.utils.sketches import HyperLogLog, SpaceSaving, hash_rows, hash_values, key_text
 
 
 def check_date_format(date_str: str, fmt: str) -> bool:
@@ -35,6 +40,59 @@ def check_date_format(date_str: str, fmt: str) -> bool:
         return False
 
 
+def count_active_cases(starts: np.ndarray, ends: np.ndarray, buckets: int) -> pd.DataFrame:
+    """
+    Count the open timelines per time bucket with a sweep-line.
+    
+    Args:
+        starts: First timestamp of each timeline (int64 nanoseconds).
+        ends: Last timestamp of each timeline (int64 nanoseconds).
+        buckets: Number of time buckets.
+    
+    Returns:
+        DataFrame with the bucket start time and the open timelines count.
+    """
+    t_min, t_max = starts.min(), ends.max()
+    width = max((t_max - t_min) / buckets, 1)
+    start_idx = np.minimum(((starts - t_min) // width).astype('int64'), buckets - 1)
+    end_idx = np.minimum(((ends - t_min) // width).astype('int64'), buckets - 1)
+    opened = np.cumsum(np.bincount(start_idx, minlength=buckets))
+    closed = np.cumsum(np.bincount(end_idx, minlength=buckets))
+    active = opened - np.concatenate(([0], closed[:-1]))
+    
+    edges = (t_min + np.arange(buckets) * width).astype('int64')
+    return pd.DataFrame({
+        C.FLD_TIME: edges.astype('datetime64[ns]'),
+        C.FLD_ACTIVE_CASES: active
+    })
+
+
+def classify_attributes(attributes: List[str], violations: pd.Series, timelines: int) -> pd.DataFrame:
+    """
+    Classify attributes as case-level or event-level.
+    
+    Args:
+        attributes: Attribute column names, in report order.
+        violations: Number of multi-event timelines holding more than one
+            value, per attribute.
+        timelines: Number of multi-event timelines.
+    
+    Returns:
+        DataFrame with the attribute, its level and the inconsistent timelines count.
+    """
+    if timelines > 0:
+        constant_ratio = 1 - violations / timelines
+    else:
+        constant_ratio = pd.Series(1.0, index=violations.index)
+    is_case = constant_ratio >= C.CASE_ATTRIBUTE_RATIO
+    
+    return pd.DataFrame({
+        C.FLD_ATTRIBUTE: attributes,
+        C.FLD_ATTR_LEVEL: np.where(is_case[attributes], C.ATTR_LEVEL_CASE, C.ATTR_LEVEL_EVENT),
+        C.FLD_ATTR_VIOLATIONS: np.where(is_case[attributes], violations[attributes], 0)
+    })
+
+
 class DataSource:
     """
     Manages CSV data source loading, validation, and analysis.
@@ -60,7 +118,8 @@ class DataSource:
         ...     print(f"Duplicates: {ds.check_duplicates_count()}")
     """
     
-    def __init__(self, filename: str, pfi: str, sn: str, t: str):
+    def __init__(self, filename: str, pfi: str, sn: str, t: str, sample_rate: float = 1.0,
+                 approximate: bool = False, error: float = C.HLL_ERROR):
         """
         Initialize the data source.
         
@@ -69,6 +128,12 @@ class DataSource:
             pfi: Column name for Timeline ID (Process Flow Identifier).
             sn: Column name for Event ID (Step Name).
             t: Column name for Timestamp.
+            sample_rate: Share of the timelines to load (1.0 = whole file).
+            approximate: Build the key sketches (see keySketches()) while
+                the file is loaded. The rows are still loaded in memory for
+                the duplicate, near duplicate and waiting time checks.
+            error: Target relative error of the distinct count sketches
+                built in approximate mode.
         """
         self._filename = filename
         self._dataset = pd.DataFrame()
@@ -78,6 +143,19 @@ class DataSource:
         self._initial_row_count = 0
         self._potential_attributes: List[str] = []
         self._read_rejects: List = []
+        self._timestamps: Optional[pd.Series] = None
+        self._value_counts: Dict[str, pd.Series] = {}
+        self._key_hashes: Optional[np.ndarray] = None
+        self._flags = np.zeros(0, dtype=np.uint16)
+        self._key_rejects = pd.DataFrame()
+        self._separator = ","
+        self._sample_rate = sample_rate
+        self._approximate = approximate
+        self._error = error
+        self._distinct: Dict[str, HyperLogLog] = {}
+        self._top: Dict[str, SpaceSaving] = {}
+        self._clusters = np.zeros(0, dtype=np.int64)
+        self._end_offset = 0
 
     # =========================================================================
     # Properties
@@ -98,11 +176,46 @@ class DataSource:
         """Path to the key validation rejects file."""
         return self.filenameWithoutExt + C.SUFFIX_3KEYS_REJECT
     
+    @property
+    def duplicatesFilename(self) -> str:
+        """Path to the duplicate groups file."""
+        return self.filenameWithoutExt + C.SUFFIX_DUPLICATES
+    
+    @property
+    def nearDuplicatesRejectFilename(self) -> str:
+        """Path to the near-duplicate events rejects file."""
+        return self.filenameWithoutExt + C.SUFFIX_NEAR_DUP_REJECT
+    
     @property
     def uniqueEventsFilename(self) -> str:
         """Path to the unique events file."""
         return self.filenameWithoutExt + C.SUFFIX_EVENTS
 
+    @property
+    def endOffset(self) -> int:
+        """Byte offset of the end of the data read by openTail()."""
+        return self._end_offset
+
+    @property
+    def sampleRate(self) -> float:
+        """Share of the timelines loaded (1.0 = whole file)."""
+        return self._sample_rate
+    
+    @property
+    def isSampled(self) -> bool:
+        """Whether only a sample of the timelines is loaded."""
+        return self._sample_rate < 1.0
+
+    @property
+    def isApproximate(self) -> bool:
+        """Whether the key sketches are built while the file is loaded."""
+        return self._approximate
+
+    @property
+    def error(self) -> float:
+        """Target relative error of the distinct count sketches (approximate mode)."""
+        return self._error
+
     @property
     def PFI(self) -> str:
         """Timeline ID column name."""
@@ -128,6 +241,11 @@ class DataSource:
         """List of non-key column names (potential attributes)."""
         return self._potential_attributes
     
+    @property
+    def columns(self) -> List[str]:
+        """Column names of the dataset."""
+        return self._dataset.columns.tolist()
+    
     @property
     def filenameWithoutExt(self) -> str:
         """Filename without extension."""
@@ -136,6 +254,25 @@ class DataSource:
         except Exception:
             return C.DEFAULT_REPORT_FILE
     
+    @property
+    def flaggedFilename(self) -> str:
+        """Path to the dataset export with quality flags."""
+        return self.filenameWithoutExt + C.SUFFIX_FLAGGED
+    
+    @property
+    def cleanFilename(self) -> str:
+        """Path to the dataset export without flagged rows."""
+        return self.filenameWithoutExt + C.SUFFIX_CLEAN
+    
+    @property
+    def qualityFlags(self) -> np.ndarray:
+        """
+        Per-row quality flags (C.FLAG_* bitmask), indexed by row position in the file.
+        
+        Each check sets its bit on the rows it finds faulty as it runs.
+        """
+        return self._flags
+    
     @property
     def rejectRows(self) -> int:
         """Number of rows rejected after key validation."""
@@ -164,19 +301,167 @@ class DataSource:
         Returns:
             Tuple of (success, error) where error is None on success.
         """
+        self._separator = sep
         try:
-            self._dataset = pd.read_csv(
-                self._filename,
-                on_bad_lines=self._add_read_reject,
-                engine='python',
-                sep=sep
-            )
-            self._initial_row_count = self._dataset.shape[0]
-            self._dump_read_rejects()
+            if self.isSampled or self._approximate:
+                self._dataset = self._read_chunks(sep)
+                if self.isSampled:
+                    self._clusters = self._cluster_ids()
+            else:
+                self._dataset = pd.read_csv(
+                    self._filename,
+                    on_bad_lines=self._add_read_reject,
+                    engine='python',
+                    sep=sep
+                )
+            self._on_loaded()
+            return True, None
+        except Exception as e:
+            return False, e
+
+    def openTail(self, sep: str = ",", offset: int = 0,
+                 columns: Optional[List[str]] = None) -> Tuple[bool, Optional[Exception]]:
+        """
+        Load the rows stored after a byte offset of the CSV file.
+        
+        Used to read only the rows appended since a previous run; endOffset
+        then gives the offset to resume from next time. Only complete lines
+        are read: a last line without its newline may still be being
+        written, it is read by the next run.
+        
+        Args:
+            sep: The field separator character.
+            offset: Byte offset of the first row to read (0 = whole file).
+            columns: Column names, required when offset is past the header.
+        
+        Returns:
+            Tuple of (success, error) where error is None on success.
+        """
+        self._separator = sep
+        try:
+            with open(self._filename, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            data = data[:data.rfind(b"\n") + 1]
+            self._end_offset = offset + len(data)
+            
+            if data.strip():
+                self._dataset = pd.read_csv(
+                    io.BytesIO(data),
+                    on_bad_lines=self._add_read_reject,
+                    engine='python',
+                    sep=sep,
+                    header=None if columns else 'infer',
+                    names=columns
+                )
+            else:
+                self._dataset = pd.DataFrame(columns=columns)
+            self._on_loaded()
             return True, None
         except Exception as e:
             return False, e
+
+    def _on_loaded(self) -> None:
+        """Reset the per-row state after the dataset has been read."""
+        self._initial_row_count = self._dataset.shape[0]
+        self._flags = np.zeros(self._initial_row_count, dtype=np.uint16)
+        self._key_rejects = self._dataset.iloc[:0]
+        self._invalidate_profiles()
+        self._dump_read_rejects()
     
+    def _sample_mask(self, chunk: pd.DataFrame, offset: int) -> np.ndarray:
+        """
+        Select the rows of a chunk belonging to the sampled timelines.
+        
+        A timeline is kept when the hash of its ID falls below the sampling
+        rate, so all its events are kept or dropped together whatever the
+        chunk they are read in. The IDs are hashed in their text form
+        (key_text), which does not depend on the type pandas inferred for
+        the chunk: a chunk with a missing ID reads integer IDs as floats.
+        Rows without Timeline ID are sampled individually from their
+        position in the file.
+        """
+        positions = pd.Series(np.arange(offset, offset + len(chunk)))
+        if self._keyname_PFI in chunk.columns:
+            pfi = chunk[self._keyname_PFI].reset_index(drop=True)
+            hashes = hash_values(key_text(pfi)).copy()
+            no_pfi = pfi.isnull().to_numpy()
+            hashes[no_pfi] = hash_values(positions[no_pfi])
+        else:
+            hashes = hash_values(positions)
+        return (hashes >> np.uint64(11)) < self._sample_rate * 2 ** 53
+
+    def _read_chunks(self, sep: str) -> pd.DataFrame:
+        """
+        Read the file chunk by chunk, keeping only the sampled timelines.
+        
+        In approximate mode, each loaded chunk also updates the key
+        sketches, so they cover the same rows as the other checks without
+        a second pass on the file.
+        """
+        if self._approximate:
+            self._distinct, self._top = self._new_sketches(self._error)
+        chunks = []
+        offset = 0
+        reader = pd.read_csv(
+            self._filename,
+            on_bad_lines=self._add_read_reject,
+            engine='python',
+            sep=sep,
+            chunksize=C.CHUNK_SIZE
+        )
+        for chunk in reader:
+            size = len(chunk)
+            if self.isSampled:
+                chunk = chunk[self._sample_mask(chunk, offset)]
+            if self._approximate and self._has_keys(chunk):
+                self._update_sketches(self._distinct, self._top, chunk)
+            chunks.append(chunk)
+            offset += size
+        return pd.concat(chunks, ignore_index=True)
+
+    def _cluster_ids(self) -> np.ndarray:
+        """Get the sampling unit of each row: its timeline, or itself without Timeline ID."""
+        if self._keyname_PFI not in self._dataset.columns:
+            return np.arange(self._dataset.shape[0], dtype=np.int64)
+        codes, uniques = pd.factorize(self._dataset[self._keyname_PFI])
+        codes = codes.astype(np.int64)
+        no_pfi = codes < 0
+        codes[no_pfi] = len(uniques) + np.arange(np.count_nonzero(no_pfi))
+        return codes
+
+    def flagConfidenceInterval(self, flag: int, z: float = C.CI_Z) -> Tuple[float, float, float]:
+        """
+        Estimate the share of rows with a quality flag, with its confidence interval.
+        
+        Timelines are sampled as whole clusters, so the variance is the
+        cluster-robust variance of a ratio estimator: rows of the same
+        timeline are not treated as independent. The flag must have been
+        set by running the matching check first.
+        
+        Args:
+            flag: A C.FLAG_* bit.
+            z: Normal quantile of the confidence level (1.96 = 95%).
+        
+        Returns:
+            Tuple of (ratio, lower bound, upper bound), between 0 and 1.
+        """
+        rows = len(self._flags)
+        if rows == 0:
+            return 0.0, 0.0, 0.0
+        clusters = self._clusters if len(self._clusters) == rows else np.arange(rows)
+        
+        flagged = (self._flags & np.uint16(flag)) != 0
+        y = np.bincount(clusters, weights=flagged)
+        m = np.bincount(clusters).astype(np.float64)
+        ratio = y.sum() / m.sum()
+        n = len(m)
+        if n < 2:
+            return float(ratio), float(ratio), float(ratio)
+        
+        se = np.sqrt(n / (n - 1) * np.sum((y - ratio * m) ** 2)) / m.sum()
+        return float(ratio), float(max(0.0, ratio - z * se)), float(min(1.0, ratio + z * se))
+
     def _add_read_reject(self, row) -> None:
         """Callback for handling malformed CSV rows."""
         self._read_rejects.append(row)
@@ -197,6 +482,35 @@ class DataSource:
     def dumpReadRejects(self) -> int:
         return self._dump_read_rejects()
 
+    def iterChunks(self, chunksize: int = C.CHUNK_SIZE,
+                   usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read the CSV file chunk by chunk, without loading it in memory.
+        
+        Values are read as strings so that every chunk has the same types.
+        Malformed lines are skipped (they are reported by open()).
+        
+        Args:
+            chunksize: Number of rows per chunk.
+            usecols: Columns to read (default: the three key columns).
+        
+        Yields:
+            DataFrames of at most chunksize rows.
+        """
+        if usecols is None:
+            usecols = [self._keyname_PFI, self._keyname_SN, self._keyname_T]
+        reader = pd.read_csv(
+            self._filename,
+            sep=self._separator,
+            usecols=usecols,
+            dtype=str,
+            engine='python',
+            on_bad_lines='skip',
+            chunksize=chunksize
+        )
+        for chunk in reader:
+            yield chunk
+
     # =========================================================================
     # Validation Methods
     # =========================================================================
@@ -249,6 +563,9 @@ class DataSource:
             df[col_name] = df[self._keyname_T].apply(check_date_format, fmt=fmt)
             result.append(len(df[df[col_name] == True]))
         
+        fmt_cols = [f"FMT_{i}" for i in range(len(C.FMT))]
+        self._flag_rows(df.index[~df[fmt_cols].any(axis=1)], C.FLAG_BAD_TIMESTAMP)
+        
         final = pd.DataFrame(columns=['Format', 'GoodRows'])
         final['Format'] = C.FMT
         final['GoodRows'] = result
@@ -279,6 +596,29 @@ class DataSource:
     def rows_count(self) -> int:
         return self.rowsCount()
 
+    def _invalidate_profiles(self) -> None:
+        """Drop the cached column profiles after the dataset has changed."""
+        self._value_counts = {}
+        self._timestamps = None
+        self._key_hashes = None
+
+    def _flag_rows(self, labels, flag: int) -> None:
+        """Set a quality flag on rows given by their index labels (file positions)."""
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(self._flags) and len(labels):
+            self._flags[labels] |= np.uint16(flag)
+
+    def _get_value_counts(self, col: str) -> pd.Series:
+        """
+        Get the value counts of a column, sorted by decreasing frequency.
+        
+        Counts are computed once per column and shared by the distinct,
+        unique, top-k and timeline size queries until the dataset changes.
+        """
+        if col not in self._value_counts:
+            self._value_counts[col] = self._dataset[col].value_counts()
+        return self._value_counts[col]
+
     def getCountValuesForField(self, col: str, limit: int = 0) -> Optional[pd.DataFrame]:
         """
         Get value frequency distribution for a column.
@@ -293,22 +633,18 @@ class DataSource:
         if not self.isOpened():
             return None
         
-        counts = self._dataset[col].value_counts()
-        result = pd.DataFrame({
+        counts = self._get_value_counts(col)
+        if limit > 0:
+            counts = counts.head(limit)
+        
+        return pd.DataFrame({
             C.FLD_COL_VALUECOUNT: counts.index,
             C.FLD_FREQ_VALUECOUNT: counts.values
         })
-        result = result.sort_values(by=[C.FLD_FREQ_VALUECOUNT], ascending=False)
-        
-        if limit > 0:
-            result = result.head(min(limit, len(result)))
-        
-        return result
     
     def getSNCountPerPFISize(self) -> pd.DataFrame:
         """Get the distribution of timeline sizes (events per timeline)."""
-        df = self.getCountValuesForField(self._keyname_PFI)
-        dfagg = df[C.FLD_FREQ_VALUECOUNT].value_counts()
+        dfagg = self._get_value_counts(self._keyname_PFI).value_counts()
         
         result = pd.DataFrame({
             C.FLD_PFI_NB: dfagg.values,
@@ -316,9 +652,13 @@ class DataSource:
         })
         return result.sort_values(by=[C.FLD_PFI_NB], ascending=False).reset_index(drop=True)
 
+    def getColumn(self, col: str) -> pd.Series:
+        """Get the values of a column (rows removed by the checks excluded)."""
+        return self._dataset[col]
+
     def countDistinctValues(self, col: str) -> int:
         """Count distinct values in a column."""
-        return len(self._dataset[col].value_counts())
+        return len(self._get_value_counts(col))
     
     def countMissingValues(self, col: str) -> int:
         """Count missing values in a column."""
@@ -326,7 +666,98 @@ class DataSource:
     
     def countUniqueValues(self, col: str) -> int:
         """Count unique values in a column."""
-        return self._dataset[col].nunique()
+        return len(self._get_value_counts(col))
+
+    def _has_keys(self, df: pd.DataFrame) -> bool:
+        """Check the three key columns are in a DataFrame."""
+        return all(key in df.columns for key in (self._keyname_PFI, self._keyname_SN, self._keyname_T))
+
+    def _new_sketches(self, error: float = C.HLL_ERROR, capacity: int = C.TOPK_CAPACITY
+                      ) -> Tuple[Dict[str, HyperLogLog], Dict[str, SpaceSaving]]:
+        """Create empty distinct count sketches for the keys, top values summaries for PFI and SN."""
+        keys = [self._keyname_PFI, self._keyname_SN, self._keyname_T]
+        distinct = {key: HyperLogLog(error) for key in keys}
+        top = {}
+        if capacity > 0:
+            top = {key: SpaceSaving(capacity) for key in keys[:2]}
+        return distinct, top
+
+    def _update_sketches(self, distinct: Dict[str, HyperLogLog], top: Dict[str, SpaceSaving],
+                         chunk: pd.DataFrame) -> None:
+        """Add the rows of a chunk with all three keys to the key sketches."""
+        chunk = chunk.dropna(subset=list(distinct))
+        for key, sketch in distinct.items():
+            sketch.update(key_text(chunk[key]))
+        for key, summary in top.items():
+            summary.update(key_text(chunk[key]))
+
+    def keySketches(self) -> Tuple[Dict[str, HyperLogLog], Dict[str, SpaceSaving]]:
+        """
+        Get the key sketches built while the file was loaded.
+        
+        Only available with approximate=True: the sketches cover the rows
+        loaded (the sampled timelines in sampling mode) with all three keys.
+        
+        Returns:
+            Tuple of (distinct sketches, top values summaries) indexed by column name.
+        
+        Raises:
+            ValueError: If the DataSource was not opened in approximate mode.
+        """
+        if not self._approximate or not self._distinct:
+            raise ValueError("Key sketches are only built by open() in approximate mode")
+        return self._distinct, self._top
+
+    def streamKeySketches(self, error: float = C.HLL_ERROR,
+                          capacity: int = C.TOPK_CAPACITY,
+                          chunksize: int = C.CHUNK_SIZE
+                          ) -> Tuple[Dict[str, HyperLogLog], Dict[str, SpaceSaving]]:
+        """
+        Build the key column sketches in a streaming pass, without loading the file.
+        
+        The file is read chunk by chunk and each chunk updates one
+        HyperLogLog sketch per key column (distinct counts) and one
+        Space-Saving summary for the Timeline ID and Event ID (top values),
+        so memory stays bounded whatever the file size. Rows with a missing
+        key are ignored, as in missingValues().
+        
+        Args:
+            error: Target relative error of the distinct count estimates.
+            capacity: Counters kept by the top values summaries (0 = none).
+            chunksize: Number of rows read per chunk.
+        
+        Returns:
+            Tuple of (distinct sketches, top values summaries) indexed by column name.
+        """
+        distinct, top = self._new_sketches(error, capacity)
+        for chunk in self.iterChunks(chunksize):
+            self._update_sketches(distinct, top, chunk)
+        return distinct, top
+
+    def approximateDistinctValues(self, error: float = C.HLL_ERROR,
+                                  chunksize: int = C.CHUNK_SIZE) -> Dict[str, HyperLogLog]:
+        """
+        Estimate the distinct values of the key columns in streaming mode.
+        
+        Args:
+            error: Target relative error of the estimates.
+            chunksize: Number of rows read per chunk.
+        
+        Returns:
+            Dictionary of HyperLogLog sketches indexed by key column name.
+        """
+        return self.streamKeySketches(error, 0, chunksize)[0]
+
+    def _key_null_reasons(self) -> np.ndarray:
+        """
+        Get a per-row bitmask of the missing keys.
+        
+        Bit 0 is set when the Timeline ID is missing, bit 1 for the Event
+        ID and bit 2 for the Timestamp; 0 means the row is complete.
+        """
+        keys = [self._keyname_PFI, self._keyname_SN, self._keyname_T]
+        nulls = self._dataset[keys].isnull().to_numpy()
+        return (nulls.astype(np.uint8) << np.arange(len(keys), dtype=np.uint8)).sum(axis=1, dtype=np.uint8)
 
     def missingValues(self) -> List[int]:
         """
@@ -336,72 +767,444 @@ class DataSource:
             List of missing value counts [PFI, SN, T].
         """
         try:
-            missing = [
-                self.countMissingValues(self._keyname_PFI),
-                self.countMissingValues(self._keyname_SN),
-                self.countMissingValues(self._keyname_T)
-            ]
+            reasons = self._key_null_reasons()
+            missing = [int(np.count_nonzero(reasons & (1 << bit))) for bit in range(3)]
             
-            # Drop rows with missing key values
-            for key in [self._keyname_PFI, self._keyname_SN, self._keyname_T]:
-                self._dataset.drop(
-                    self._dataset[self._dataset[key].isnull()].index,
-                    inplace=True
-                )
+            # Drop rows with missing key values in a single pass
+            complete = reasons == 0
+            self._flag_rows(self._dataset.index[~complete], C.FLAG_NULL_KEY)
+            if not complete.all():
+                # Kept for the flagged export
+                self._key_rejects = pd.concat([self._key_rejects, self._dataset[~complete]])
+                self._dataset = self._dataset[complete]
+                self._invalidate_profiles()
             
             return missing
         except Exception:
             return [0, 0, 0]
 
-    def dump3KeysRejectFile(self) -> int:
+    def dump3KeysRejectFile(self, first_row: int = 0) -> int:
         """
         Write rows with missing key values to the reject file.
         
+        Each rejected row is written once, with all its reasons.
+        
+        Args:
+            first_row: Position in the file of the first row loaded, for
+                rows read by openTail(); when not 0, the rejects are
+                appended to the file written by the previous runs.
+        
         Returns:
             Number of rejected rows.
         """
-        rejects = []
-        
-        # Collect rows with missing values
-        df_pfi = self._dataset[self._dataset[self._keyname_PFI].isnull()].copy()
-        if not df_pfi.empty:
-            df_pfi.insert(0, C.REJECT_COL_NAME, "Timeline ID is Empty")
-            rejects.append(df_pfi)
-        
-        df_sn = self._dataset[self._dataset[self._keyname_SN].isnull()].copy()
-        if not df_sn.empty:
-            df_sn.insert(0, C.REJECT_COL_NAME, "Event ID is Empty")
-            rejects.append(df_sn)
-        
-        df_t = self._dataset[self._dataset[self._keyname_T].isnull()].copy()
-        if not df_t.empty:
-            df_t.insert(0, C.REJECT_COL_NAME, "Timestamp is Empty")
-            rejects.append(df_t)
+        reasons = self._key_null_reasons()
+        rejected = reasons != 0
         
-        if rejects:
-            df_global = pd.concat(rejects)
-            df_global.to_csv(self.keysRejectFilename)
+        if rejected.any():
+            # Reason label for every possible bitmask value
+            labels = [
+                ", ".join(
+                    label for bit, label in enumerate(C.REJECT_KEY_REASONS) if mask & (1 << bit)
+                )
+                for mask in range(1 << len(C.REJECT_KEY_REASONS))
+            ]
+            df_global = self._dataset[rejected]
+            df_global.insert(0, C.REJECT_COL_NAME, np.array(labels)[reasons[rejected]])
+            df_global.index += first_row
+            # Append below the rejects of the previous runs (an empty file has no header)
+            append = False
+            if first_row > 0 and os.path.exists(self.keysRejectFilename):
+                with open(self.keysRejectFilename, "r") as f:
+                    append = C.REJECT_COL_NAME in f.readline()
+            df_global.to_csv(self.keysRejectFilename, mode='a' if append else 'w', header=not append)
             return df_global.shape[0]
         
         # Create empty reject file
-        pd.DataFrame().to_csv(self.keysRejectFilename)
+        if first_row == 0:
+            pd.DataFrame().to_csv(self.keysRejectFilename)
         return 0
 
+    def _get_key_hashes(self) -> np.ndarray:
+        """Get one 64-bit hash per row of the (PFI, SN, T) keys (cached)."""
+        if self._key_hashes is None:
+            self._key_hashes = hash_rows(
+                self._dataset[[self._keyname_PFI, self._keyname_SN, self._keyname_T]]
+            )
+        return self._key_hashes
+
+    def _duplicate_candidates(self) -> pd.DataFrame:
+        """
+        Get the key columns of the rows sharing their key hash with another row.
+        
+        Only these rows can be duplicates; comparing their actual values
+        then rules out hash collisions.
+        """
+        keys = [self._keyname_PFI, self._keyname_SN, self._keyname_T]
+        _, inverse, counts = np.unique(
+            self._get_key_hashes(), return_inverse=True, return_counts=True
+        )
+        return self._dataset.loc[counts[inverse] > 1, keys]
+
     def checkDuplicatesCount(self) -> int:
         """Count duplicate rows based on the three key columns."""
-        dups = self._dataset.duplicated(
-            subset=[self._keyname_PFI, self._keyname_SN, self._keyname_T]
-        )
+        keys = [self._keyname_PFI, self._keyname_SN, self._keyname_T]
+        candidates = self._duplicate_candidates()
+        dups = candidates.duplicated(subset=keys)
+        self._flag_rows(candidates.index[dups.to_numpy()], C.FLAG_DUPLICATE)
         return int(dups.sum())
 
+    def getDuplicateGroups(self) -> pd.DataFrame:
+        """
+        Get the groups of rows sharing the same three key values.
+        
+        Returns:
+            DataFrame with the key values of each group and its multiplicity.
+        """
+        keys = [self._keyname_PFI, self._keyname_SN, self._keyname_T]
+        groups = self._duplicate_candidates().groupby(keys, dropna=False, sort=False).size()
+        groups = groups[groups > 1].rename(C.FLD_MULTIPLICITY).reset_index()
+        return groups.sort_values(by=[C.FLD_MULTIPLICITY], ascending=False, kind='stable')
+
+    def dumpDuplicatesFile(self) -> int:
+        """
+        Write the duplicate groups with their multiplicity to the duplicates file.
+        
+        Returns:
+            Number of duplicate groups.
+        """
+        groups = self.getDuplicateGroups()
+        groups.to_csv(self.duplicatesFilename, index=False)
+        return groups.shape[0]
+
+    def getTimestamps(self) -> pd.Series:
+        """
+        Parse the timestamp column into datetime64 values.
+        
+        Each supported format (C.FMT) is tried in turn on the rows not yet
+        parsed; rows matching none of them become NaT. The result is cached
+        until the dataset is modified.
+        
+        Returns:
+            Series of datetime64 values, one per row of the dataset.
+        """
+        if self._timestamps is None:
+            raw = self._dataset[self._keyname_T]
+            parsed = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns]")
+            for fmt in C.FMT:
+                todo = parsed.isna() & raw.notna()
+                if not todo.any():
+                    break
+                parsed[todo] = pd.to_datetime(raw[todo], format=fmt, errors='coerce')
+            self._timestamps = parsed
+        return self._timestamps
+
+    def getWaitingTimesPerPair(self, limit: int = 0) -> pd.DataFrame:
+        """
+        Get the waiting time distribution between consecutive events.
+        
+        Events are grouped by timeline with a stable sort, so they keep
+        their order of appearance in the file. The delta between each pair
+        of consecutive events is then aggregated per (previous event,
+        next event) pair. Zero deltas reveal identical timestamps and
+        negative deltas reveal events recorded out of chronological order.
+        Rows whose timestamp cannot be parsed are ignored.
+        
+        Args:
+            limit: Maximum number of pairs to return (0 = all).
+        
+        Returns:
+            DataFrame with one row per pair, sorted by decreasing count.
+        """
+        columns = [
+            C.FLD_SN_PREV, C.FLD_SN_NEXT, C.FLD_WAIT_COUNT, C.FLD_WAIT_MIN,
+            C.FLD_WAIT_P25, C.FLD_WAIT_MEDIAN, C.FLD_WAIT_P75, C.FLD_WAIT_MAX,
+            C.FLD_WAIT_ZERO, C.FLD_WAIT_NEGATIVE
+        ]
+        if not self.isOpened():
+            return pd.DataFrame(columns=columns)
+        
+        pfi_codes, _ = pd.factorize(self._dataset[self._keyname_PFI])
+        sn_codes, sn_values = pd.factorize(self._dataset[self._keyname_SN])
+        timestamps = self.getTimestamps().to_numpy()
+        
+        order = np.argsort(pfi_codes, kind='stable')
+        pfi_codes = pfi_codes[order]
+        sn_codes = sn_codes[order]
+        timestamps = timestamps[order]
+        
+        # Keep only consecutive rows of the same timeline with valid timestamps
+        valid = pfi_codes[1:] == pfi_codes[:-1]
+        valid &= (pfi_codes[1:] >= 0) & (sn_codes[1:] >= 0) & (sn_codes[:-1] >= 0)
+        not_nat = ~np.isnat(timestamps)
+        valid &= not_nat[1:] & not_nat[:-1]
+        
+        gaps = np.diff(timestamps)
+        out_of_order = order[1:][valid & (gaps < np.timedelta64(0, 's'))]
+        self._flag_rows(self._dataset.index[out_of_order], C.FLAG_OUT_OF_ORDER)
+        
+        deltas = pd.DataFrame({
+            C.FLD_SN_PREV: sn_codes[:-1][valid],
+            C.FLD_SN_NEXT: sn_codes[1:][valid],
+            "delta": gaps[valid] / np.timedelta64(1, 's')
+        })
+        if deltas.empty:
+            return pd.DataFrame(columns=columns)
+        
+        grouped = deltas.groupby([C.FLD_SN_PREV, C.FLD_SN_NEXT])["delta"]
+        result = pd.DataFrame({
+            C.FLD_WAIT_COUNT: grouped.size(),
+            C.FLD_WAIT_MIN: grouped.min(),
+            C.FLD_WAIT_P25: grouped.quantile(0.25),
+            C.FLD_WAIT_MEDIAN: grouped.median(),
+            C.FLD_WAIT_P75: grouped.quantile(0.75),
+            C.FLD_WAIT_MAX: grouped.max(),
+            C.FLD_WAIT_ZERO: (deltas["delta"] == 0).groupby(
+                [deltas[C.FLD_SN_PREV], deltas[C.FLD_SN_NEXT]]).sum(),
+            C.FLD_WAIT_NEGATIVE: (deltas["delta"] < 0).groupby(
+                [deltas[C.FLD_SN_PREV], deltas[C.FLD_SN_NEXT]]).sum()
+        }).reset_index()
+        
+        # Map the event codes back to their names
+        result[C.FLD_SN_PREV] = sn_values.take(result[C.FLD_SN_PREV].to_numpy())
+        result[C.FLD_SN_NEXT] = sn_values.take(result[C.FLD_SN_NEXT].to_numpy())
+        result = result.sort_values(by=[C.FLD_WAIT_COUNT], ascending=False, kind='stable')
+        result = result.reset_index(drop=True)[columns]
+        
+        if limit > 0:
+            result = result.head(limit)
+        
+        return result
+
+    def getActiveCasesOverTime(self, buckets: int = C.ACTIVE_CASES_BUCKETS) -> pd.DataFrame:
+        """
+        Get the number of open timelines over time.
+        
+        A timeline is open from its first to its last parsed timestamp. The
+        covered period is split into fixed-width buckets, start and end
+        events are counted per bucket and a sweep-line (cumulative sums of
+        starts minus ends) gives the number of timelines open in each bucket.
+        Gaps or sudden drops reveal extraction holes and partial loads.
+        
+        Args:
+            buckets: Number of time buckets.
+        
+        Returns:
+            DataFrame with the bucket start time and the open timelines count.
+        """
+        columns = [C.FLD_TIME, C.FLD_ACTIVE_CASES]
+        if not self.isOpened() or buckets <= 0:
+            return pd.DataFrame(columns=columns)
+        
+        pfi_codes, _ = pd.factorize(self._dataset[self._keyname_PFI])
+        timestamps = self.getTimestamps().to_numpy()
+        valid = (pfi_codes >= 0) & ~np.isnat(timestamps)
+        if not valid.any():
+            return pd.DataFrame(columns=columns)
+        
+        # First and last timestamp of each timeline
+        ticks = pd.Series(timestamps[valid].astype('int64'))
+        bounds = ticks.groupby(pfi_codes[valid]).agg(['min', 'max'])
+        return count_active_cases(bounds['min'].to_numpy(), bounds['max'].to_numpy(), buckets)
+
+    def _count_values_per_timeline(self, cols: List[str]) -> pd.DataFrame:
+        """Count the distinct values of several columns within each timeline."""
+        return self._dataset.groupby(self._keyname_PFI)[cols].nunique()
+
+    def checkAttributesConsistency(self, max_workers: Optional[int] = C.ATTR_MAX_WORKERS) -> pd.DataFrame:
+        """
+        Classify each attribute as case-level or event-level.
+        
+        The number of distinct values per timeline is computed for all
+        attributes with a single groupby-nunique; wide logs are split in
+        column blocks processed by a thread pool. An attribute is case-level
+        when at least CASE_ATTRIBUTE_RATIO of the multi-event timelines hold
+        a single value. For case-level attributes, the timelines holding
+        more than one value are counted as inconsistent.
+        
+        Args:
+            max_workers: Maximum number of worker threads (None = default).
+        
+        Returns:
+            DataFrame with the attribute, its level and the inconsistent timelines count.
+        """
+        columns = [C.FLD_ATTRIBUTE, C.FLD_ATTR_LEVEL, C.FLD_ATTR_VIOLATIONS]
+        attributes = [col for col in self._potential_attributes if col in self._dataset.columns]
+        if not self.isOpened() or not attributes:
+            return pd.DataFrame(columns=columns)
+        
+        blocks = [
+            attributes[i:i + C.ATTR_COLUMNS_PER_TASK]
+            for i in range(0, len(attributes), C.ATTR_COLUMNS_PER_TASK)
+        ]
+        if len(blocks) == 1:
+            nunique = self._count_values_per_timeline(blocks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                nunique = pd.concat(
+                    list(executor.map(self._count_values_per_timeline, blocks)),
+                    axis=1
+                )
+        
+        # Single-event timelines are constant by construction
+        sizes = self._dataset.groupby(self._keyname_PFI).size()
+        multi = nunique[sizes.reindex(nunique.index).to_numpy() > 1]
+        return classify_attributes(attributes, (multi > 1).sum(), len(multi))
+
+    def _profile_column(self, col: str) -> dict:
+        """Compute the null rate, cardinality, inferred type and top values of a column."""
+        values = self._dataset[col]
+        counts = self._get_value_counts(col)
+        rows = len(values)
+        top = counts.head(C.ATTR_TOP_VALUES)
+        return {
+            C.FLD_ATTRIBUTE: col,
+            C.FLD_ATTR_TYPE: pd.api.types.infer_dtype(values, skipna=True),
+            C.FLD_ATTR_NULL_RATE: round((rows - counts.sum()) / rows * 100, 2) if rows else 0.0,
+            C.FLD_ATTR_DISTINCT: len(counts),
+            C.FLD_ATTR_TOP_VALUES: ", ".join(f"{v} ({n})" for v, n in top.items())
+        }
+
+    def profileAttributes(self, max_workers: Optional[int] = C.ATTR_MAX_WORKERS) -> pd.DataFrame:
+        """
+        Profile every attribute (non-key) column.
+        
+        Columns are independent, so they are profiled concurrently in a
+        thread pool. The value counts computed here are cached and reused
+        by the other frequency queries.
+        
+        Args:
+            max_workers: Maximum number of worker threads (None = default).
+        
+        Returns:
+            DataFrame with one row per attribute: inferred type, null rate (%),
+            number of distinct values and most frequent values.
+        """
+        columns = [
+            C.FLD_ATTRIBUTE, C.FLD_ATTR_TYPE, C.FLD_ATTR_NULL_RATE,
+            C.FLD_ATTR_DISTINCT, C.FLD_ATTR_TOP_VALUES
+        ]
+        attributes = [col for col in self._potential_attributes if col in self._dataset.columns]
+        if not self.isOpened() or not attributes:
+            return pd.DataFrame(columns=columns)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            profiles = list(executor.map(self._profile_column, attributes))
+        return pd.DataFrame(profiles, columns=columns)
+
+    def _near_duplicates_mask(self, tolerance: float) -> np.ndarray:
+        """
+        Flag rows repeating the previous event of the same timeline within tolerance.
+        
+        Rows are sorted by (PFI, SN, T) and each row is compared with its
+        neighbor: it is flagged when PFI and SN match and the timestamps
+        differ by more than zero but less than tolerance seconds. Exact
+        duplicates are left to checkDuplicatesCount().
+        """
+        pfi_codes, _ = pd.factorize(self._dataset[self._keyname_PFI])
+        sn_codes, _ = pd.factorize(self._dataset[self._keyname_SN])
+        timestamps = self.getTimestamps().to_numpy()
+        ticks = timestamps.astype('int64')
+        
+        order = np.lexsort((ticks, sn_codes, pfi_codes))
+        pfi_s, sn_s, t_s = pfi_codes[order], sn_codes[order], timestamps[order]
+        not_nat = ~np.isnat(t_s)
+        
+        gaps = np.diff(t_s) / np.timedelta64(1, 's')
+        near = (pfi_s[1:] == pfi_s[:-1]) & (sn_s[1:] == sn_s[:-1])
+        near &= (pfi_s[1:] >= 0) & (sn_s[1:] >= 0)
+        near &= not_nat[1:] & not_nat[:-1]
+        near &= (gaps > 0) & (gaps < tolerance)
+        
+        mask = np.zeros(len(order), dtype=bool)
+        mask[order[1:][near]] = True
+        self._flag_rows(self._dataset.index[mask], C.FLAG_NEAR_DUPLICATE)
+        return mask
+
+    def checkNearDuplicatesCount(self, tolerance: float = C.NEAR_DUPLICATE_TOLERANCE) -> int:
+        """
+        Count events repeated in the same timeline within a time tolerance.
+        
+        Args:
+            tolerance: Maximum gap in seconds between two near-duplicate events.
+        
+        Returns:
+            Number of near-duplicate rows.
+        """
+        if not self.isOpened():
+            return 0
+        return int(self._near_duplicates_mask(tolerance).sum())
+
+    def dumpNearDuplicatesRejectFile(self, tolerance: float = C.NEAR_DUPLICATE_TOLERANCE) -> int:
+        """
+        Write near-duplicate events to the near-duplicates reject file.
+        
+        Args:
+            tolerance: Maximum gap in seconds between two near-duplicate events.
+        
+        Returns:
+            Number of near-duplicate rows.
+        """
+        if not self.isOpened():
+            return 0
+        
+        df_near = self._dataset[self._near_duplicates_mask(tolerance)].copy()
+        df_near.insert(0, C.REJECT_COL_NAME, f"Near duplicate event (< {tolerance}s)")
+        df_near.to_csv(self.nearDuplicatesRejectFilename)
+        return df_near.shape[0]
+
+    def countFlaggedRows(self) -> int:
+        """Count the rows still in the dataset with at least one quality flag."""
+        if not self.isOpened() or not len(self._flags):
+            return 0
+        return int(np.count_nonzero(self._flags[self._dataset.index.to_numpy()]))
+
+    def dumpFlaggedDataset(self, mode: str = C.EXPORT_FLAGGED) -> int:
+        """
+        Export the dataset using the flags set by the checks already run.
+        
+        The flagged export also writes the rows removed for a missing key,
+        at their place in the file, with FLAG_NULL_KEY.
+        
+        Args:
+            mode: EXPORT_FLAGGED to write every row with its flags column,
+                EXPORT_CLEAN to write only the rows without any flag.
+        
+        Returns:
+            Number of rows written.
+        """
+        dataset = self._dataset
+        if mode != C.EXPORT_CLEAN and len(self._key_rejects):
+            dataset = pd.concat([dataset, self._key_rejects]).sort_index(kind='stable')
+        
+        if len(self._flags):
+            flags = self._flags[dataset.index.to_numpy()]
+        else:
+            flags = np.zeros(dataset.shape[0], dtype=np.uint16)
+        
+        if mode == C.EXPORT_CLEAN:
+            export = dataset[flags == 0]
+            export.to_csv(self.cleanFilename, index=False)
+        else:
+            export = dataset.assign(**{C.FLD_QUALITY_FLAGS: flags})
+            export.to_csv(self.flaggedFilename, index=False)
+        return export.shape[0]
+
     def dumpUniqueEvents(self) -> int:
         """
         Export unique events with frequencies to a CSV file.
         
+        In approximate mode, the events and frequencies come from the Event
+        ID top values summary: they are exact up to TOPK_CAPACITY distinct
+        events.
+        
         Returns:
             Number of unique events.
         """
-        df = self.getCountValuesForField(self.SN)
+        if self._approximate and self._top:
+            summary = self._top[self.SN]
+            df = summary.topk(summary.capacity).drop(columns=[C.FLD_FREQ_ERROR])
+        else:
+            df = self.getCountValuesForField(self.SN)
         if df is not None and not df.empty:
             events = SNList(df)
             events.cleanse()
@@ -8,15 +8,52 @@ __author__ = "Benoit CAYLA"
 __email__ = "benoit@datacorner.fr"
 __license__ = "GPL"
 
+import io
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, List, Optional, Tuple
+
 from pydqa4pm.core.datasource import DataSource
 from pydqa4pm.core.report_data import DQAReportData
-from pydqa4pm.charts.seaborn_chart import SeabornChart
-from pydqa4pm.charts.base import Chart
-from pydqa4pm.reports.store import ReportStore
-from pydqa4pm.reports.pdf_builder import PDFReportBuilder
+from pydqa4pm.core.profile_state import profileShards
+from pydqa4pm.core.checkpoint import Checkpoint
+from pydqa4pm.reports.store import ReportStore, MemoryReportStore
+from pydqa4pm.reports.cache import ResultCache
 from pydqa4pm.utils import constants as C
 
 
+def _available_cpus() -> int:
+    """Number of CPUs this process may run on (CPU affinity, container limits)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _render_chart(task: tuple, in_memory: bool = False, quality: str = C.DEFAULT_QUALITY,
+                  chart_cache=None):
+    """
+    Process pool task: render one chart or table image.
+    
+    In memory, the image is rendered to a buffer instead of the file named
+    by the first argument, and its encoded bytes are returned. With a chart
+    cache, an image already rendered is read from the cache.
+    """
+    chart_class, size, method, args = task
+    try:
+        chart = chart_class(*size, quality=quality, cache=chart_cache)
+        if not in_memory:
+            return getattr(chart, method)(*args)
+        buffer = io.BytesIO()
+        if getattr(chart, method)(buffer, *args[1:]) is not buffer:
+            return C.NO_FILE_CREATED
+        return buffer.getvalue()
+    except Exception:
+        return C.NO_FILE_CREATED
+
+
 class Dqa4PM:
     """
     Main orchestrator for the Data Quality Assessment process.
@@ -35,20 +72,71 @@ class Dqa4PM:
         >>> dqa.process("data.csv", ",", "case_id", "activity", "timestamp")
     """
     
-    def __init__(self, trace):
+    def __init__(self, trace, approximate: bool = False, export: Optional[str] = None,
+                 sample_rate: float = 1.0, incremental: bool = False,
+                 cache: Optional[str] = None, store: str = C.STORE_MEMORY,
+                 quality: str = C.DEFAULT_QUALITY,
+                 chart_backend: str = C.DEFAULT_CHART_BACKEND,
+                 chart_cache: Optional[str] = None,
+                 output_format: str = C.FORMAT_PDF,
+                 error: float = C.HLL_ERROR):
         """
         Initialize the DQA processor.
         
         Args:
             trace: Logger instance for output messages.
+            approximate: Estimate distinct counts and top values with sketches
+                fed while the file is loaded, instead of exact value counts
+                (for very large logs); the timeline size distribution and the
+                attribute profile are then not computed. The rows are still
+                loaded in memory for the duplicate, near duplicate and waiting
+                time checks, so this saves the value counts, not the dataset.
+            export: Dataset export written after the checks: C.EXPORT_FLAGGED
+                (rows with their quality flags), C.EXPORT_CLEAN (unflagged
+                rows only) or None.
+            sample_rate: Share of the timelines to assess (1.0 = whole file).
+                Whole timelines are kept and ratios get confidence intervals.
+            incremental: Resume from the checkpoint of the previous run and
+                only read the rows appended since (append-only logs).
+            cache: Result cache folder; an unchanged file is not assessed
+                again (None = no cache).
+            store: Where the chart images are kept until the report is
+                built: C.STORE_MEMORY (buffers) or C.STORE_DISK (files in
+                the temporary folder, for debugging).
+            quality: Chart quality profile, a key of C.QUALITY_PROFILES
+                (resolution and image format).
+            chart_backend: Library drawing the charts, C.CHART_BACKEND_MATPLOTLIB
+                (faster) or C.CHART_BACKEND_SEABORN; both give the same charts.
+            chart_cache: Chart image cache folder; a chart drawn from the
+                same data with the same settings is not rendered again
+                (None = no chart cache).
+            output_format: C.FORMAT_PDF (PDF report with charts) or
+                C.FORMAT_JSON (metrics file only, charts and PDF skipped).
+            error: Target relative error of the approximate distinct counts.
         """
         self._trace = trace
+        self._approximate = approximate
+        self._export = export
+        self._sample_rate = sample_rate
+        self._incremental = incremental
+        self._cache = cache
+        self._store = store
+        self._quality = quality
+        self._chart_backend = chart_backend
+        self._chart_cache = chart_cache
+        self._output_format = output_format
+        self._error = error
     
     @property
     def T(self):
         """Get the logger instance."""
         return self._trace
     
+    @property
+    def approximate(self) -> bool:
+        """Whether distinct counts are estimated with sketches."""
+        return self._approximate
+    
     def open_dataset(self, filename: str, sep: str, pfi: str, sn: str, t: str) -> DataSource:
         """
         Open and validate the CSV dataset.
@@ -63,9 +151,11 @@ class Dqa4PM:
         Returns:
             DataSource instance (check is_opened() for success).
         """
-        ds = DataSource(filename, pfi, sn, t)
+        ds = DataSource(filename, pfi, sn, t, self._sample_rate, self._approximate, self._error)
         
         self.T.info("Opening dataset ...")
+        if ds.isSampled:
+            self.T.info("Sampling mode: <", round(self._sample_rate * 100, 2), "%> of the timelines")
         ds.open(sep)
         
         self.T.info(
@@ -121,17 +211,55 @@ class Dqa4PM:
             dqa.ColCount = ds.colsCount()
             dqa.RowCount = ds.rowsCount()
             dqa.duplicates = ds.checkDuplicatesCount()
-            dqa.uniques = [
-                ds.countUniqueValues(ds.PFI),
-                ds.countUniqueValues(ds.SN),
-                ds.countUniqueValues(ds.T)
-            ]
-            dqa.distinctPFI = ds.countDistinctValues(ds.PFI)
-            dqa.distinctSN = ds.countDistinctValues(ds.SN)
-            dqa.PFIMostFreq = ds.getCountValuesForField(ds.PFI, C.LIMIT_BARH_DISPLAY)
-            dqa.SNValues = ds.getCountValuesForField(ds.SN, C.LIMIT_BARH_DISPLAY)
+            self.T.info(
+                "Duplicate groups: <", ds.dumpDuplicatesFile(),
+                "> | File: <", ds.duplicatesFilename, ">"
+            )
+            near_duplicates = ds.dumpNearDuplicatesRejectFile()
+            dqa.nearDuplicates = near_duplicates
+            self.T.info(
+                "Near duplicate events: <", near_duplicates,
+                "> | File: <", ds.nearDuplicatesRejectFilename, ">"
+            )
+            if self._approximate:
+                # Sketches built while the file was loaded; the exact value
+                # counts of the keys and attributes are not computed
+                distinct, top = ds.keySketches()
+                dqa.uniques = [distinct[key].count() for key in (ds.PFI, ds.SN, ds.T)]
+                dqa.distinctPFI = dqa.uniques[0]
+                dqa.distinctSN = dqa.uniques[1]
+                dqa.distinctError = distinct[ds.PFI].relativeError
+                dqa.PFIMostFreq = top[ds.PFI].topk(C.LIMIT_BARH_DISPLAY)
+                dqa.SNValues = top[ds.SN].topk(C.LIMIT_BARH_DISPLAY)
+                dqa.notComputed = [C.SECTION_TIMELINE_SIZES, C.SECTION_ATTRIBUTES_PROFILE]
+            else:
+                dqa.uniques = [
+                    ds.countUniqueValues(ds.PFI),
+                    ds.countUniqueValues(ds.SN),
+                    ds.countUniqueValues(ds.T)
+                ]
+                dqa.distinctPFI = ds.countDistinctValues(ds.PFI)
+                dqa.distinctSN = ds.countDistinctValues(ds.SN)
+                dqa.PFIMostFreq = ds.getCountValuesForField(ds.PFI, C.LIMIT_BARH_DISPLAY)
+                dqa.SNValues = ds.getCountValuesForField(ds.SN, C.LIMIT_BARH_DISPLAY)
+                dqa.PFICountPerSN = ds.getSNCountPerPFISize()
+                dqa.attributesProfile = ds.profileAttributes()
             dqa.firstData = ds.head(5)
-            dqa.PFICountPerSN = ds.getSNCountPerPFISize()
+            dqa.waitingTimes = ds.getWaitingTimesPerPair()
+            dqa.zeroWaits = int(dqa.waitingTimes[C.FLD_WAIT_ZERO].sum())
+            dqa.negativeWaits = int(dqa.waitingTimes[C.FLD_WAIT_NEGATIVE].sum())
+            dqa.activeCases = ds.getActiveCasesOverTime()
+            dqa.attributesConsistency = ds.checkAttributesConsistency()
+            
+            dqa.flaggedRows = ds.countFlaggedRows()
+            if ds.isSampled:
+                dqa.sampleRate = ds.sampleRate
+                dqa.confidenceIntervals = {
+                    C.METRIC_MISSING: ds.flagConfidenceInterval(C.FLAG_NULL_KEY),
+                    C.METRIC_BAD_TIMESTAMPS: ds.flagConfidenceInterval(C.FLAG_BAD_TIMESTAMP),
+                    C.METRIC_DUPLICATES: ds.flagConfidenceInterval(C.FLAG_DUPLICATE),
+                    C.METRIC_NEAR_DUPLICATES: ds.flagConfidenceInterval(C.FLAG_NEAR_DUPLICATE)
+                }
             
             self.T.info("Dataset checks completed successfully")
             dqa.AllChecksOK = True
@@ -148,69 +276,94 @@ class Dqa4PM:
 
     def build_charts(self, dqa: DQAReportData, store: ReportStore) -> bool:
         """
-        Generate all charts and tables for the report.
+        Generate all charts for the report.
+        
+        The images are independent, so they are rendered concurrently in a
+        process pool; only the small aggregated DataFrames of the report
+        data are sent to the workers. Tables are not images: the PDF report
+        builder draws them from the report data. With a chart cache, the
+        charts whose data and settings did not change are not rendered.
         
         Args:
             dqa: The DQAReportData containing analysis results.
-            store: The ReportStore for temporary file management.
+            store: The ReportStore receiving the images.
         
         Returns:
             True if successful, False otherwise.
         """
         try:
-            self.T.info("Generating charts and tables ...")
+            chart_class = self._chart_class()
+            self.T.info("Generating charts ...")
             
-            # Date format check table
-            dqa.chartDatesFormat = Chart(10, 2).CreateTable(
-                store.getPath(C.FILE_FORMAT_TABLE),
-                dqa.dateFormatsCheck
-            )
-            if dqa.chartDatesFormat == C.NO_FILE_CREATED:
-                self.T.error("Failed to create date format table")
+            # (report data attribute, error message, render task)
+            tasks = [
+                ("chartPFIValCount", "Failed to create PFI frequency chart",
+                 (chart_class, (10, 6), "CreateBarH", (
+                     self._image_path(store, C.FILE_PFI_CHART),
+                     dqa.topPFI,
+                     C.FLD_COL_VALUECOUNT,
+                     C.FLD_FREQ_VALUECOUNT,
+                     "",
+                     "Lines per Timeline"
+                 ))),
+                ("chartSNValCount", "Failed to create SN frequency chart",
+                 (chart_class, (10, 6), "CreateBarH", (
+                     self._image_path(store, C.FILE_SNMOSTFQ_CHART),
+                     dqa.topSN,
+                     C.FLD_COL_VALUECOUNT,
+                     C.FLD_FREQ_VALUECOUNT,
+                     "",
+                     "Event Frequency"
+                 )))
+            ]
             
-            # Sample data table
-            dqa.tableSampleData = Chart(20, 1).CreateTable(
-                store.getPath(C.FILE_SAMPLES_TABLE),
-                dqa.firstData
-            )
-            if dqa.tableSampleData == C.NO_FILE_CREATED:
-                self.T.error("Failed to create sample data table")
+            # Timeline size distribution
+            if dqa.isComputed(C.SECTION_TIMELINE_SIZES):
+                tasks.append((
+                    "chartAggSNPerPFISIze", "Failed to create timeline size chart",
+                    (chart_class, (10, 6), "CreateScatter", (
+                        self._image_path(store, C.FILE_COUNTPFIEVTS_CHART),
+                        dqa.PFICountPerSN,
+                        C.FLD_SN_NB,
+                        C.FLD_PFI_NB,
+                        C.FLD_SN_NB,
+                        C.FLD_PFI_NB
+                    ))
+                ))
             
-            # PFI frequency chart
-            dqa.chartPFIValCount = SeabornChart(10, 6).CreateBarH(
-                store.getPath(C.FILE_PFI_CHART),
-                dqa.PFIMostFreq,
-                C.FLD_COL_VALUECOUNT,
-                C.FLD_FREQ_VALUECOUNT,
-                "",
-                "Lines per Timeline"
-            )
-            if dqa.chartPFIValCount == C.NO_FILE_CREATED:
-                self.T.error("Failed to create PFI frequency chart")
+            # Median waiting time per activity pair
+            if not dqa.waitingTimes.empty:
+                tasks.append((
+                    "chartWaitingTimes", "Failed to create waiting time chart",
+                    (chart_class, (10, 6), "CreateBarH", (
+                        self._image_path(store, C.FILE_WAITING_CHART),
+                        dqa.topWaitingPairs,
+                        C.FLD_TRANSITION,
+                        C.FLD_WAIT_MEDIAN,
+                        "",
+                        "Median Waiting Time (s)"
+                    ))
+                ))
             
-            # SN frequency chart
-            dqa.chartSNValCount = SeabornChart(10, 6).CreateBarH(
-                store.getPath(C.FILE_SNMOSTFQ_CHART),
-                dqa.SNValues,
-                C.FLD_COL_VALUECOUNT,
-                C.FLD_FREQ_VALUECOUNT,
-                "",
-                "Event Frequency"
-            )
-            if dqa.chartSNValCount == C.NO_FILE_CREATED:
-                self.T.error("Failed to create SN frequency chart")
+            # Open timelines over time
+            if not dqa.activeCases.empty:
+                tasks.append((
+                    "chartActiveCases", "Failed to create active timelines chart",
+                    (chart_class, (10, 4), "CreateLine", (
+                        self._image_path(store, C.FILE_ACTIVE_CASES_CHART),
+                        dqa.activeCases,
+                        C.FLD_TIME,
+                        C.FLD_ACTIVE_CASES
+                    ))
+                ))
             
-            # Timeline size distribution scatter plot
-            dqa.chartAggSNPerPFISIze = SeabornChart(10, 6).CreateScatter(
-                store.getPath(C.FILE_COUNTPFIEVTS_CHART),
-                dqa.PFICountPerSN,
-                C.FLD_SN_NB,
-                C.FLD_PFI_NB,
-                C.FLD_SN_NB,
-                C.FLD_PFI_NB
-            )
-            if dqa.chartAggSNPerPFISIze == C.NO_FILE_CREATED:
-                self.T.error("Failed to create timeline size chart")
+            results = self._render_charts([task for _, _, task in tasks], store.inMemory)
+            for (attribute, message, task), result in zip(tasks, results):
+                if isinstance(result, bytes):
+                    result = store.putImage(task[3][0], result)
+                setattr(dqa, attribute, result)
+                if result == C.NO_FILE_CREATED:
+                    self.T.error(message)
             
             self.T.info("Charts generated successfully")
             return True
@@ -219,19 +372,77 @@ class Dqa4PM:
             self.T.error("Error generating charts: {}".format(e))
             return False
     
+    def _chart_class(self) -> type:
+        """
+        Get the chart class of the chart backend.
+        
+        The plotting stack is only loaded when charts are produced.
+        
+        Raises:
+            ValueError: If the chart backend is unknown.
+        """
+        if self._chart_backend == C.CHART_BACKEND_MATPLOTLIB:
+            from pydqa4pm.charts.matplotlib_chart import MatplotlibChart
+            return MatplotlibChart
+        if self._chart_backend == C.CHART_BACKEND_SEABORN:
+            from pydqa4pm.charts.seaborn_chart import SeabornChart
+            return SeabornChart
+        raise ValueError("Unknown chart backend: {}".format(self._chart_backend))
+    
+    def _render_charts(self, tasks: List[tuple], in_memory: bool = False) -> list:
+        """
+        Render chart tasks in a process pool, in the current process as a fallback.
+        
+        The pool is only started with more than one usable CPU and at least
+        C.CHART_POOL_MIN_TASKS charts; otherwise starting the workers and
+        sending the images back costs more than it saves.
+        
+        Args:
+            tasks: (chart class, (width, height), method name, arguments) tuples.
+            in_memory: Render the images to buffers instead of files.
+        
+        Returns:
+            The file created by each task (its encoded image in memory),
+            or C.NO_FILE_CREATED.
+        """
+        from pydqa4pm.charts.cache import ChartCache
+        chart_cache = ChartCache(self._chart_cache) if self._chart_cache else None
+        
+        flags = [in_memory] * len(tasks)
+        qualities = [self._quality] * len(tasks)
+        caches = [chart_cache] * len(tasks)
+        workers = min(len(tasks), C.CHART_MAX_WORKERS or _available_cpus())
+        if workers > 1 and len(tasks) >= C.CHART_POOL_MIN_TASKS:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    return list(pool.map(_render_chart, tasks, flags, qualities, caches))
+            except (BrokenProcessPool, OSError) as e:
+                self.T.warning("Parallel chart rendering not available: {}".format(e))
+        return [_render_chart(task, in_memory, self._quality, chart_cache) for task in tasks]
+    
+    def _image_path(self, store: ReportStore, filename: str) -> str:
+        """Get the store path of an image, with the extension of the quality profile."""
+        image_format = C.QUALITY_PROFILES[self._quality]["format"]
+        return store.getPath(os.path.splitext(filename)[0] + "." + image_format)
+    
     # Backward compatibility alias
     def BuildCharts(self, dqa, store):
         return self.build_charts(dqa, store)
 
-    def generate_report(self, dqa: DQAReportData, report_name: str) -> None:
+    def generate_report(self, dqa: DQAReportData, report_name: str,
+                        store: Optional[ReportStore] = None) -> None:
         """
         Generate the PDF report.
         
         Args:
             dqa: The DQAReportData containing all results.
             report_name: Output path for the PDF file.
+            store: The ReportStore holding the chart images (needed when
+                they are kept in memory).
         """
-        pdf = PDFReportBuilder()
+        from pydqa4pm.reports.pdf_builder import PDFReportBuilder
+        
+        pdf = PDFReportBuilder(store)
         pdf.create(dqa)
         pdf.output(report_name, 'F')
         self.T.info("Report created: " + report_name)
@@ -240,6 +451,46 @@ class Dqa4PM:
     def GenerateReport(self, dqa, reportname):
         self.generate_report(dqa, reportname)
 
+    def write_metrics(self, dqa: DQAReportData, filename: str) -> None:
+        """
+        Write the metrics of the assessment to a JSON file.
+        
+        Only the report data is serialized (see DQAReportData.toDict()):
+        no chart is rendered and the plotting and PDF libraries are not
+        loaded, for machine checks such as CI quality gates.
+        
+        Args:
+            dqa: The DQAReportData containing all results.
+            filename: Output path for the JSON file.
+        """
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(dqa.toDict(), f, indent=2)
+        self.T.info("Metrics written: " + filename)
+
+    def _write_outputs(self, dqa: DQAReportData, store: ReportStore,
+                       report_name: str, metrics_name: str) -> bool:
+        """
+        Write the output of the selected format: the PDF report or the metrics.
+        
+        Returns:
+            True if the output was written, False if the charts failed.
+        """
+        if self._output_format == C.FORMAT_JSON:
+            self.write_metrics(dqa, metrics_name)
+            return True
+        self.T.info("Building charts")
+        if not self.build_charts(dqa, store):
+            return False
+        self.T.info("Generating report: {}".format(report_name))
+        self.generate_report(dqa, report_name, store)
+        return True
+
+    def _new_store(self) -> ReportStore:
+        """Create the chart image store selected for this processor."""
+        if self._store == C.STORE_DISK:
+            return ReportStore()
+        return MemoryReportStore()
+
     def create_alternative_data(self, ds: DataSource) -> None:
         """
         Create supplementary output files (events list).
@@ -257,6 +508,20 @@ class Dqa4PM:
     def CreateAlternativeData(self, ds):
         self.create_alternative_data(ds)
 
+    def export_dataset(self, ds: DataSource, mode: str = C.EXPORT_FLAGGED) -> None:
+        """
+        Export the dataset with its quality flags, or only its clean rows.
+        
+        Uses the flags set by make_dqa_checks(), the checks are not run again.
+        
+        Args:
+            ds: The DataSource instance, after make_dqa_checks().
+            mode: C.EXPORT_FLAGGED or C.EXPORT_CLEAN.
+        """
+        rows = ds.dumpFlaggedDataset(mode)
+        filename = ds.cleanFilename if mode == C.EXPORT_CLEAN else ds.flaggedFilename
+        self.T.info("Dataset exported: <", filename, "> with <", rows, "> rows")
+
     def process(self, dataset_filename: str, separator: str, 
                 pfi_key: str, sn_key: str, t_key: str) -> None:
         """
@@ -269,6 +534,21 @@ class Dqa4PM:
             sn_key: Event ID column name.
             t_key: Timestamp column name.
         """
+        if self._incremental:
+            self._warn_ignored("incremental mode", [
+                ("approximate", self._approximate),
+                ("export", self._export),
+                ("sampling", self._sample_rate < 1.0),
+                ("result cache", self._cache)
+            ])
+            self.process_incremental(dataset_filename, separator, pfi_key, sn_key, t_key)
+            return
+        
+        # Reuse the result of a previous run on the same content
+        cache, cache_key = self._open_cache(dataset_filename, separator, pfi_key, sn_key, t_key)
+        if cache_key and self._restore_cached(cache, cache_key, dataset_filename):
+            return
+        
         # Open and validate dataset
         ds = self.open_dataset(dataset_filename, separator, pfi_key, sn_key, t_key)
         
@@ -276,7 +556,7 @@ class Dqa4PM:
             return
         
         # Initialize temporary storage
-        store = ReportStore()
+        store = self._new_store()
         self.T.debug("Initializing temporary storage")
         store.initialize()
         
@@ -288,19 +568,202 @@ class Dqa4PM:
         self.T.info("Creating supplementary files")
         self.create_alternative_data(ds)
         
+        if self._export and dqa.AllChecksOK:
+            self.T.info("Exporting dataset")
+            self.export_dataset(ds, self._export)
+        
         if dqa.AllChecksOK:
-            # Generate charts
-            self.T.info("Building charts")
-            if self.build_charts(dqa, store):
-                # Generate PDF report
-                report_name = ds.filenameWithoutExt + C.SUFFIX_REPORT
-                self.T.info("Generating report: {}".format(report_name))
-                self.generate_report(dqa, report_name)
+            # Generate the PDF report, or the metrics file
+            base = ds.filenameWithoutExt
+            if self._write_outputs(dqa, store, base + C.SUFFIX_REPORT, base + C.SUFFIX_METRICS):
+                if cache_key:
+                    try:
+                        cache.put(cache_key, dqa, store, ds.filenameWithoutExt, C.CACHED_SUFFIXES)
+                        self.T.info("Result cached: <", cache_key, ">")
+                    except Exception as e:
+                        self.T.warning("Cannot cache the result: {}".format(e))
         
         # Cleanup
         self.T.info("Cleaning up temporary files")
         store.finalize()
     
+    def process_incremental(self, dataset_filename: str, separator: str,
+                            pfi_key: str, sn_key: str, t_key: str) -> Optional[DQAReportData]:
+        """
+        Run the DQA workflow on an append-only log, reading only its new rows.
+        
+        The checkpoint of the previous run ([filename]-checkpoint.json) is
+        resumed when the file has only been appended to since; otherwise the
+        whole file is read. The updated checkpoint is saved for the next run.
+        The report is the same as a full run on the file (see Checkpoint).
+        
+        The rows with a missing key are appended to the 3keys reject file
+        and the unique events and duplicates files are rewritten; the near
+        duplicates reject file needs the full rows and is not written in
+        this mode. The approximate, export, sampling and result cache
+        options are ignored, with a warning.
+        
+        Args:
+            dataset_filename: Path to the CSV file.
+            separator: Field separator character.
+            pfi_key: Timeline ID column name.
+            sn_key: Event ID column name.
+            t_key: Timestamp column name.
+        
+        Returns:
+            The DQAReportData of all the rows read so far, or None on error.
+        """
+        base = os.path.splitext(dataset_filename)[0]
+        checkpoint_name = base + C.SUFFIX_CHECKPOINT
+        checkpoint = None
+        if os.path.exists(checkpoint_name):
+            try:
+                checkpoint = Checkpoint.load(checkpoint_name)
+            except Exception as e:
+                self.T.warning("Cannot read checkpoint: {}".format(e))
+            if checkpoint and not checkpoint.matches(dataset_filename, separator, pfi_key, sn_key, t_key):
+                self.T.info("Checkpoint does not match the file, reading the whole file")
+                checkpoint = None
+        if checkpoint is None:
+            checkpoint = Checkpoint(dataset_filename, separator, pfi_key, sn_key, t_key)
+        
+        self.T.info("Reading rows from byte offset <", checkpoint.offset, "> ...")
+        ds = DataSource(dataset_filename, pfi_key, sn_key, t_key)
+        opened, error = ds.openTail(separator, checkpoint.offset, checkpoint.columns)
+        if not opened:
+            self.T.error("Error while opening the file: {}".format(error))
+            return None
+        if checkpoint.columns is None and ds.columns:
+            check, message = ds.check3PKeys()
+            if not check:
+                self.T.error(message)
+                return None
+        
+        self.T.info("New rows: <", max(ds.rowsCount(), 0), ">")
+        if ds.isOpened():
+            self.T.info(
+                "Rows with missing keys: <", ds.dump3KeysRejectFile(checkpoint.rowsRead),
+                "> | File: <", ds.keysRejectFilename, ">"
+            )
+        checkpoint.update(ds)
+        checkpoint.save(checkpoint_name)
+        self.T.info(
+            "Checkpoint saved: <", checkpoint_name, "> | Rows: <", checkpoint.rowsRead,
+            "> | Timelines: <", checkpoint.openCases, ">"
+        )
+        self.T.info(
+            "Unique events: <", checkpoint.dumpUniqueEvents(ds.uniqueEventsFilename),
+            "> | File: <", ds.uniqueEventsFilename, ">"
+        )
+        self.T.info(
+            "Duplicate groups: <", checkpoint.dumpDuplicatesFile(ds.duplicatesFilename),
+            "> | File: <", ds.duplicatesFilename, ">"
+        )
+        self.T.info("Near duplicates reject file is not written in incremental mode")
+        
+        dqa = checkpoint.toReportData()
+        store = self._new_store()
+        store.initialize()
+        self._write_outputs(dqa, store, base + C.SUFFIX_REPORT, base + C.SUFFIX_METRICS)
+        store.finalize()
+        return dqa
+
+    def process_shards(self, filenames: List[str], separator: str,
+                       pfi_key: str, sn_key: str, t_key: str) -> Optional[DQAReportData]:
+        """
+        Run the DQA workflow on a log split into several shard files.
+        
+        The shards are profiled in parallel and their profile states merged,
+        so the report is that of the concatenated file, including the
+        checks on timelines spread over several shards (waiting times,
+        near duplicates, open timelines, attributes).
+        The approximate, export, sampling, incremental and result cache
+        options do not apply to shards: they are ignored with a warning.
+        
+        Args:
+            filenames: Paths to the shard CSV files, in log order.
+            separator: Field separator character.
+            pfi_key: Timeline ID column name.
+            sn_key: Event ID column name.
+            t_key: Timestamp column name.
+        
+        Returns:
+            The DQAReportData of the merged state, or None on error.
+        """
+        self._warn_ignored("shards", [
+            ("approximate", self._approximate),
+            ("export", self._export),
+            ("sampling", self._sample_rate < 1.0),
+            ("incremental", self._incremental),
+            ("result cache", self._cache)
+        ])
+        
+        try:
+            self.T.info("Profiling <", len(filenames), "> shards ...")
+            state = profileShards(filenames, separator, pfi_key, sn_key, t_key)
+        except Exception as e:
+            self.T.error("Error while profiling the shards: {}".format(e))
+            return None
+        
+        dqa = state.toReportData(", ".join(filenames))
+        self.T.info("Shards merged: <", state.shards, "> files, <", state.rows, "> rows")
+        
+        base = os.path.splitext(filenames[0])[0]
+        store = self._new_store()
+        store.initialize()
+        self._write_outputs(dqa, store, base + C.SUFFIX_MERGED_REPORT, base + C.SUFFIX_MERGED_METRICS)
+        store.finalize()
+        return dqa
+
+    def _warn_ignored(self, mode: str, options: List[Tuple[str, Any]]) -> None:
+        """Warn about the enabled options a mode does not support."""
+        for option, enabled in options:
+            if enabled:
+                self.T.warning("Option <", option, "> is not supported with ", mode, ", ignored")
+
+    def _open_cache(self, filename: str, sep: str, pfi: str, sn: str, t: str):
+        """Get the result cache and the key of this run, (None, None) when not cached."""
+        if not self._cache:
+            return None, None
+        if self._export:
+            # The exported dataset is as large as the input, it is not cached
+            self.T.info("Result cache not used with a dataset export")
+            return None, None
+        cache = ResultCache(self._cache)
+        try:
+            return cache, cache.key(
+                filename, sep, pfi, sn, t,
+                approximate=self._approximate,
+                error=self._error,
+                sample_rate=self._sample_rate,
+                quality=self._quality,
+                chart_backend=self._chart_backend,
+                output_format=self._output_format
+            )
+        except OSError as e:
+            self.T.warning("Result cache not available: {}".format(e))
+            return None, None
+
+    def _restore_cached(self, cache: ResultCache, key: str, filename: str) -> bool:
+        """Write the report and supplementary files of a cached result."""
+        cached = cache.get(key)
+        if cached is None:
+            return False
+        dqa, outputs = cached
+        self.T.info("Unchanged file, using the cached result: <", key, ">")
+        
+        base = os.path.splitext(filename)[0]
+        dqa.filename = filename
+        for suffix, path in outputs.items():
+            shutil.copyfile(path, base + suffix)
+        if self._output_format == C.FORMAT_JSON:
+            self.write_metrics(dqa, base + C.SUFFIX_METRICS)
+            return True
+        report_name = base + C.SUFFIX_REPORT
+        self.T.info("Generating report: {}".format(report_name))
+        self.generate_report(dqa, report_name)
+        return True
+
     # Backward compatibility alias
     def Process(self, dataset_filename, separator, pfi_key, ps_key, t_key):
         self.process(dataset_filename, separator, pfi_key, ps_key, t_key)
@@ -0,0 +1,852 @@
+"""
+Mergeable profile state for pyDQA4ProcessMining.
+
+Provides the ProfileState class, a serializable summary of one dataset
+(or shard) that can be merged with the states of other shards to assess
+a log delivered as several files.
+"""
+
+__author__ = "Benoit CAYLA"
+__email__ = "benoit@datacorner.fr"
+__license__ = "GPL"
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from pydqa4pm.core.datasource import DataSource, classify_attributes, count_active_cases
+from pydqa4pm.core.report_data import DQAReportData
+from pydqa4pm.utils import constants as C
+from pydqa4pm.utils.sketches import key_text, key_values
+
+
+# Distinct (PFI, SN, T) rows
+_PFI = "pfi"
+_SN = "sn"
+_T = "t"
+_ROW_KEYS = [_PFI, _SN, _T]
+_COUNT = "count"        # Number of rows with these keys
+_FIRST = "first"        # Position of the first of these rows (rows with all keys, file order)
+_TICKS = "ticks"        # Parsed timestamp
+_FLAGS = "flags"        # Bad timestamp / out-of-order flags of the first of these rows
+
+# Timeline summaries (first and last event of each timeline)
+_FIRST_SN = "first_sn"
+_FIRST_T = "first_t"
+_FIRST_TICKS = "first_ticks"
+_FIRST_POS = "first_pos"
+_LAST_SN = "last_sn"
+_LAST_TICKS = "last_ticks"
+
+# Waiting times (number of consecutive event pairs per delta)
+_PREV = "prev"
+_NEXT = "next"
+_DELTA = "delta"
+_WAIT_KEYS = [_PREV, _NEXT, _DELTA]
+
+
+def _sort_counts(counts: pd.Series) -> pd.Series:
+    """Sort counts by decreasing frequency, ties in order of first appearance (as value_counts)."""
+    return counts.sort_values(ascending=False, kind='stable')
+
+
+def _add_counts(counts: pd.Series, other: pd.Series) -> pd.Series:
+    """Add two value counts, keeping the values in order of first appearance."""
+    return pd.concat([counts, other]).groupby(level=0, sort=False).sum().astype('int64')
+
+
+def _ticks_to_list(values) -> list:
+    """Serialize datetime64 values as nanoseconds (None for NaT)."""
+    values = np.asarray(values, dtype='datetime64[ns]')
+    missing = np.isnat(values)
+    return [None if m else int(v) for v, m in zip(values.view('int64'), missing)]
+
+
+def _ticks_from_list(values: list) -> np.ndarray:
+    nat = np.datetime64('NaT', 'ns').view('int64')
+    return np.array([nat if v is None else v for v in values], dtype='int64').view('datetime64[ns]')
+
+
+def _nulls_to_none(values) -> list:
+    return [None if pd.isna(v) else v for v in values]
+
+
+def _value_text(values: pd.Series) -> pd.Series:
+    """Text form of attribute values (see key_text), nulls kept as NaN."""
+    text = pd.Series(np.nan, index=values.index, dtype=object)
+    notna = values.notna()
+    text[notna] = key_text(values[notna]).to_numpy(dtype=object)
+    return text
+
+
+def _merged_type(types: List[str], nulls: int) -> str:
+    """
+    Get the type pandas infers for a column from the types inferred per shard.
+
+    A whole file is read with one type per column: integers with a missing
+    value become floats, integers and floats become floats, and any other
+    mix is read as text.
+    """
+    kinds = set(types)
+    if not kinds:
+        return "floating"
+    if kinds == {"integer"}:
+        return "integer" if nulls == 0 else "floating"
+    if kinds <= {"integer", "floating"}:
+        return "floating"
+    if len(kinds) == 1:
+        return types[0]
+    return "string"
+
+
+def _wait_stats(deltas: pd.Series) -> dict:
+    """
+    Compute the waiting time statistics of one pair of events.
+
+    Args:
+        deltas: Number of occurrences per waiting time (seconds).
+
+    Returns:
+        Count, quantiles (interpolated as pandas does), zero and negative counts.
+    """
+    values = deltas.index.to_numpy(dtype=np.float64)
+    order = np.argsort(values, kind='stable')
+    values = values[order]
+    counts = deltas.to_numpy(dtype=np.int64)[order]
+    cumulative = np.cumsum(counts)
+    n = int(cumulative[-1])
+
+    def at(i: int) -> float:
+        return values[np.searchsorted(cumulative, i, side='right')]
+
+    def quantile(q: float) -> float:
+        h = (n - 1) * q
+        low = int(np.floor(h))
+        a, b = at(low), at(min(low + 1, n - 1))
+        return a + (b - a) * (h - low)
+
+    median = at(n // 2) if n % 2 else (at(n // 2 - 1) + at(n // 2)) / 2
+    return {
+        C.FLD_WAIT_COUNT: n,
+        C.FLD_WAIT_MIN: values[0],
+        C.FLD_WAIT_P25: quantile(0.25),
+        C.FLD_WAIT_MEDIAN: median,
+        C.FLD_WAIT_P75: quantile(0.75),
+        C.FLD_WAIT_MAX: values[-1],
+        C.FLD_WAIT_ZERO: int(counts[values == 0].sum()),
+        C.FLD_WAIT_NEGATIVE: int(counts[values < 0].sum())
+    }
+
+
+class ProfileState:
+    """
+    Serializable and mergeable profile of a dataset.
+
+    The state keeps everything needed to rebuild the report:
+    - row and missing key counts and timestamp format hits,
+    - each distinct (PFI, SN, T) row with its count, parsed timestamp and
+      the position and flags of its first occurrence: the duplicates, key
+      frequencies, timeline sizes, open timelines and near duplicates come
+      from it, compared on the actual values (no hash collision),
+    - the first and last event of each timeline, so the waiting time
+      between the last event of a shard and the next event of the same
+      timeline in a later shard is counted,
+    - the waiting times per pair of consecutive events, as counts per
+      delta, so the quantiles of the merge are exact,
+    - per attribute, the value counts and inferred types, and per timeline
+      its first value and whether it holds several values.
+
+    merge() is associative: merging the states of the shards, in any
+    grouping, gives the report of the concatenated file. Values are
+    compared as text (see key_text), so a value read as a number in one
+    shard and as a string in another is the same value. The memory used
+    grows with the number of distinct (PFI, SN, T) rows, not with the
+    other columns.
+
+    Example:
+        >>> states = [ProfileState.fromFile(f, ",", "case_id", "activity", "ts")
+        ...           for f in shards]
+        >>> merged = ProfileState.mergeAll(states)
+        >>> report_data = merged.toReportData("log-merged.csv")
+    """
+
+    def __init__(self, pfi: str, sn: str, t: str, columns: Optional[List[str]] = None):
+        """
+        Initialize an empty state.
+
+        Args:
+            pfi: Timeline ID column name.
+            sn: Event ID column name.
+            t: Timestamp column name.
+            columns: Column names of the dataset.
+        """
+        self._keys = [pfi, sn, t]
+        self._columns = list(columns) if columns is not None else []
+        self._shards = 0
+        self._rows = 0
+        self._rejects = 0
+        self._missings = [0, 0, 0]
+        self._format_hits = [0] * len(C.FMT)
+        self._distinct_rows = pd.DataFrame({
+            _COUNT: pd.Series(dtype='int64'),
+            _FIRST: pd.Series(dtype='int64'),
+            _TICKS: pd.Series(dtype='datetime64[ns]'),
+            _FLAGS: pd.Series(dtype='int64')
+        }, index=pd.MultiIndex.from_arrays([[], [], []], names=_ROW_KEYS))
+        self._timelines = pd.DataFrame({
+            _FIRST_SN: pd.Series(dtype=object),
+            _FIRST_T: pd.Series(dtype=object),
+            _FIRST_TICKS: pd.Series(dtype='datetime64[ns]'),
+            _FIRST_POS: pd.Series(dtype='int64'),
+            _LAST_SN: pd.Series(dtype=object),
+            _LAST_TICKS: pd.Series(dtype='datetime64[ns]')
+        }, index=pd.Index([], dtype=object, name=_PFI))
+        self._waits = pd.Series(
+            dtype='int64', index=pd.MultiIndex.from_arrays([[], [], []], names=_WAIT_KEYS)
+        )
+        self._attr_counts: Dict[str, pd.Series] = {}
+        self._attr_types: Dict[str, List[str]] = {}
+        self._attr_values = pd.DataFrame(index=pd.Index([], dtype=object, name=_PFI))
+        self._attr_mixed = pd.DataFrame(index=pd.Index([], dtype=object, name=_PFI))
+        self._head = pd.DataFrame()
+
+    # =========================================================================
+    # Properties
+    # =========================================================================
+
+    @property
+    def keys(self) -> List[str]:
+        """Key column names [PFI, SN, T]."""
+        return self._keys
+
+    @property
+    def columns(self) -> List[str]:
+        """Column names of the dataset."""
+        return self._columns
+
+    @property
+    def attributes(self) -> List[str]:
+        """Non-key column names."""
+        return [col for col in self._columns if col not in self._keys]
+
+    @property
+    def shards(self) -> int:
+        """Number of shards merged into this state."""
+        return self._shards
+
+    @property
+    def rows(self) -> int:
+        """Number of rows with all three keys."""
+        return self._rows
+
+    @property
+    def rejects(self) -> int:
+        """Number of rows rejected for a missing key."""
+        return self._rejects
+
+    @property
+    def missings(self) -> List[int]:
+        """Missing value counts [PFI, SN, T]."""
+        return self._missings
+
+    @property
+    def timelines(self) -> int:
+        """Number of timelines."""
+        return len(self._timelines)
+
+    @property
+    def duplicates(self) -> int:
+        """Number of duplicate rows on the three keys."""
+        return self._rows - len(self._distinct_rows)
+
+    def valueCounts(self, col: str) -> pd.Series:
+        """Get the frequency of each value (as text) of a key column, as value_counts()."""
+        counts = self._distinct_rows[_COUNT].groupby(level=self._keys.index(col), sort=False).sum()
+        return _sort_counts(counts.astype('int64'))
+
+    # =========================================================================
+    # Building and Merging
+    # =========================================================================
+
+    @classmethod
+    def fromDataSource(cls, ds: DataSource) -> "ProfileState":
+        """
+        Profile an opened DataSource.
+
+        The rows with a missing key are removed from the DataSource, as
+        done by the report checks. A DataSource holding the header only
+        gives an empty state with the column names.
+
+        Args:
+            ds: DataSource whose key columns exist.
+
+        Returns:
+            The state of the dataset.
+        """
+        state = cls(ds.PFI, ds.SN, ds.T, ds.columns)
+        state._shards = 1
+        if not ds.isOpened():
+            return state
+        state._missings = ds.missingValues()
+        state._rejects = ds.rejectRows
+        # All the rows may have been rejected for a missing key
+        if not ds.isOpened():
+            return state
+        state._rows = ds.rowsCount()
+        state._format_hits = ds.checkBPPIDateFormats()['GoodRows'].astype(int).tolist()
+
+        pfi = key_text(ds.getColumn(ds.PFI))
+        rows = pd.DataFrame({
+            _PFI: pfi.to_numpy(dtype=object),
+            _SN: key_text(ds.getColumn(ds.SN)).to_numpy(dtype=object),
+            _T: key_text(ds.getColumn(ds.T)).to_numpy(dtype=object),
+            _FIRST: np.arange(state._rows, dtype=np.int64),
+            _TICKS: ds.getTimestamps().to_numpy(),
+            _FLAGS: (ds.qualityFlags[pfi.index.to_numpy()] & C.FLAG_BAD_TIMESTAMP).astype(np.int64)
+        })
+
+        # Consecutive events of each timeline, in file order
+        codes, _ = pd.factorize(rows[_PFI])
+        order = np.argsort(codes, kind='stable')
+        ticks = rows[_TICKS].to_numpy()[order]
+        not_nat = ~np.isnat(ticks)
+        valid = (codes[order][1:] == codes[order][:-1]) & not_nat[1:] & not_nat[:-1]
+        gaps = np.diff(ticks)
+        flags = rows[_FLAGS].to_numpy().copy()
+        flags[order[1:][valid & (gaps < np.timedelta64(0, 's'))]] |= C.FLAG_OUT_OF_ORDER
+        rows[_FLAGS] = flags
+        events = rows[_SN].to_numpy()[order]
+        state._waits = pd.DataFrame({
+            _PREV: events[:-1][valid],
+            _NEXT: events[1:][valid],
+            _DELTA: gaps[valid] / np.timedelta64(1, 's')
+        }).groupby(_WAIT_KEYS, sort=False).size().astype('int64')
+
+        firsts = rows.drop_duplicates(subset=_ROW_KEYS).set_index(_ROW_KEYS)
+        counts = rows.groupby(_ROW_KEYS, sort=False).size()
+        firsts[_COUNT] = counts.reindex(firsts.index).to_numpy()
+        state._distinct_rows = firsts[[_COUNT, _FIRST, _TICKS, _FLAGS]]
+
+        first = rows.drop_duplicates(subset=[_PFI]).set_index(_PFI)
+        last = rows.drop_duplicates(subset=[_PFI], keep='last').set_index(_PFI).reindex(first.index)
+        state._timelines = pd.DataFrame({
+            _FIRST_SN: first[_SN],
+            _FIRST_T: first[_T],
+            _FIRST_TICKS: first[_TICKS],
+            _FIRST_POS: first[_FIRST],
+            _LAST_SN: last[_SN],
+            _LAST_TICKS: last[_TICKS]
+        }, index=first.index)
+
+        attributes = state.attributes
+        values = pd.DataFrame({col: _value_text(ds.getColumn(col)) for col in attributes},
+                              index=pfi.index)
+        for col in attributes:
+            present = values[col].dropna()
+            state._attr_counts[col] = present.groupby(present, sort=False).size().astype('int64')
+            state._attr_types[col] = (
+                [pd.api.types.infer_dtype(ds.getColumn(col), skipna=True)]
+                if len(state._attr_counts[col]) else []
+            )
+        grouped = values.groupby(pfi.to_numpy(dtype=object), sort=False)
+        state._attr_values = grouped.first().reindex(first.index)
+        state._attr_mixed = (grouped.nunique() > 1).reindex(first.index)
+        state._head = ds.head(5).reset_index(drop=True)
+        return state
+
+    @classmethod
+    def fromFile(cls, filename: str, sep: str, pfi: str, sn: str, t: str) -> "ProfileState":
+        """
+        Open and profile a CSV file.
+
+        Args:
+            filename: Path to the CSV file.
+            sep: Field separator character.
+            pfi: Timeline ID column name.
+            sn: Event ID column name.
+            t: Timestamp column name.
+
+        Returns:
+            The state of the file.
+
+        Raises:
+            ValueError: If the file cannot be opened or a key column is missing.
+        """
+        ds = DataSource(filename, pfi, sn, t)
+        opened, error = ds.open(sep)
+        if not opened:
+            raise ValueError(f"Cannot open shard {filename}: {error}")
+        check, message = ds.check3PKeys()
+        if not check:
+            raise ValueError(f"{filename}: {message}")
+        return cls.fromDataSource(ds)
+
+    def merge(self, other: "ProfileState") -> "ProfileState":
+        """
+        Merge the state of another shard into this one.
+
+        Args:
+            other: State built with the same columns; its rows come after ours.
+
+        Returns:
+            This state, updated.
+
+        Raises:
+            ValueError: If the states do not have the same columns.
+        """
+        if other._shards == 0:
+            return self
+        if self._keys != other._keys or (self._columns and self._columns != other._columns):
+            raise ValueError("Cannot merge profile states with different columns")
+        self._columns = list(other._columns)
+
+        offset = self._rows
+        self._shards += other._shards
+        self._rows += other._rows
+        self._rejects += other._rejects
+        self._missings = [a + b for a, b in zip(self._missings, other._missings)]
+        self._format_hits = [a + b for a, b in zip(self._format_hits, other._format_hits)]
+
+        rows = other._distinct_rows.copy()
+        rows[_FIRST] += offset
+        timelines = other._timelines.copy()
+        timelines[_FIRST_POS] += offset
+        waits = other._waits
+
+        # Timelines continued by the other state: pair our last event with its first one
+        continued = self._timelines.index.intersection(timelines.index)
+        if len(continued):
+            before = self._timelines.loc[continued]
+            after = timelines.loc[continued]
+            previous = before[_LAST_TICKS].to_numpy()
+            following = after[_FIRST_TICKS].to_numpy()
+            valid = ~np.isnat(previous) & ~np.isnat(following)
+            gaps = following - previous
+            boundary = pd.DataFrame({
+                _PREV: before[_LAST_SN].to_numpy()[valid],
+                _NEXT: after[_FIRST_SN].to_numpy()[valid],
+                _DELTA: gaps[valid] / np.timedelta64(1, 's')
+            }).groupby(_WAIT_KEYS, sort=False).size()
+            waits = waits.add(boundary, fill_value=0)
+
+            # The first event is out of order: flag it when it is the first row with its keys
+            late = after[valid & (gaps < np.timedelta64(0, 's'))]
+            late_keys = pd.MultiIndex.from_arrays(
+                [late.index, late[_FIRST_SN], late[_FIRST_T]], names=_ROW_KEYS
+            ).difference(self._distinct_rows.index)
+            if len(late_keys):
+                rows.loc[late_keys, _FLAGS] |= C.FLAG_OUT_OF_ORDER
+
+        # Our rows come first: their first occurrence and flags are kept
+        merged = pd.concat([self._distinct_rows, rows])
+        self._distinct_rows = merged.groupby(level=_ROW_KEYS, sort=False).agg({
+            _COUNT: 'sum', _FIRST: 'first', _TICKS: 'first', _FLAGS: 'first'
+        })
+
+        merged = pd.concat([self._timelines, timelines])
+        first = merged[~merged.index.duplicated(keep='first')].copy()
+        last = merged[~merged.index.duplicated(keep='last')].reindex(first.index)
+        first[[_LAST_SN, _LAST_TICKS]] = last[[_LAST_SN, _LAST_TICKS]]
+        self._timelines = first
+
+        self._waits = self._waits.add(waits, fill_value=0).astype('int64')
+
+        for col in self.attributes:
+            self._attr_counts[col] = _add_counts(
+                self._attr_counts.get(col, pd.Series(dtype='int64')),
+                other._attr_counts.get(col, pd.Series(dtype='int64'))
+            )
+            self._attr_types[col] = sorted(
+                set(self._attr_types.get(col, [])) | set(other._attr_types.get(col, []))
+            )
+        if self.attributes:
+            values = pd.concat([self._attr_values, other._attr_values])
+            mixed = pd.concat([self._attr_mixed, other._attr_mixed]).astype(bool)
+            grouped = values.groupby(level=0, sort=False)
+            # A timeline holds several values when a shard says so or when the shards differ
+            self._attr_mixed = mixed.groupby(level=0, sort=False).any() | (grouped.nunique() > 1)
+            self._attr_values = grouped.first()
+        else:
+            self._attr_values = self._attr_values.reindex(self._timelines.index)
+            self._attr_mixed = self._attr_mixed.reindex(self._timelines.index)
+
+        if len(self._head) < 5:
+            self._head = pd.concat([self._head, other._head], ignore_index=True).head(5)
+        return self
+
+    @classmethod
+    def mergeAll(cls, states: List["ProfileState"]) -> "ProfileState":
+        """
+        Merge the states of several shards, in file order.
+
+        Args:
+            states: Non-empty list of states.
+
+        Returns:
+            A new state covering all the shards.
+        """
+        merged = cls(*states[0]._keys)
+        for state in states:
+            merged.merge(state)
+        return merged
+
+    # =========================================================================
+    # Report Data
+    # =========================================================================
+
+    def _key_display(self, col: str, texts) -> pd.Index:
+        """Show key values as numbers when every value of the column is an integer."""
+        if key_values(self.valueCounts(col).index).dtype == object:
+            return pd.Index(texts, dtype=object)
+        return pd.Index(texts, dtype=object).astype('int64')
+
+    def getCountValuesForField(self, col: str, limit: int = 0) -> pd.DataFrame:
+        """
+        Get the value frequency distribution of a key column.
+
+        Args:
+            col: Key column name.
+            limit: Maximum number of rows to return (0 = all).
+
+        Returns:
+            DataFrame with values and their frequencies, as DataSource.getCountValuesForField().
+        """
+        counts = self.valueCounts(col)
+        if limit > 0:
+            counts = counts.head(limit)
+        return pd.DataFrame({
+            C.FLD_COL_VALUECOUNT: self._key_display(col, counts.index),
+            C.FLD_FREQ_VALUECOUNT: counts.values
+        })
+
+    def _near_duplicates(self) -> np.ndarray:
+        """
+        Flag the distinct rows whose first occurrence is a near duplicate.
+
+        As in DataSource, an event is a near duplicate when the previous
+        event of the same timeline and Event ID, in timestamp order, is
+        less than NEAR_DUPLICATE_TOLERANCE seconds (and more than zero)
+        before it. Only the first row at a given timestamp can be one.
+        """
+        rows = self._distinct_rows
+        frame = pd.DataFrame({
+            _PFI: rows.index.get_level_values(0),
+            _SN: rows.index.get_level_values(1),
+            _TICKS: rows[_TICKS].to_numpy(),
+            _FIRST: rows[_FIRST].to_numpy(),
+            "row": np.arange(len(rows))
+        })
+        frame = frame[frame[_TICKS].notna()].sort_values(by=[_PFI, _SN, _TICKS, _FIRST])
+        heads = frame.drop_duplicates(subset=[_PFI, _SN, _TICKS])
+        gaps = np.diff(heads[_TICKS].to_numpy()) / np.timedelta64(1, 's')
+        pfi, sn = heads[_PFI].to_numpy(), heads[_SN].to_numpy()
+        near = (pfi[1:] == pfi[:-1]) & (sn[1:] == sn[:-1])
+        near &= (gaps > 0) & (gaps < C.NEAR_DUPLICATE_TOLERANCE)
+        mask = np.zeros(len(rows), dtype=bool)
+        mask[heads["row"].to_numpy()[1:][near]] = True
+        return mask
+
+    def getWaitingTimesPerPair(self) -> pd.DataFrame:
+        """
+        Get the waiting time distribution between consecutive events.
+
+        Returns:
+            DataFrame with one row per pair, as DataSource.getWaitingTimesPerPair().
+        """
+        columns = [
+            C.FLD_SN_PREV, C.FLD_SN_NEXT, C.FLD_WAIT_COUNT, C.FLD_WAIT_MIN,
+            C.FLD_WAIT_P25, C.FLD_WAIT_MEDIAN, C.FLD_WAIT_P75, C.FLD_WAIT_MAX,
+            C.FLD_WAIT_ZERO, C.FLD_WAIT_NEGATIVE
+        ]
+        if self._waits.empty:
+            return pd.DataFrame(columns=columns)
+
+        records = [
+            {C.FLD_SN_PREV: prev, C.FLD_SN_NEXT: nxt, **_wait_stats(deltas.droplevel([0, 1]))}
+            for (prev, nxt), deltas in self._waits.groupby(level=[0, 1], sort=False)
+        ]
+        result = pd.DataFrame(records, columns=columns)
+
+        # Ties in the order of first appearance of the events, as in a single file
+        rows = self._distinct_rows
+        rank = pd.Series(rows[_FIRST].to_numpy(), index=rows.index.get_level_values(1))
+        rank = rank.groupby(level=0).min()
+        order = np.lexsort((rank[result[C.FLD_SN_NEXT]].to_numpy(),
+                            rank[result[C.FLD_SN_PREV]].to_numpy()))
+        result = result.iloc[order].sort_values(by=[C.FLD_WAIT_COUNT], ascending=False, kind='stable')
+        result = result.reset_index(drop=True)
+        sn = self._keys[1]
+        result[C.FLD_SN_PREV] = self._key_display(sn, result[C.FLD_SN_PREV])
+        result[C.FLD_SN_NEXT] = self._key_display(sn, result[C.FLD_SN_NEXT])
+        return result
+
+    def getActiveCasesOverTime(self, buckets: int = C.ACTIVE_CASES_BUCKETS) -> pd.DataFrame:
+        """Get the number of open timelines over time (see DataSource)."""
+        rows = self._distinct_rows[self._distinct_rows[_TICKS].notna()]
+        if rows.empty or buckets <= 0:
+            return pd.DataFrame(columns=[C.FLD_TIME, C.FLD_ACTIVE_CASES])
+        bounds = rows[_TICKS].astype('int64').groupby(level=0).agg(['min', 'max'])
+        return count_active_cases(bounds['min'].to_numpy(), bounds['max'].to_numpy(), buckets)
+
+    def getDuplicateGroups(self) -> pd.DataFrame:
+        """
+        Get the groups of rows sharing the same three key values.
+
+        Returns:
+            DataFrame with the key values of each group and its multiplicity,
+            as DataSource.getDuplicateGroups().
+        """
+        rows = self._distinct_rows
+        groups = rows[rows[_COUNT] > 1].sort_values(by=[_FIRST])
+        result = pd.DataFrame({
+            key: self._key_display(key, groups.index.get_level_values(level))
+            for level, key in enumerate(self._keys)
+        })
+        result[C.FLD_MULTIPLICITY] = groups[_COUNT].to_numpy()
+        return result.sort_values(by=[C.FLD_MULTIPLICITY], ascending=False, kind='stable')
+
+    def profileAttributes(self) -> pd.DataFrame:
+        """Profile every attribute column (see DataSource.profileAttributes())."""
+        columns = [
+            C.FLD_ATTRIBUTE, C.FLD_ATTR_TYPE, C.FLD_ATTR_NULL_RATE,
+            C.FLD_ATTR_DISTINCT, C.FLD_ATTR_TOP_VALUES
+        ]
+        if not self._rows or not self.attributes:
+            return pd.DataFrame(columns=columns)
+
+        profiles = []
+        for col in self.attributes:
+            counts = _sort_counts(self._attr_counts.get(col, pd.Series(dtype='int64')))
+            nulls = self._rows - counts.sum()
+            kind = _merged_type(self._attr_types.get(col, []), nulls)
+            top = counts.head(C.ATTR_TOP_VALUES)
+            labels = [str(float(v)) for v in top.index] if kind == "floating" else top.index
+            profiles.append({
+                C.FLD_ATTRIBUTE: col,
+                C.FLD_ATTR_TYPE: kind,
+                C.FLD_ATTR_NULL_RATE: round(nulls / self._rows * 100, 2),
+                C.FLD_ATTR_DISTINCT: len(counts),
+                C.FLD_ATTR_TOP_VALUES: ", ".join(f"{v} ({n})" for v, n in zip(labels, top.values))
+            })
+        return pd.DataFrame(profiles, columns=columns)
+
+    def checkAttributesConsistency(self) -> pd.DataFrame:
+        """Classify each attribute as case-level or event-level (see DataSource)."""
+        attributes = self.attributes
+        if not self._rows or not attributes:
+            return pd.DataFrame(columns=[C.FLD_ATTRIBUTE, C.FLD_ATTR_LEVEL, C.FLD_ATTR_VIOLATIONS])
+        sizes = self.valueCounts(self._keys[0])
+        # Only multi-event timelines can hold several values
+        violations = self._attr_mixed[attributes].astype(bool).sum()
+        return classify_attributes(attributes, violations.astype('int64'), int((sizes > 1).sum()))
+
+    def toReportData(self, filename: str, buckets: int = C.ACTIVE_CASES_BUCKETS) -> DQAReportData:
+        """
+        Build the report data from the state.
+
+        Args:
+            filename: Name shown in the report for the assessed data.
+            buckets: Number of time buckets of the open timelines chart.
+
+        Returns:
+            DQAReportData with the same checks as a single run on the
+            concatenated data.
+        """
+        pfi, sn, t = self._keys
+        dqa = DQAReportData(filename, pfi, sn, t)
+        dqa.attributes = self.attributes
+        dqa.missings = list(self._missings)
+        dqa.rejects = self._rejects
+        dqa.dateFormatsCheck = pd.DataFrame({'Format': C.FMT, 'GoodRows': self._format_hits})
+        dqa.ColCount = len(self._columns)
+        dqa.RowCount = self._rows
+        dqa.duplicates = self.duplicates
+        counts = {key: self.valueCounts(key) for key in self._keys}
+        dqa.uniques = [len(counts[key]) for key in self._keys]
+        dqa.distinctPFI = dqa.uniques[0]
+        dqa.distinctSN = dqa.uniques[1]
+
+        dqa.PFIMostFreq = self.getCountValuesForField(pfi, C.LIMIT_BARH_DISPLAY)
+        dqa.SNValues = self.getCountValuesForField(sn, C.LIMIT_BARH_DISPLAY)
+
+        sizes = counts[pfi].value_counts()
+        dqa.PFICountPerSN = pd.DataFrame({
+            C.FLD_PFI_NB: sizes.values,
+            C.FLD_SN_NB: sizes.index
+        }).sort_values(by=[C.FLD_PFI_NB], ascending=False).reset_index(drop=True)
+        dqa.firstData = self._head
+
+        near = self._near_duplicates()
+        dqa.nearDuplicates = int(near.sum())
+        dqa.waitingTimes = self.getWaitingTimesPerPair()
+        dqa.zeroWaits = int(dqa.waitingTimes[C.FLD_WAIT_ZERO].sum())
+        dqa.negativeWaits = int(dqa.waitingTimes[C.FLD_WAIT_NEGATIVE].sum())
+        dqa.activeCases = self.getActiveCasesOverTime(buckets)
+        dqa.attributesProfile = self.profileAttributes()
+        dqa.attributesConsistency = self.checkAttributesConsistency()
+
+        # Every repeated row is a duplicate; the first rows carry the other flags
+        flagged = (self._distinct_rows[_FLAGS].to_numpy() != 0) | near
+        dqa.flaggedRows = self.duplicates + int(np.count_nonzero(flagged))
+        dqa.AllChecksOK = True
+        return dqa
+
+    # =========================================================================
+    # Serialization
+    # =========================================================================
+
+    def to_dict(self) -> dict:
+        """Serialize the state to a JSON-compatible dictionary."""
+        rows = self._distinct_rows
+        timelines = self._timelines
+        waits = self._waits
+        return {
+            "version": C.PROFILE_STATE_VERSION,
+            "keys": self._keys,
+            "columns": self._columns,
+            "shards": self._shards,
+            "rows": self._rows,
+            "rejects": self._rejects,
+            "missings": self._missings,
+            "format_hits": self._format_hits,
+            "distinct_rows": {
+                **{name: rows.index.get_level_values(i).tolist() for i, name in enumerate(_ROW_KEYS)},
+                _COUNT: rows[_COUNT].astype('int64').tolist(),
+                _FIRST: rows[_FIRST].astype('int64').tolist(),
+                _TICKS: _ticks_to_list(rows[_TICKS]),
+                _FLAGS: rows[_FLAGS].astype('int64').tolist()
+            },
+            "timelines": {
+                _PFI: timelines.index.tolist(),
+                _FIRST_SN: timelines[_FIRST_SN].tolist(),
+                _FIRST_T: timelines[_FIRST_T].tolist(),
+                _FIRST_TICKS: _ticks_to_list(timelines[_FIRST_TICKS]),
+                _FIRST_POS: timelines[_FIRST_POS].astype('int64').tolist(),
+                _LAST_SN: timelines[_LAST_SN].tolist(),
+                _LAST_TICKS: _ticks_to_list(timelines[_LAST_TICKS])
+            },
+            "waits": {
+                **{name: waits.index.get_level_values(i).tolist() for i, name in enumerate(_WAIT_KEYS)},
+                _COUNT: waits.astype('int64').tolist()
+            },
+            "attributes": {
+                col: {
+                    "values": self._attr_counts[col].index.tolist(),
+                    "counts": self._attr_counts[col].astype('int64').tolist(),
+                    "types": self._attr_types[col]
+                } for col in self._attr_counts
+            },
+            "attribute_values": {
+                col: _nulls_to_none(self._attr_values[col]) for col in self._attr_values.columns
+            },
+            "attribute_mixed": {
+                col: self._attr_mixed[col].astype(bool).tolist() for col in self._attr_mixed.columns
+            },
+            "head": json.loads(self._head.to_json(orient="split", index=False))
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProfileState":
+        """
+        Rebuild a state serialized with to_dict().
+
+        Raises:
+            ValueError: If the state was written by an incompatible version.
+        """
+        if data.get("version") != C.PROFILE_STATE_VERSION:
+            raise ValueError("Unsupported profile state version: {}".format(data.get("version")))
+        state = cls(*data["keys"], columns=data["columns"])
+        state._shards = data["shards"]
+        state._rows = data["rows"]
+        state._rejects = data["rejects"]
+        state._missings = list(data["missings"])
+        state._format_hits = list(data["format_hits"])
+
+        rows = data["distinct_rows"]
+        state._distinct_rows = pd.DataFrame({
+            _COUNT: np.array(rows[_COUNT], dtype=np.int64),
+            _FIRST: np.array(rows[_FIRST], dtype=np.int64),
+            _TICKS: _ticks_from_list(rows[_TICKS]),
+            _FLAGS: np.array(rows[_FLAGS], dtype=np.int64)
+        }, index=pd.MultiIndex.from_arrays(
+            [pd.Index(rows[name], dtype=object) for name in _ROW_KEYS], names=_ROW_KEYS
+        ))
+
+        timelines = data["timelines"]
+        index = pd.Index(timelines[_PFI], dtype=object, name=_PFI)
+        state._timelines = pd.DataFrame({
+            _FIRST_SN: pd.Series(timelines[_FIRST_SN], dtype=object).to_numpy(),
+            _FIRST_T: pd.Series(timelines[_FIRST_T], dtype=object).to_numpy(),
+            _FIRST_TICKS: _ticks_from_list(timelines[_FIRST_TICKS]),
+            _FIRST_POS: np.array(timelines[_FIRST_POS], dtype=np.int64),
+            _LAST_SN: pd.Series(timelines[_LAST_SN], dtype=object).to_numpy(),
+            _LAST_TICKS: _ticks_from_list(timelines[_LAST_TICKS])
+        }, index=index)
+
+        waits = data["waits"]
+        state._waits = pd.Series(np.array(waits[_COUNT], dtype=np.int64), index=pd.MultiIndex.from_arrays([
+            pd.Index(waits[_PREV], dtype=object),
+            pd.Index(waits[_NEXT], dtype=object),
+            pd.Index(waits[_DELTA], dtype=np.float64)
+        ], names=_WAIT_KEYS))
+
+        for col, attribute in data["attributes"].items():
+            state._attr_counts[col] = pd.Series(
+                attribute["counts"], index=pd.Index(attribute["values"], dtype=object), dtype='int64'
+            )
+            state._attr_types[col] = list(attribute["types"])
+        state._attr_values = pd.DataFrame({
+            col: pd.Series(values, dtype=object).to_numpy()
+            for col, values in data["attribute_values"].items()
+        }, index=index)
+        state._attr_mixed = pd.DataFrame({
+            col: np.array(values, dtype=bool) for col, values in data["attribute_mixed"].items()
+        }, index=index)
+
+        head = data["head"]
+        state._head = pd.DataFrame(head["data"], columns=head["columns"])
+        return state
+
+    def save(self, filename: str) -> None:
+        """Write the state to a JSON file."""
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename: str) -> "ProfileState":
+        """Read a state written by save()."""
+        with open(filename, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _profile_shard(filename: str, sep: str, pfi: str, sn: str, t: str) -> ProfileState:
+    """Process pool task: profile one shard."""
+    return ProfileState.fromFile(filename, sep, pfi, sn, t)
+
+
+def profileShards(filenames: List[str], sep: str, pfi: str, sn: str, t: str,
+                  max_workers: Optional[int] = C.SHARD_MAX_WORKERS) -> ProfileState:
+    """
+    Profile several shard files in parallel and merge their states.
+
+    Each shard is opened and profiled in its own process; the states are
+    merged in the order of the files.
+
+    Args:
+        filenames: Paths to the shard CSV files.
+        sep: Field separator character.
+        pfi: Timeline ID column name.
+        sn: Event ID column name.
+        t: Timestamp column name.
+        max_workers: Maximum number of processes (None = number of CPUs).
+
+    Returns:
+        The merged state of all the shards.
+    """
+    n = len(filenames)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        states = list(pool.map(_profile_shard, filenames, [sep] * n, [pfi] * n, [sn] * n, [t] * n))
+    return ProfileState.mergeAll(states)
@@ -8,7 +8,8 @@ __author__ = "Benoit CAYLA"
 __email__ = "benoit@datacorner.fr"
 __license__ = "GPL"
 
-from typing import List
+import json
+from typing import Any, Dict, List, Tuple
 
 import pandas as pd
 
@@ -51,9 +52,15 @@ class DQAReportData:
         self._RowCount = 0
         self._ColCount = 0
         self._DuplicateCount = 0
+        self._duplicatesError = 0
+        self._NearDuplicateCount = 0
+        self._FlaggedRowCount = 0
         self._rejects = 0
         self._PFINbOfDistinctValue = 0
         self._SNNbOfDistinctValue = 0
+        self._distinctError = 0.0
+        self._zeroWaitCount = 0
+        self._negativeWaitCount = 0
         
         # Chart file paths
         self._chartPFIValCount = C.NO_CHART_FILE
@@ -61,6 +68,8 @@ class DQAReportData:
         self._tableSampleData = C.NO_CHART_FILE
         self._chartDatesFormat = C.NO_CHART_FILE
         self._chartAggSNPerPFISIze = C.NO_CHART_FILE
+        self._chartWaitingTimes = C.NO_CHART_FILE
+        self._chartActiveCases = C.NO_CHART_FILE
         
         # DataFrames
         self._dataFormatsCheck = pd.DataFrame()
@@ -68,12 +77,23 @@ class DQAReportData:
         self._SNValues = pd.DataFrame()
         self._PFIMostFreq = pd.DataFrame()
         self._PFICountPerSN = pd.DataFrame()
+        self._waitingTimes = pd.DataFrame()
+        self._activeCases = pd.DataFrame()
+        self._attributesConsistency = pd.DataFrame()
+        self._attributesProfile = pd.DataFrame()
         
         # Lists
         self._missingValues = [0, 0, 0]  # [PFI, SN, T]
         self._uniquesValues = [0, 0, 0]  # [PFI, SN, T]
         self._attributes: List[str] = []
         
+        # Sampling
+        self._sampleRate = 1.0
+        self._confidenceIntervals: Dict[str, Tuple[float, float, float]] = {}
+        
+        # Sections the assessment mode does not compute (C.SECTION_*)
+        self._notComputed: List[str] = []
+        
         # Status
         self._allchecksOK = False
 
@@ -90,6 +110,36 @@ class DQAReportData:
     def PFICountPerSN(self, value: pd.DataFrame):
         self._PFICountPerSN = value
 
+    @property
+    def waitingTimes(self) -> pd.DataFrame:
+        """Waiting time distribution per (previous event, next event) pair."""
+        return self._waitingTimes
+    
+    @waitingTimes.setter
+    def waitingTimes(self, value: pd.DataFrame):
+        self._waitingTimes = value
+
+    @property
+    def topWaitingPairs(self) -> pd.DataFrame:
+        """Most frequent activity pairs, labelled "From -> To", for display."""
+        if self._waitingTimes.empty:
+            return self._waitingTimes
+        top_pairs = self._waitingTimes.head(C.LIMIT_PAIRS_DISPLAY).copy()
+        top_pairs.insert(
+            0, C.FLD_TRANSITION,
+            top_pairs[C.FLD_SN_PREV].astype(str) + " -> " + top_pairs[C.FLD_SN_NEXT].astype(str)
+        )
+        return top_pairs.drop(columns=[C.FLD_SN_PREV, C.FLD_SN_NEXT])
+
+    @property
+    def activeCases(self) -> pd.DataFrame:
+        """Number of open timelines per time bucket."""
+        return self._activeCases
+    
+    @activeCases.setter
+    def activeCases(self, value: pd.DataFrame):
+        self._activeCases = value
+
     @property
     def PFIMostFreq(self) -> pd.DataFrame:
         """Most frequent timeline IDs."""
@@ -99,6 +149,34 @@ class DQAReportData:
     def PFIMostFreq(self, value: pd.DataFrame):
         self._PFIMostFreq = value
 
+    @staticmethod
+    def _topk_display(frame: pd.DataFrame) -> pd.DataFrame:
+        """Label each value with its maximum overestimate when the frequencies are approximate."""
+        if C.FLD_FREQ_ERROR not in frame.columns:
+            return frame
+        display = frame.drop(columns=[C.FLD_FREQ_ERROR])
+        display[C.FLD_COL_VALUECOUNT] = [
+            f"{value} (+{error} max)" if error else str(value)
+            for value, error in zip(frame[C.FLD_COL_VALUECOUNT], frame[C.FLD_FREQ_ERROR])
+        ]
+        return display
+
+    @property
+    def topPFI(self) -> pd.DataFrame:
+        """Most frequent timeline IDs for display, with their maximum overestimate when approximate."""
+        return self._topk_display(self._PFIMostFreq)
+
+    @property
+    def topSN(self) -> pd.DataFrame:
+        """Most frequent events for display, with their maximum overestimate when approximate."""
+        return self._topk_display(self._SNValues)
+
+    def getFrequencyErrorDisplay(self, frame: pd.DataFrame) -> str:
+        """Format the largest overestimate of approximate top-k frequencies ("" when exact)."""
+        if frame.empty or C.FLD_FREQ_ERROR not in frame.columns:
+            return ""
+        return f"estimated counts, each at most +{int(frame[C.FLD_FREQ_ERROR].max())} above the true count"
+
     @property
     def SNValues(self) -> pd.DataFrame:
         """Event frequency distribution."""
@@ -139,6 +217,44 @@ class DQAReportData:
     def AllChecksOK(self, value: bool):
         self._allchecksOK = value
 
+    @property
+    def sampleRate(self) -> float:
+        """Share of the timelines assessed (1.0 = whole file)."""
+        return self._sampleRate
+    
+    @sampleRate.setter
+    def sampleRate(self, value: float):
+        self._sampleRate = value
+
+    @property
+    def confidenceIntervals(self) -> Dict[str, Tuple[float, float, float]]:
+        """(ratio, lower, upper) estimate per metric (C.METRIC_*) in sampling mode."""
+        return self._confidenceIntervals
+    
+    @confidenceIntervals.setter
+    def confidenceIntervals(self, value: Dict[str, Tuple[float, float, float]]):
+        self._confidenceIntervals = value
+
+    @property
+    def notComputed(self) -> List[str]:
+        """Report sections (C.SECTION_*) not computed by the assessment mode."""
+        return self._notComputed
+    
+    @notComputed.setter
+    def notComputed(self, value: List[str]):
+        self._notComputed = list(value)
+
+    def isComputed(self, section: str) -> bool:
+        """Check a report section (C.SECTION_*) was computed."""
+        return section not in self._notComputed
+
+    def getConfidenceDisplay(self, metric: str) -> str:
+        """Format the estimated ratio of a metric with its confidence interval."""
+        if metric not in self._confidenceIntervals:
+            return ""
+        ratio, low, high = (round(v * 100, 2) for v in self._confidenceIntervals[metric])
+        return f"{ratio}% [{low}% - {high}%]"
+
     @property
     def attributes(self) -> List[str]:
         """List of non-key column names."""
@@ -148,10 +264,32 @@ class DQAReportData:
     def attributes(self, value: List[str]):
         self._attributes = value
 
+    @property
+    def attributesConsistency(self) -> pd.DataFrame:
+        """Level (case/event) and inconsistent timelines count per attribute."""
+        return self._attributesConsistency
+    
+    @attributesConsistency.setter
+    def attributesConsistency(self, value: pd.DataFrame):
+        self._attributesConsistency = value
+
+    @property
+    def attributesProfile(self) -> pd.DataFrame:
+        """Type, null rate, cardinality and top values per attribute."""
+        return self._attributesProfile
+    
+    @attributesProfile.setter
+    def attributesProfile(self, value: pd.DataFrame):
+        self._attributesProfile = value
+
     @property
     def filename(self) -> str:
         """Path to the analyzed file."""
         return self._filename
+    
+    @filename.setter
+    def filename(self, value: str):
+        self._filename = value
 
     @property
     def PFIKey(self) -> str:
@@ -179,6 +317,12 @@ class DQAReportData:
         percentage = round(value / self._RowCount * 100, 2)
         return f"{value} / {self._RowCount} ({percentage}%)"
 
+    def _get_section_display(self, section: str, value: int) -> str:
+        """Format a count of a report section, C.NOT_COMPUTED when not computed."""
+        if not self.isComputed(section):
+            return C.NOT_COMPUTED
+        return self._get_ratio_display(value)
+
     @property
     def rejects(self) -> str:
         """Number of rejected rows with percentage."""
@@ -190,13 +334,42 @@ class DQAReportData:
 
     @property
     def duplicates(self) -> str:
-        """Number of duplicate rows with percentage."""
+        """Number of duplicate rows with percentage, flagged with its error when estimated."""
+        if self._duplicatesError > 0:
+            return f"~{self._get_ratio_display(self._DuplicateCount)} +/- {self._duplicatesError} rows"
         return self._get_ratio_display(self._DuplicateCount)
     
     @duplicates.setter
     def duplicates(self, value: int):
         self._DuplicateCount = value
 
+    @property
+    def duplicatesError(self) -> int:
+        """Standard error of the duplicate row count, in rows (0 = exact count)."""
+        return self._duplicatesError
+    
+    @duplicatesError.setter
+    def duplicatesError(self, value: int):
+        self._duplicatesError = value
+
+    @property
+    def nearDuplicates(self) -> str:
+        """Number of near-duplicate rows with percentage."""
+        return self._get_section_display(C.SECTION_NEAR_DUPLICATES, self._NearDuplicateCount)
+    
+    @nearDuplicates.setter
+    def nearDuplicates(self, value: int):
+        self._NearDuplicateCount = value
+
+    @property
+    def flaggedRows(self) -> str:
+        """Number of rows with at least one quality flag with percentage."""
+        return self._get_section_display(C.SECTION_FLAGGED_ROWS, self._FlaggedRowCount)
+    
+    @flaggedRows.setter
+    def flaggedRows(self, value: int):
+        self._FlaggedRowCount = value
+
     @property
     def RowCount(self) -> int:
         """Total number of rows."""
@@ -215,10 +388,26 @@ class DQAReportData:
     def ColCount(self, value: int):
         self._ColCount = value
 
+    def _get_distinct_display(self, value: int) -> str:
+        """Format a distinct count, flagged with its error when approximate."""
+        if self._distinctError > 0:
+            error = round(self._distinctError * 100, 2)
+            return f"~{self._get_ratio_display(value)} +/- {error}%"
+        return self._get_ratio_display(value)
+
+    @property
+    def distinctError(self) -> float:
+        """Relative error of the distinct counts (0 = exact counts)."""
+        return self._distinctError
+    
+    @distinctError.setter
+    def distinctError(self, value: float):
+        self._distinctError = value
+
     @property
     def distinctPFI(self) -> str:
         """Number of distinct timeline IDs with percentage."""
-        return self._get_ratio_display(self._PFINbOfDistinctValue)
+        return self._get_distinct_display(self._PFINbOfDistinctValue)
     
     @distinctPFI.setter
     def distinctPFI(self, value: int):
@@ -227,12 +416,30 @@ class DQAReportData:
     @property
     def distinctSN(self) -> str:
         """Number of distinct event IDs with percentage."""
-        return self._get_ratio_display(self._SNNbOfDistinctValue)
+        return self._get_distinct_display(self._SNNbOfDistinctValue)
     
     @distinctSN.setter
     def distinctSN(self, value: int):
         self._SNNbOfDistinctValue = value
 
+    @property
+    def zeroWaits(self) -> str:
+        """Number of consecutive events with identical timestamps with percentage."""
+        return self._get_section_display(C.SECTION_ORDER_WAITS, self._zeroWaitCount)
+    
+    @zeroWaits.setter
+    def zeroWaits(self, value: int):
+        self._zeroWaitCount = value
+
+    @property
+    def negativeWaits(self) -> str:
+        """Number of consecutive events out of chronological order with percentage."""
+        return self._get_section_display(C.SECTION_ORDER_WAITS, self._negativeWaitCount)
+    
+    @negativeWaits.setter
+    def negativeWaits(self, value: int):
+        self._negativeWaitCount = value
+
     # =========================================================================
     # Chart Path Properties
     # =========================================================================
@@ -246,6 +453,24 @@ class DQAReportData:
     def chartAggSNPerPFISIze(self, value: str):
         self._chartAggSNPerPFISIze = value
 
+    @property
+    def chartWaitingTimes(self) -> str:
+        """Path to waiting time per activity pair chart."""
+        return self._chartWaitingTimes
+    
+    @chartWaitingTimes.setter
+    def chartWaitingTimes(self, value: str):
+        self._chartWaitingTimes = value
+
+    @property
+    def chartActiveCases(self) -> str:
+        """Path to open timelines over time chart."""
+        return self._chartActiveCases
+    
+    @chartActiveCases.setter
+    def chartActiveCases(self, value: str):
+        self._chartActiveCases = value
+
     @property
     def chartPFIValCount(self) -> str:
         """Path to PFI frequency chart."""
@@ -309,3 +534,88 @@ class DQAReportData:
         """Format a value with its percentage of total rows."""
         return self._get_ratio_display(value)
 
+    # =========================================================================
+    # Serialization
+    # =========================================================================
+
+    @staticmethod
+    def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert a DataFrame to JSON-ready records (native types, ISO dates)."""
+        if frame.empty:
+            return []
+        return json.loads(frame.to_json(orient="records", date_format="iso"))
+
+    def _records_of(self, section: str, frame: pd.DataFrame):
+        """Records of the frame of a report section, None when not computed."""
+        if not self.isComputed(section):
+            return None
+        return self._records(frame)
+
+    def toDict(self) -> Dict[str, Any]:
+        """
+        Get the metrics of the assessment as JSON-ready values.
+        
+        Holds the raw counts and their ratios to the row count (instead of
+        the display strings), the missing and unique values per key, the
+        date format table, the top-k frames, the timeline size distribution
+        and the attribute profiles. Chart paths and sample rows are left out.
+        The counts and frames of the sections listed in notComputed are None.
+        
+        Returns:
+            Dictionary of plain Python values (json.dumps() ready).
+        """
+        counts = {
+            "rejects": self._rejects,
+            "duplicates": self._DuplicateCount,
+            "nearDuplicates": self._NearDuplicateCount,
+            "flaggedRows": self._FlaggedRowCount,
+            "distinctPFI": self._PFINbOfDistinctValue,
+            "distinctSN": self._SNNbOfDistinctValue,
+            "zeroWaits": self._zeroWaitCount,
+            "negativeWaits": self._negativeWaitCount
+        }
+        sections = {
+            "nearDuplicates": C.SECTION_NEAR_DUPLICATES,
+            "flaggedRows": C.SECTION_FLAGGED_ROWS,
+            "zeroWaits": C.SECTION_ORDER_WAITS,
+            "negativeWaits": C.SECTION_ORDER_WAITS
+        }
+        counts = {
+            name: (int(value) if name not in sections or self.isComputed(sections[name]) else None)
+            for name, value in counts.items()
+        }
+        keys = {"PFI": self._PFIKey, "SN": self._SNKey, "T": self._TKey}
+        return {
+            "filename": self._filename,
+            "keys": keys,
+            "allChecksOK": bool(self._allchecksOK),
+            "rows": int(self._RowCount),
+            "columns": int(self._ColCount),
+            "notComputed": list(self._notComputed),
+            "counts": counts,
+            "ratios": {
+                name: None if value is None else (value / self._RowCount if self._RowCount else 0.0)
+                for name, value in counts.items()
+            },
+            "distinctError": float(self._distinctError),
+            "duplicatesError": int(self._duplicatesError),
+            "sampleRate": float(self._sampleRate),
+            "confidenceIntervals": {
+                metric: {"ratio": ratio, "lower": low, "upper": high}
+                for metric, (ratio, low, high) in self._confidenceIntervals.items()
+            },
+            "missings": dict(zip(keys, map(int, self._missingValues))),
+            "uniques": dict(zip(keys, map(int, self._uniquesValues))),
+            "dateFormats": self._records(self._dataFormatsCheck),
+            "topPFI": self._records(self._PFIMostFreq),
+            "topSN": self._records(self._SNValues),
+            "topWaitingPairs": self._records_of(
+                C.SECTION_WAITING_PAIRS, self._waitingTimes.head(C.LIMIT_PAIRS_DISPLAY)
+            ),
+            "timelineSizes": self._records_of(C.SECTION_TIMELINE_SIZES, self._PFICountPerSN),
+            "attributesProfile": self._records_of(C.SECTION_ATTRIBUTES_PROFILE, self._attributesProfile),
+            "attributesConsistency": self._records_of(
+                C.SECTION_ATTRIBUTES_CONSISTENCY, self._attributesConsistency
+            )
+        }
+
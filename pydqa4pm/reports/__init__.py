@@ -3,11 +3,20 @@ Report generation modules for pyDQA4ProcessMining.
 
 This package contains:
 - pdf_builder: PDF report generation using FPDF
-- store: Temporary file management for charts
+- store: Chart image storage (in memory or in a temporary folder)
+- cache: Result cache for unchanged input files
 """
 
-from pydqa4pm.reports.pdf_builder import PDFReportBuilder
-from pydqa4pm.reports.store import ReportStore
+from pydqa4pm.reports.store import ReportStore, MemoryReportStore
+from pydqa4pm.reports.cache import ResultCache
 
-__all__ = ["PDFReportBuilder", "ReportStore"]
+__all__ = ["PDFReportBuilder", "ReportStore", "MemoryReportStore", "ResultCache"]
+
+
+def __getattr__(name):
+    # FPDF is only loaded when a report is built
+    if name == "PDFReportBuilder":
+        from pydqa4pm.reports.pdf_builder import PDFReportBuilder
+        return PDFReportBuilder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,313 @@
+"""
+Result cache for pyDQA4ProcessMining.
+
+Stores the results of previous assessments on disk so an unchanged input
+file does not have to be assessed again.
+"""
+
+__author__ = "Benoit CAYLA"
+__email__ = "benoit@datacorner.fr"
+__license__ = "GPL"
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pydqa4pm.core.report_data import DQAReportData
+from pydqa4pm.reports.store import ReportStore
+from pydqa4pm.utils import constants as C
+
+
+_DATA_FILE = "report_data.pkl"
+_MANIFEST_FILE = "manifest.json"
+_CHARTS_FOLDER = "charts"
+_OUTPUTS_FOLDER = "outputs"
+_FASTPATH_FILE = "fastpath.json"
+
+
+def _hash_file(filename: str) -> str:
+    """Hash the content of a file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(C.CACHE_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _folder_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class ResultCache:
+    """
+    Content-addressed cache of assessment results.
+
+    An entry is keyed by the hash of the input file content, the key
+    column names, the separator, the assessment options, the tool version
+    and the cache schema version (C.CACHE_SCHEMA_VERSION), so entries
+    pickled by another version of DQAReportData are never read. It holds
+    the pickled DQAReportData, its chart images and the supplementary
+    files written next to the input (rejects, events...), so a hit
+    rebuilds the whole output without reading the dataset.
+
+    Hashing a large file takes time, so the content hash of each file is
+    remembered with its size and modification time: an untouched file is
+    not hashed again. The hashes of files deleted or changed since are
+    pruned on eviction, and at most C.CACHE_FASTPATH_MAX are kept. The cache is bounded in size on disk; the least
+    recently used entries are evicted first.
+
+    Supplementary files are stored by suffix, so a hit on a copy of the
+    file under another name restores them under that name.
+
+    Example:
+        >>> cache = ResultCache("~/.cache/pydqa4pm")
+        >>> key = cache.key("data.csv", ",", "case_id", "activity", "timestamp")
+        >>> entry = cache.get(key)
+        >>> if entry is None:
+        ...     cache.put(key, report_data, store, "data", [C.SUFFIX_EVENTS])
+    """
+
+    def __init__(self, path: str = C.CACHE_FOLDER, max_bytes: int = C.CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache folder (created when needed).
+            max_bytes: Maximum size of the cache on disk.
+        """
+        self._path = os.path.expanduser(path)
+        self._max_bytes = max_bytes
+
+    @property
+    def path(self) -> str:
+        """Cache folder."""
+        return self._path
+
+    @property
+    def maxBytes(self) -> int:
+        """Maximum size of the cache on disk."""
+        return self._max_bytes
+
+    # =========================================================================
+    # Keys
+    # =========================================================================
+
+    def _load_fastpath(self) -> dict:
+        try:
+            with open(os.path.join(self._path, _FASTPATH_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def contentHash(self, filename: str) -> str:
+        """
+        Get the content hash of a file.
+
+        The hash is reused while the file keeps its size and modification
+        time, otherwise the file is hashed again.
+
+        Args:
+            filename: Path to the file.
+
+        Returns:
+            Hexadecimal SHA-256 of the file content.
+        """
+        stat = os.stat(filename)
+        signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+        fastpath = self._load_fastpath()
+        known = fastpath.get(os.path.abspath(filename))
+        if known and known[0] == signature:
+            return known[1]
+
+        content_hash = _hash_file(filename)
+        # Most recently hashed files last, the first ones are pruned
+        fastpath.pop(os.path.abspath(filename), None)
+        fastpath[os.path.abspath(filename)] = [signature, content_hash]
+        os.makedirs(self._path, exist_ok=True)
+        self._write_json(os.path.join(self._path, _FASTPATH_FILE), fastpath)
+        return content_hash
+
+    def key(self, filename: str, sep: str, pfi: str, sn: str, t: str, **options) -> str:
+        """
+        Build the cache key of an assessment.
+
+        Args:
+            filename: Path to the CSV file.
+            sep: Field separator character.
+            pfi: Timeline ID column name.
+            sn: Event ID column name.
+            t: Timestamp column name.
+            **options: Other settings changing the results (approximate...).
+
+        Returns:
+            Hexadecimal key of the cache entry.
+        """
+        from pydqa4pm import __version__
+        parts = [
+            self.contentHash(filename), sep, pfi, sn, t,
+            __version__, C.CACHE_SCHEMA_VERSION, sorted(options.items())
+        ]
+        return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+    # =========================================================================
+    # Entries
+    # =========================================================================
+
+    def get(self, key: str) -> Optional[Tuple[DQAReportData, Dict[str, str]]]:
+        """
+        Get a cached result.
+
+        The chart paths of the report data point to the cached images.
+
+        Args:
+            key: Key built with key().
+
+        Returns:
+            Tuple of (report data, cached supplementary file per suffix),
+            or None when the entry does not exist or cannot be read
+            (unpickling errors included: the entry is treated as a miss).
+        """
+        entry = os.path.join(self._path, key)
+        try:
+            with open(os.path.join(entry, _MANIFEST_FILE), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("schema") != C.CACHE_SCHEMA_VERSION:
+                return None
+            with open(os.path.join(entry, _DATA_FILE), "rb") as f:
+                dqa = pickle.load(f)
+            if not isinstance(dqa, DQAReportData):
+                return None
+            for attr, name in manifest["charts"].items():
+                setattr(dqa, attr, os.path.join(entry, _CHARTS_FOLDER, name))
+            outputs = {
+                suffix: os.path.join(entry, _OUTPUTS_FOLDER, name)
+                for suffix, name in manifest["outputs"].items()
+            }
+        except Exception:
+            return None
+
+        # Mark the entry as recently used
+        now = time.time()
+        os.utime(entry, (now, now))
+        return dqa, outputs
+
+    def put(self, key: str, dqa: DQAReportData, store: ReportStore,
+            base: str = "", suffixes: Optional[List[str]] = None) -> None:
+        """
+        Store a result, then evict old entries above the size limit.
+
+        Args:
+            key: Key built with key().
+            dqa: Report data, after build_charts().
+            store: ReportStore holding the chart images.
+            base: Input filename without extension.
+            suffixes: Suffixes of the supplementary files (base + suffix)
+                to restore on a hit.
+        """
+        os.makedirs(self._path, exist_ok=True)
+        building = tempfile.mkdtemp(dir=self._path, prefix=".building-")
+        try:
+            os.makedirs(os.path.join(building, _CHARTS_FOLDER))
+            os.makedirs(os.path.join(building, _OUTPUTS_FOLDER))
+
+            # Chart images are the attributes naming an image of the store
+            charts = {}
+            for attr, value in vars(dqa).items():
+                image = store.getImage(value) if isinstance(value, str) else None
+                if image is not None:
+                    name = os.path.basename(value)
+                    with open(os.path.join(building, _CHARTS_FOLDER, name), "wb") as f:
+                        f.write(image)
+                    charts[attr] = name
+
+            outputs = {}
+            for i, suffix in enumerate(suffixes or []):
+                if os.path.isfile(base + suffix):
+                    outputs[suffix] = f"output-{i}"
+                    shutil.copyfile(base + suffix, os.path.join(building, _OUTPUTS_FOLDER, outputs[suffix]))
+
+            with open(os.path.join(building, _DATA_FILE), "wb") as f:
+                pickle.dump(dqa, f)
+            self._write_json(os.path.join(building, _MANIFEST_FILE), {
+                "schema": C.CACHE_SCHEMA_VERSION, "charts": charts, "outputs": outputs
+            })
+
+            entry = os.path.join(self._path, key)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry)
+            os.replace(building, entry)
+        finally:
+            if os.path.isdir(building):
+                shutil.rmtree(building, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache fits its size.
+
+        The remembered content hashes of files deleted or changed since
+        they were hashed are removed too, as are the oldest ones above
+        C.CACHE_FASTPATH_MAX.
+
+        Returns:
+            Number of entries removed.
+        """
+        if not os.path.isdir(self._path):
+            return 0
+        self._prune_fastpath()
+        entries = []
+        for name in os.listdir(self._path):
+            entry = os.path.join(self._path, name)
+            if os.path.isdir(entry) and not name.startswith("."):
+                entries.append((os.path.getmtime(entry), _folder_size(entry), entry))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def _prune_fastpath(self) -> None:
+        """Drop the stale and oldest remembered content hashes."""
+        fastpath = self._load_fastpath()
+        kept = {}
+        for filename, (signature, content_hash) in fastpath.items():
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            if signature == f"{stat.st_size}:{stat.st_mtime_ns}":
+                kept[filename] = [signature, content_hash]
+        kept = dict(list(kept.items())[-C.CACHE_FASTPATH_MAX:])
+        if kept != fastpath:
+            self._write_json(os.path.join(self._path, _FASTPATH_FILE), kept)
+
+    def clear(self) -> None:
+        """Remove every entry of the cache."""
+        if os.path.isdir(self._path):
+            shutil.rmtree(self._path)
+
+    @staticmethod
+    def _write_json(filename: str, data) -> None:
+        """Write a JSON file atomically (a unique temporary file, then renamed)."""
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(filename), prefix=".writing-")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp, filename)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
@@ -8,10 +8,19 @@ __author__ = "Benoit CAYLA"
 __email__ = "benoit@datacorner.fr"
 __license__ = "GPL"
 
+import io
+import math
 import os
+import zlib
+from typing import List, Optional
+
+import pandas as pd
 from fpdf import FPDF
+from PIL import Image
 
 from pydqa4pm.core.report_data import DQAReportData
+from pydqa4pm.reports.store import ReportStore
+from pydqa4pm.utils import constants as C
 
 
 class PDFReportBuilder(FPDF):
@@ -25,8 +34,11 @@ class PDFReportBuilder(FPDF):
     - Event ID analysis with frequency distribution
     - Timestamp format validation results
     
+    Chart images are read from the ReportStore they were rendered to when
+    one is given, so images kept in memory are embedded without any file.
+    
     Example:
-        >>> builder = PDFReportBuilder()
+        >>> builder = PDFReportBuilder(store)
         >>> builder.create(dqa_report_data)
         >>> builder.output("report.pdf", "F")
     """
@@ -34,9 +46,16 @@ class PDFReportBuilder(FPDF):
     # Path to logo relative to package
     LOGO_PATH = "assets/pi.png"
     
-    def __init__(self):
-        """Initialize the PDF report builder."""
+    def __init__(self, store: Optional[ReportStore] = None):
+        """
+        Initialize the PDF report builder.
+        
+        Args:
+            store: ReportStore holding the chart images (optional, images
+                are otherwise read from their file path).
+        """
         super().__init__()
+        self._store = store
         self.WIDTH = 210   # A4 width in mm
         self.HEIGHT = 297  # A4 height in mm
         
@@ -57,6 +76,34 @@ class PDFReportBuilder(FPDF):
         
         return self.LOGO_PATH  # Return default, may fail
 
+    def _stored_image(self, filename: str) -> Optional[bytes]:
+        """Get an image from the store buffers, None if it must be read from its file."""
+        return self._store.getImage(filename) if self._store is not None else None
+
+    def _parsejpg(self, filename):
+        """Read a JPEG image from the store buffers, or from its file."""
+        data = self._stored_image(filename)
+        if data is None:
+            return super()._parsejpg(filename)
+        # JPEG data is embedded as is
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            colspace = {"L": "DeviceGray", "CMYK": "DeviceCMYK"}.get(image.mode, "DeviceRGB")
+        return {'w': width, 'h': height, 'cs': colspace, 'bpc': 8, 'f': 'DCTDecode', 'data': data}
+
+    def _parsepng(self, name):
+        """Read a PNG image from the store buffers, or from its file."""
+        data = self._stored_image(name)
+        if data is None:
+            return super()._parsepng(name)
+        # Decoded pixels are embedded compressed (charts are opaque, alpha is dropped)
+        with Image.open(io.BytesIO(data)) as image:
+            pixels = image.convert("RGB")
+        return {
+            'w': pixels.width, 'h': pixels.height, 'cs': 'DeviceRGB', 'bpc': 8,
+            'f': 'FlateDecode', 'data': zlib.compress(pixels.tobytes())
+        }
+
     def header(self) -> None:
         """Render the page header with logo and title."""
         try:
@@ -149,6 +196,85 @@ class PDFReportBuilder(FPDF):
     def insertImage(self, _title, _filename):
         self.insert_image(_title, _filename)
 
+    def insert_not_computed(self, title: str) -> None:
+        """Insert a report section the assessment mode does not compute."""
+        self.insert_text_and_value(title + ":", C.NOT_COMPUTED)
+
+    @staticmethod
+    def _cell_text(value) -> str:
+        """Format a table value (FPDF core fonts are Latin-1)."""
+        text = "" if pd.isna(value) else str(value)
+        return text.encode("latin-1", "replace").decode("latin-1")
+
+    def _fit_text(self, text: str, width: float) -> str:
+        """Shorten a text with "..." until it fits in a cell width."""
+        if self.get_string_width(text) <= width:
+            return text
+        while text and self.get_string_width(text + "...") > width:
+            text = text[:-1]
+        return text + "..."
+
+    def _column_widths(self, header: List[str], rows: List[List[str]], width: float) -> List[float]:
+        """Width of each column: its longest text, scaled down to the page width if needed."""
+        padding = 2 * C.TABLE_CELL_PADDING
+        self.set_font('Arial', 'B', C.TABLE_FONT_SIZE)
+        natural = [self.get_string_width(text) + padding for text in header]
+        self.set_font('Arial', '', C.TABLE_FONT_SIZE)
+        for row in rows:
+            natural = [max(n, self.get_string_width(text) + padding) for n, text in zip(natural, row)]
+        total = sum(natural)
+        return natural if total <= width else [width * n / total for n in natural]
+
+    def _table_row(self, texts: List[str], widths: List[float], header: bool = False) -> None:
+        """Draw one row of table cells."""
+        self.set_font('Arial', 'B' if header else '', C.TABLE_FONT_SIZE)
+        for text, width in zip(texts, widths):
+            fitted = self._fit_text(text, width - 2 * C.TABLE_CELL_PADDING)
+            self.cell(width, C.TABLE_ROW_HEIGHT, fitted, 1, 0, 'C', header)
+        self.ln(C.TABLE_ROW_HEIGHT)
+
+    def insert_table(self, title: str, data: pd.DataFrame,
+                     max_cols_per_view: int = C.TABLE_MAX_COLS) -> None:
+        """
+        Insert a table drawn with PDF cells, with a title.
+        
+        If the DataFrame has more columns than max_cols_per_view, it is
+        split into several sub-tables. The text of the cells stays
+        selectable and searchable in the PDF.
+        
+        Args:
+            title: Title above the table.
+            data: DataFrame to display.
+            max_cols_per_view: Maximum columns per sub-table.
+        """
+        self.insert_image_title(title)
+        if data is None or data.columns.empty:
+            self.insert_value_text("[Table not available]")
+            self.ln('')
+            return
+        
+        self.set_text_color(0)
+        self.set_fill_color(*C.TABLE_HEADER_COLOR)
+        width = self.WIDTH - 30
+        for start in range(0, len(data.columns), max_cols_per_view):
+            view = data.iloc[:, start:start + max_cols_per_view]
+            header = [self._cell_text(column) for column in view.columns]
+            rows = [[self._cell_text(value) for value in row] for row in view.itertuples(index=False)]
+            widths = self._column_widths(header, rows, width)
+            
+            self._table_row(header, widths, header=True)
+            for row in rows:
+                # Repeat the header on top of a new page
+                if self.get_y() + C.TABLE_ROW_HEIGHT > self.page_break_trigger:
+                    self.add_page()
+                    self._table_row(header, widths, header=True)
+                self._table_row(row, widths)
+            self.ln(C.TABLE_ROW_HEIGHT)
+    
+    # Backward compatibility alias
+    def insertTable(self, title, data, max_cols_per_view=C.TABLE_MAX_COLS):
+        self.insert_table(title, data, max_cols_per_view)
+
     def build_report(self, dqa: DQAReportData) -> None:
         """
         Build the complete report content.
@@ -166,11 +292,45 @@ class PDFReportBuilder(FPDF):
         # Attributes list
         self.insert_head_text("Additional Attributes:")
         self.add_break()
+        levels = dqa.attributesConsistency
+        if not levels.empty:
+            levels = levels.set_index(C.FLD_ATTRIBUTE)
         for attr in dqa.attributes:
-            self.insert_value_text(f"      - {attr}")
+            if attr in levels.index:
+                level = levels.loc[attr, C.FLD_ATTR_LEVEL]
+                violations = levels.loc[attr, C.FLD_ATTR_VIOLATIONS]
+                if level == C.ATTR_LEVEL_CASE:
+                    self.insert_value_text(
+                        f"      - {attr} ({level} level, {violations} inconsistent timelines)"
+                    )
+                else:
+                    self.insert_value_text(f"      - {attr} ({level} level)")
+            else:
+                self.insert_value_text(f"      - {attr}")
             self.add_break()
+        if not dqa.isComputed(C.SECTION_ATTRIBUTES_CONSISTENCY):
+            self.insert_not_computed("Attributes Level")
         self.add_break()
         
+        if not dqa.isComputed(C.SECTION_ATTRIBUTES_PROFILE):
+            self.insert_not_computed("Attributes Profile")
+        elif not dqa.attributesProfile.empty:
+            self.insert_table("Attributes Profile", dqa.attributesProfile,
+                              len(dqa.attributesProfile.columns))
+        
+        # Sampling estimates
+        if dqa.confidenceIntervals:
+            # Confidence level of the normal quantile C.CI_Z
+            level = round(math.erf(C.CI_Z / math.sqrt(2)) * 100, 1)
+            self.insert_text_and_value(
+                "Sample:", f"{round(dqa.sampleRate * 100, 2)}% of the timelines ({level:g}% confidence intervals)"
+            )
+            self.insert_text_and_value("- Missing Keys:", dqa.getConfidenceDisplay(C.METRIC_MISSING))
+            self.insert_text_and_value("- Invalid Timestamps:", dqa.getConfidenceDisplay(C.METRIC_BAD_TIMESTAMPS))
+            self.insert_text_and_value("- Duplicates:", dqa.getConfidenceDisplay(C.METRIC_DUPLICATES))
+            self.insert_text_and_value("- Near Duplicates:", dqa.getConfidenceDisplay(C.METRIC_NEAR_DUPLICATES))
+            self.add_break()
+        
         # Statistics
         self.insert_text_and_value("Number of Columns:", str(dqa.ColCount))
         self.insert_text_and_value("Number of Rows:", str(dqa.RowCount))
@@ -182,24 +342,48 @@ class PDFReportBuilder(FPDF):
         self.insert_text_and_value("- Missing Event ID:", str(dqa.missings[1]))
         self.insert_text_and_value("- Missing Timestamp:", str(dqa.missings[2]))
         self.insert_text_and_value("Duplicate Rows:", str(dqa.duplicates))
+        self.insert_text_and_value(
+            f"Near Duplicate Rows (< {C.NEAR_DUPLICATE_TOLERANCE}s):", str(dqa.nearDuplicates)
+        )
+        self.insert_text_and_value("Flagged Rows (any check):", str(dqa.flaggedRows))
         
         # Sample Data
-        self.insert_image("Sample Data (First 5 Rows)", dqa.tableSampleData)
+        self.insert_table("Sample Data (First 5 Rows)", dqa.firstData)
         
         # Timeline ID Analysis
         self.insert_title("(PFI) TIMELINE ID Analysis")
         self.insert_text_and_value("Distinct Timelines:", str(dqa.distinctPFI))
         self.insert_image("Most Frequent Timeline IDs", dqa.chartPFIValCount)
+        if dqa.getFrequencyErrorDisplay(dqa.PFIMostFreq):
+            self.insert_text_and_value("Frequency Error:", dqa.getFrequencyErrorDisplay(dqa.PFIMostFreq))
         
         # Event ID Analysis
         self.insert_title("(SN) EVENT ID Analysis")
         self.insert_text_and_value("Distinct Events:", str(dqa.distinctSN))
         self.insert_image("Event Frequency Distribution", dqa.chartSNValCount)
-        self.insert_image("Events per Timeline Size", dqa.chartAggSNPerPFISIze)
+        if dqa.getFrequencyErrorDisplay(dqa.SNValues):
+            self.insert_text_and_value("Frequency Error:", dqa.getFrequencyErrorDisplay(dqa.SNValues))
+        if dqa.isComputed(C.SECTION_TIMELINE_SIZES):
+            self.insert_image("Events per Timeline Size", dqa.chartAggSNPerPFISIze)
+        else:
+            self.insert_not_computed("Events per Timeline Size")
         
         # Timestamp Analysis
         self.insert_title("(T) TIMESTAMP Analysis")
-        self.insert_image("Date Format Validation", dqa.chartDatesFormat)
+        self.insert_table("Date Format Validation", dqa.dateFormatsCheck)
+        self.insert_text_and_value("Zero Waiting Times:", str(dqa.zeroWaits))
+        self.insert_text_and_value("Negative Waiting Times:", str(dqa.negativeWaits))
+        if dqa.isComputed(C.SECTION_WAITING_PAIRS):
+            top_pairs = dqa.topWaitingPairs
+            self.insert_table("Waiting Time per Activity Pair (Top Pairs)", top_pairs.round(1),
+                              len(top_pairs.columns))
+            self.insert_image("Median Waiting Time per Activity Pair", dqa.chartWaitingTimes)
+        else:
+            self.insert_not_computed("Waiting Time per Activity Pair")
+        if dqa.isComputed(C.SECTION_ACTIVE_CASES):
+            self.insert_image("Active Timelines over Time", dqa.chartActiveCases)
+        else:
+            self.insert_not_computed("Active Timelines over Time")
     
     # Backward compatibility alias
     def buildReport(self, dqa):
@@ -1,7 +1,8 @@
 """
-Temporary file storage for pyDQA4ProcessMining.
+Temporary chart storage for pyDQA4ProcessMining.
 
-Manages temporary files created during chart generation.
+Manages the chart images created during report generation, either as
+files in a temporary folder or as in-memory buffers.
 """
 
 __author__ = "Benoit CAYLA"
@@ -9,7 +10,7 @@ __email__ = "benoit@datacorner.fr"
 __license__ = "GPL"
 
 import os
-from typing import List
+from typing import Dict, List, Optional
 
 from pydqa4pm.utils import constants as C
 
@@ -63,6 +64,43 @@ class ReportStore:
         self._managed_files.append(full_path)
         return full_path
 
+    @property
+    def inMemory(self) -> bool:
+        """Whether the images are kept in memory instead of files."""
+        return False
+
+    def putImage(self, name: str, data: bytes) -> str:
+        """
+        Store an image rendered to a buffer.
+        
+        Args:
+            name: Image name, as returned by getPath().
+            data: Encoded image.
+        
+        Returns:
+            The name to give to the report builder.
+        """
+        with open(name, "wb") as f:
+            f.write(data)
+        if name not in self._managed_files:
+            self._managed_files.append(name)
+        return name
+
+    def getImage(self, name: str) -> Optional[bytes]:
+        """
+        Get the content of a stored image.
+        
+        Args:
+            name: Image name, as returned by getPath().
+        
+        Returns:
+            The encoded image, or None if it is not in the store.
+        """
+        if name not in self._managed_files or not os.path.isfile(name):
+            return None
+        with open(name, "rb") as f:
+            return f.read()
+
     def isStoreFolderExist(self) -> bool:
         """Check if the temporary folder exists."""
         return os.path.isdir(self._temp_path)
@@ -106,3 +144,63 @@ class ReportStore:
         """Alias for finalize()."""
         self.finalize()
 
+
+
+class MemoryReportStore(ReportStore):
+    """
+    Keeps the chart images in memory buffers.
+    
+    Nothing is written to disk: the charts are rendered to byte buffers
+    and the PDF report builder embeds them directly, so reports can be
+    generated on a read-only file system.
+    
+    Example:
+        >>> store = MemoryReportStore()
+        >>> store.initialize()
+        >>> name = store.putImage(store.getPath("chart.jpg"), data)
+        >>> PDFReportBuilder(store).create(report_data)
+        >>> store.finalize()  # Release the buffers
+    """
+    
+    def __init__(self):
+        """Initialize an empty memory store."""
+        super().__init__()
+        self._images: Dict[str, bytes] = {}
+
+    @property
+    def inMemory(self) -> bool:
+        """Whether the images are kept in memory instead of files."""
+        return True
+
+    def getPath(self, filename: str) -> str:
+        """
+        Get the name of an image in the store.
+        
+        Args:
+            filename: The image filename.
+        
+        Returns:
+            The name of the image (no file is created).
+        """
+        return filename
+
+    def putImage(self, name: str, data: bytes) -> str:
+        """Store an image rendered to a buffer, return its name."""
+        self._images[name] = data
+        return name
+
+    def getImage(self, name: str) -> Optional[bytes]:
+        """Get the content of a stored image, None if it is not in the store."""
+        return self._images.get(name)
+
+    def isStoreFolderExist(self) -> bool:
+        """A memory store has no folder."""
+        return False
+
+    def initialize(self) -> bool:
+        """Nothing to prepare for a memory store."""
+        return True
+
+    def finalize(self) -> None:
+        """Release the image buffers."""
+        self._images.clear()
@@ -5,11 +5,13 @@ This package contains:
 - constants: Application constants and configuration
 - logger: Logging utilities
 - events: Event list management and cleansing
+- sketches: Probabilistic sketches for approximate profiling
 """
 
 from pydqa4pm.utils.logger import Logger
 from pydqa4pm.utils import constants
 from pydqa4pm.utils.events import SNList
+from pydqa4pm.utils.sketches import HyperLogLog, SpaceSaving
 
-__all__ = ["Logger", "constants", "SNList"]
+__all__ = ["Logger", "constants", "SNList", "HyperLogLog", "SpaceSaving"]
 
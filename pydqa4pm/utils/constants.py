@@ -23,6 +23,101 @@ TRACE_FILENAME = "pydqa4pm.log"
 # Display Limits
 # =============================================================================
 LIMIT_BARH_DISPLAY = 30  # Maximum number of bars to display in charts
+LIMIT_PAIRS_DISPLAY = 15  # Maximum number of activity pairs to display
+ACTIVE_CASES_BUCKETS = 100  # Number of time buckets for the active timelines chart
+
+# =============================================================================
+# Approximate (Streaming) Mode
+# =============================================================================
+CHUNK_SIZE = 500000        # Number of rows read per chunk in streaming mode
+HLL_ERROR = 0.01           # Target relative error of approximate distinct counts
+TOPK_CAPACITY = 1000       # Counters kept by the streaming top-k summaries
+
+# =============================================================================
+# Sampling Mode
+# =============================================================================
+CI_Z = 1.96                # Normal quantile of the confidence intervals (95%)
+METRIC_MISSING = "missing"             # Rows with a missing key
+METRIC_BAD_TIMESTAMPS = "bad_timestamps"  # Rows with an unparsable timestamp
+METRIC_DUPLICATES = "duplicates"       # Duplicate rows
+METRIC_NEAR_DUPLICATES = "near_duplicates"  # Near-duplicate rows
+
+# =============================================================================
+# Report Sections Not Computed (approximate, sharded and incremental modes)
+# =============================================================================
+NOT_COMPUTED = "not computed"                       # Report text of a section not computed
+SECTION_NEAR_DUPLICATES = "nearDuplicates"          # Near-duplicate row count
+SECTION_FLAGGED_ROWS = "flaggedRows"                # Rows with at least one quality flag
+SECTION_WAITING_PAIRS = "waitingPairs"              # Waiting time quantiles per activity pair
+SECTION_ORDER_WAITS = "orderWaits"                  # Zero and negative (out-of-order) waiting times
+SECTION_ACTIVE_CASES = "activeCases"                # Open timelines over time
+SECTION_TIMELINE_SIZES = "timelineSizes"            # Timeline size distribution
+SECTION_ATTRIBUTES_PROFILE = "attributesProfile"    # Type, null rate and top values per attribute
+SECTION_ATTRIBUTES_CONSISTENCY = "attributesConsistency"  # Case / event level per attribute
+
+# =============================================================================
+# Sharded and Incremental Logs (mergeable profile states)
+# =============================================================================
+PROFILE_STATE_VERSION = 2  # Serialization format of the profile states
+CHECKPOINT_VERSION = 3     # Serialization format of the incremental checkpoints
+SHARD_MAX_WORKERS = None   # Worker processes profiling the shards (None = CPU count)
+CHECKPOINT_SIGNATURE_BYTES = 65536  # Bytes hashed to check a checkpointed file was only appended
+
+# =============================================================================
+# Chart Rendering
+# =============================================================================
+CHART_MAX_WORKERS = None   # Worker processes rendering the charts (None = CPU count, 1 = no pool)
+CHART_POOL_MIN_TASKS = 4   # Fewer charts are rendered in the current process (pool start-up not repaid)
+QUALITY_DRAFT = "draft"        # Low resolution JPEG, fastest and smallest report
+QUALITY_STANDARD = "standard"  # Medium resolution JPEG
+QUALITY_PRINT = "print"        # High resolution lossless PNG
+QUALITY_PROFILES = {           # Image settings of each quality profile
+    QUALITY_DRAFT:    {"dpi": 72,  "format": "jpg", "jpeg_quality": 60},
+    QUALITY_STANDARD: {"dpi": 150, "format": "jpg", "jpeg_quality": 85},
+    QUALITY_PRINT:    {"dpi": 300, "format": "png", "jpeg_quality": None}
+}
+DEFAULT_QUALITY = QUALITY_STANDARD
+CHART_BACKEND_MATPLOTLIB = "matplotlib"  # Charts drawn with Matplotlib only (faster)
+CHART_BACKEND_SEABORN = "seaborn"        # Charts drawn with Seaborn (same look)
+CHART_BACKENDS = [CHART_BACKEND_MATPLOTLIB, CHART_BACKEND_SEABORN]
+DEFAULT_CHART_BACKEND = CHART_BACKEND_MATPLOTLIB
+SCATTER_MAX_POINTS = 5000  # Above, scatter charts are drawn as binned density charts
+DENSITY_BINS = 50          # Bins per axis of the density charts
+
+# =============================================================================
+# Report Tables
+# =============================================================================
+TABLE_MAX_COLS = 5                     # Columns per sub-table before a wide table is split
+TABLE_FONT_SIZE = 7                    # Font size of the table cells (pt)
+TABLE_ROW_HEIGHT = 5                   # Height of the table rows (mm)
+TABLE_CELL_PADDING = 1                 # Left and right padding of the cell texts (mm)
+TABLE_HEADER_COLOR = (152, 251, 152)   # Header background (palegreen)
+
+# =============================================================================
+# Result Cache
+# =============================================================================
+CACHE_FOLDER = "~/.cache/pydqa4pm"        # Default cache folder
+CACHE_MAX_BYTES = 256 * 1024 * 1024       # Maximum cache size on disk (LRU eviction)
+CACHE_HASH_BLOCK = 1024 * 1024            # Read size when hashing the input file
+CACHE_FASTPATH_MAX = 1000                 # Content hashes remembered by the result cache
+CACHE_SCHEMA_VERSION = 3                  # Bump when DQAReportData or the entry layout changes
+CHART_CACHE_FOLDER = "~/.cache/pydqa4pm-charts"   # Default chart image cache folder
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024          # Maximum chart cache size on disk (LRU eviction)
+
+# =============================================================================
+# Duplicate Analysis
+# =============================================================================
+NEAR_DUPLICATE_TOLERANCE = 5  # Max gap (seconds) between two near-duplicate events
+
+# =============================================================================
+# Attribute Analysis
+# =============================================================================
+CASE_ATTRIBUTE_RATIO = 0.95  # Min share of constant timelines for a case-level attribute
+ATTR_COLUMNS_PER_TASK = 8    # Number of attribute columns processed per worker task
+ATTR_MAX_WORKERS = None      # Worker threads for attribute checks (None = default)
+ATTR_TOP_VALUES = 3          # Number of most frequent values shown per attribute
+ATTR_LEVEL_CASE = "Case"     # Attribute constant within a timeline
+ATTR_LEVEL_EVENT = "Event"   # Attribute varying within a timeline
 
 # =============================================================================
 # DataFrame Column Names
@@ -30,16 +125,59 @@ LIMIT_BARH_DISPLAY = 30  # Maximum number of bars to display in charts
 FLD_COL_VALUECOUNT = "Column"       # Column name for values
 FLD_NEW_SN = "New Event"            # Column name for cleansed event names
 FLD_FREQ_VALUECOUNT = "Frequency"   # Column name for frequency counts
+FLD_FREQ_ERROR = "Max Error"        # Column name for approximate frequency error
+FLD_MULTIPLICITY = "Multiplicity"   # Column name for duplicate group sizes
 FLD_PFI_NB = "Nb Of Timeline"       # Column name for timeline count
 FLD_SN_NB = "Nb Of events"          # Column name for event count
 REJECT_COL_NAME = "REJECT"          # Column name for reject reasons
+REJECT_KEY_REASONS = [              # Reject reasons for missing PFI, SN, T
+    "Timeline ID is Empty",
+    "Event ID is Empty",
+    "Timestamp is Empty"
+]
+FLD_SN_PREV = "From Event"          # Column name for the preceding event
+FLD_SN_NEXT = "To Event"            # Column name for the following event
+FLD_TRANSITION = "Transition"       # Column name for "From -> To" labels
+FLD_WAIT_COUNT = "Count"            # Column name for transition counts
+FLD_WAIT_MIN = "Min (s)"            # Column name for minimum waiting time
+FLD_WAIT_P25 = "P25 (s)"            # Column name for 1st quartile waiting time
+FLD_WAIT_MEDIAN = "Median (s)"      # Column name for median waiting time
+FLD_WAIT_P75 = "P75 (s)"            # Column name for 3rd quartile waiting time
+FLD_WAIT_MAX = "Max (s)"            # Column name for maximum waiting time
+FLD_WAIT_ZERO = "Zero"              # Column name for zero waiting times
+FLD_WAIT_NEGATIVE = "Negative"      # Column name for negative waiting times
+FLD_TIME = "Time"                   # Column name for time buckets
+FLD_ACTIVE_CASES = "Active Timelines"  # Column name for open timelines count
+FLD_ATTRIBUTE = "Attribute"         # Column name for attribute names
+FLD_ATTR_LEVEL = "Level"            # Column name for attribute level (Case/Event)
+FLD_ATTR_VIOLATIONS = "Inconsistent Timelines"  # Column name for inconsistent timelines
+FLD_ATTR_TYPE = "Type"              # Column name for inferred attribute type
+FLD_ATTR_NULL_RATE = "Null (%)"     # Column name for attribute null rate
+FLD_ATTR_DISTINCT = "Distinct"      # Column name for attribute cardinality
+FLD_ATTR_TOP_VALUES = "Top Values"  # Column name for most frequent attribute values
+
+# =============================================================================
+# Per-Row Quality Flags (bitmask)
+# =============================================================================
+FLAG_NULL_KEY = 1           # One of the three keys is missing
+FLAG_BAD_TIMESTAMP = 2      # Timestamp matches none of the supported formats
+FLAG_DUPLICATE = 4          # Same (PFI, SN, T) as a previous row
+FLAG_OUT_OF_ORDER = 8       # Earlier than the previous event of its timeline
+FLAG_NEAR_DUPLICATE = 16    # Same PFI and SN as an event a few seconds before
+FLD_QUALITY_FLAGS = "DQA_FLAGS"  # Column name for the flags in the flagged export
+EXPORT_FLAGGED = "flagged"  # Export every row with its quality flags
+EXPORT_CLEAN = "clean"      # Export only the rows without any flag
 
 # =============================================================================
 # File and Path Constants
 # =============================================================================
 NO_FILE_CREATED = "NO FILE CREATED"     # Indicates chart creation failed
 NO_CHART_FILE = "default.jpg"           # Default image when chart fails
-DEFAULT_STORE_FOLDER = "temp-pydqa4pm/" # Temporary storage folder
+DEFAULT_STORE_FOLDER = "temp-pydqa4pm/" # Temporary storage folder (disk store)
+STORE_MEMORY = "memory"                 # Chart images kept in memory buffers
+STORE_DISK = "disk"                     # Chart images written to the store folder
+FORMAT_PDF = "pdf"                      # Output: PDF report with charts
+FORMAT_JSON = "json"                    # Output: metrics only, no charts and no PDF
 DEFAULT_REPORT_FILE = "dqa-report"      # Default report name
 
 # =============================================================================
@@ -49,15 +187,27 @@ SUFFIX_3KEYS_REJECT = "-3keys.rejects"  # Reject file for key validation errors
 SUFFIX_REPORT = "-report.pdf"           # PDF report suffix
 SUFFIX_READ_REJ = "-read.rejects"       # Reject file for read errors
 SUFFIX_EVENTS = "-events.csv"           # Events list file suffix
+SUFFIX_NEAR_DUP_REJECT = "-nearduplicates.rejects"  # Reject file for near-duplicate events
+SUFFIX_DUPLICATES = "-duplicates.csv"   # Duplicate groups file suffix
+SUFFIX_FLAGGED = "-flagged.csv"         # Dataset with per-row quality flags
+SUFFIX_CLEAN = "-clean.csv"             # Dataset without flagged rows
+SUFFIX_MERGED_REPORT = "-merged-report.pdf"  # PDF report of a sharded log
+SUFFIX_METRICS = "-metrics.json"        # JSON metrics (FORMAT_JSON)
+SUFFIX_MERGED_METRICS = "-merged-metrics.json"  # JSON metrics of a sharded log
+SUFFIX_CHECKPOINT = "-checkpoint.json"  # Incremental assessment checkpoint
+CACHED_SUFFIXES = [                     # Supplementary files restored from the result cache
+    SUFFIX_READ_REJ, SUFFIX_3KEYS_REJECT, SUFFIX_DUPLICATES,
+    SUFFIX_NEAR_DUP_REJECT, SUFFIX_EVENTS
+]
 
 # =============================================================================
 # Temporary File Names
 # =============================================================================
-FILE_FORMAT_TABLE = "temp-fmt-table.jpg"
-FILE_SAMPLES_TABLE = "temp-sample-table.jpg"
 FILE_PFI_CHART = "temp-pfi-chart.jpg"
 FILE_SNMOSTFQ_CHART = "temp-sn-mostfq-chart.jpg"
 FILE_COUNTPFIEVTS_CHART = "temp-cnt-pfisn-chart.jpg"
+FILE_WAITING_CHART = "temp-waiting-chart.jpg"
+FILE_ACTIVE_CASES_CHART = "temp-active-cases-chart.jpg"
 
 # =============================================================================
 # Supported Timestamp Formats
@@ -0,0 +1,351 @@
+"""
+Probabilistic sketches for pyDQA4ProcessMining.
+
+Provides mergeable, fixed-memory summaries used to profile logs too large
+to be counted exactly.
+"""
+
+__author__ = "Benoit CAYLA"
+__email__ = "benoit@datacorner.fr"
+__license__ = "GPL"
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from pydqa4pm.utils import constants as C
+
+
+def key_text(values: pd.Series) -> pd.Series:
+    """
+    Get the text form of key values, the same whatever the type pandas inferred.
+
+    A column of integers is read as floats when it has a missing value in
+    one file or chunk and as integers in another; both give the same text
+    here (integral floats are written as integers), so the same key always
+    gets the same hash.
+
+    Args:
+        values: Key values as read by pandas.
+
+    Returns:
+        Series of strings.
+    """
+    if pd.api.types.is_float_dtype(values):
+        numbers = values.to_numpy(dtype=np.float64)
+        integral = np.isfinite(numbers) & (numbers == np.floor(numbers))
+        integral &= np.abs(numbers) < 2 ** 63
+        text = values.astype(str).to_numpy(dtype=object)
+        text[integral] = numbers[integral].astype(np.int64).astype(str)
+        text[np.isnan(numbers)] = "<NA>"
+        return pd.Series(text, index=values.index, dtype=str)
+    return values.astype(str)
+
+
+def key_values(texts) -> pd.Index:
+    """
+    Convert key texts back to integers when they all are integers.
+
+    Reverses key_text() for display: the integer IDs of a log are shown
+    as numbers, as they are in an exact run. Texts that do not all read
+    back the same as integers (e.g. "007" or "C1") are kept as strings.
+
+    Args:
+        texts: Key values as built by key_text().
+
+    Returns:
+        Index of int64 values, or of the texts unchanged.
+    """
+    texts = pd.Index(texts, dtype=object)
+    numbers = pd.to_numeric(texts, errors='coerce')
+    if len(texts) == 0 or numbers.isna().any() or (numbers != np.floor(numbers)).any():
+        return texts
+    integers = numbers.astype('int64')
+    if not (integers.astype(str) == texts).all():
+        return texts
+    return integers
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    Hash a sequence of values into 64-bit integers.
+
+    Args:
+        values: Series, array or list of values.
+
+    Returns:
+        Array of uint64 hashes (equal values give equal hashes).
+    """
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash each row of a DataFrame into one 64-bit integer.
+
+    Args:
+        df: DataFrame whose columns are combined in the hash.
+
+    Returns:
+        Array of uint64 hashes (rows with equal values give equal hashes).
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _leading_zeros(words: np.ndarray) -> np.ndarray:
+    """Count the leading zero bits of 64-bit unsigned integers."""
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+
+    # 32-bit halves are exactly representable, so log2 is exact here
+    with np.errstate(divide='ignore'):
+        clz_high = 31 - np.floor(np.log2(high))
+        clz_low = 63 - np.floor(np.log2(low))
+    result = np.where(high > 0, clz_high, np.where(low > 0, clz_low, 64))
+    return result.astype(np.int64)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch for approximate distinct counts.
+
+    Memory is fixed (2^precision one-byte registers) whatever the number
+    of values added. Sketches built on separate chunks can be merged, and
+    the estimate of the merge equals the estimate of the whole stream.
+
+    Attributes:
+        precision: Number of index bits (registers = 2^precision).
+        relativeError: Standard error of the estimate (1.04 / sqrt(registers)).
+
+    Example:
+        >>> hll = HyperLogLog(error=0.01)
+        >>> for chunk in chunks:
+        ...     hll.update(chunk["case_id"])
+        >>> print(hll.count(), hll.relativeError)
+    """
+
+    MIN_PRECISION = 4
+    MAX_PRECISION = 18
+
+    def __init__(self, error: float = 0.01, precision: int = None):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            error: Target relative standard error, used to size the sketch.
+            precision: Number of index bits; overrides error when given.
+        """
+        if precision is None:
+            precision = math.ceil(math.log2((1.04 / error) ** 2))
+        self._precision = min(max(precision, self.MIN_PRECISION), self.MAX_PRECISION)
+        self._registers = np.zeros(1 << self._precision, dtype=np.uint8)
+
+    @property
+    def precision(self) -> int:
+        """Number of index bits."""
+        return self._precision
+
+    @property
+    def relativeError(self) -> float:
+        """Standard relative error of the estimate."""
+        return 1.04 / math.sqrt(len(self._registers))
+
+    def update(self, values) -> None:
+        """
+        Add values to the sketch (null values are ignored).
+
+        Args:
+            values: Series, array or list of values.
+        """
+        series = pd.Series(values)
+        series = series[series.notna()]
+        if series.empty:
+            return
+        self.update_hashes(hash_values(series))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Add pre-computed 64-bit hashes to the sketch.
+
+        Args:
+            hashes: Array of uint64 hashes.
+        """
+        p = np.uint64(self._precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes << p
+        rank = np.minimum(_leading_zeros(rest) + 1, 64 - self._precision + 1)
+        np.maximum.at(self._registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other: Sketch with the same precision.
+
+        Returns:
+            This sketch, updated.
+        """
+        if other.precision != self._precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+        np.maximum(self._registers, other._registers, out=self._registers)
+        return self
+
+    def count(self) -> int:
+        """
+        Estimate the number of distinct values added.
+
+        Returns:
+            The estimated distinct count.
+        """
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self._registers.astype(np.int64)))
+
+        # Small range correction (linear counting)
+        zeros = int(np.count_nonzero(self._registers == 0))
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> dict:
+        """Serialize the sketch to a JSON-compatible dictionary."""
+        return {"precision": self._precision, "registers": self._registers.tobytes().hex()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        """Rebuild a sketch serialized with to_dict()."""
+        sketch = cls(precision=data["precision"])
+        sketch._registers = np.frombuffer(bytes.fromhex(data["registers"]), dtype=np.uint8).copy()
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary for streaming heavy hitters (top-k values).
+
+    At most `capacity` counters are kept. Each chunk is counted exactly and
+    merged into the summary; values not monitored by the summary are
+    assumed to have occurred as often as its smallest counter. Every
+    reported frequency overestimates the true one by at most its error,
+    itself bounded by total / capacity.
+
+    Attributes:
+        capacity: Maximum number of monitored values.
+        total: Number of values added.
+
+    Example:
+        >>> top = SpaceSaving(capacity=1000)
+        >>> for chunk in chunks:
+        ...     top.update(chunk["activity"])
+        >>> print(top.topk(30))
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize an empty summary.
+
+        Args:
+            capacity: Maximum number of monitored values.
+        """
+        self._capacity = capacity
+        self._counts = pd.Series(dtype='int64')
+        self._errors = pd.Series(dtype='int64')
+        self._total = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of monitored values."""
+        return self._capacity
+
+    @property
+    def total(self) -> int:
+        """Number of values added."""
+        return self._total
+
+    @property
+    def maxError(self) -> int:
+        """Upper bound of the overestimate of any reported frequency."""
+        if len(self._counts) < self._capacity:
+            return 0
+        return int(self._counts.min())
+
+    def update(self, values) -> None:
+        """
+        Add values to the summary (null values are ignored).
+
+        Args:
+            values: Series, array or list of values.
+        """
+        counts = pd.Series(values).value_counts()
+        errors = pd.Series(0, index=counts.index, dtype='int64')
+        self._merge_counts(counts, errors, 0, int(counts.sum()))
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Merge another summary into this one.
+
+        Args:
+            other: Summary built on another part of the stream.
+
+        Returns:
+            This summary, updated.
+        """
+        self._merge_counts(other._counts, other._errors, other.maxError, other.total)
+        return self
+
+    def _merge_counts(self, counts: pd.Series, errors: pd.Series, floor: int, total: int) -> None:
+        """Merge counters, each side filling its missing values with its floor."""
+        own_floor = self.maxError
+        index = self._counts.index.union(counts.index)
+        merged_counts = (
+            self._counts.reindex(index, fill_value=own_floor)
+            + counts.reindex(index, fill_value=floor)
+        )
+        merged_errors = (
+            self._errors.reindex(index, fill_value=own_floor)
+            + errors.reindex(index, fill_value=floor)
+        )
+        self._total += total
+        keep = merged_counts.sort_values(ascending=False, kind='stable').index[:self._capacity]
+        self._counts = merged_counts[keep].astype('int64')
+        self._errors = merged_errors[keep].astype('int64')
+
+    def topk(self, k: int) -> pd.DataFrame:
+        """
+        Get the k most frequent values.
+
+        Args:
+            k: Number of values to return.
+
+        Returns:
+            DataFrame with the value, its estimated frequency and its maximum
+            overestimate, sorted by decreasing frequency.
+        """
+        counts = self._counts.head(k)
+        return pd.DataFrame({
+            C.FLD_COL_VALUECOUNT: counts.index,
+            C.FLD_FREQ_VALUECOUNT: counts.values,
+            C.FLD_FREQ_ERROR: self._errors[counts.index].values
+        })
+
+    def to_dict(self) -> dict:
+        """Serialize the summary to a JSON-compatible dictionary (values as strings)."""
+        return {
+            "capacity": self._capacity,
+            "total": self._total,
+            "values": [str(value) for value in self._counts.index],
+            "counts": self._counts.astype('int64').tolist(),
+            "errors": self._errors.astype('int64').tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpaceSaving":
+        """Rebuild a summary serialized with to_dict()."""
+        summary = cls(data["capacity"])
+        index = pd.Index(data["values"], dtype=object)
+        summary._counts = pd.Series(data["counts"], index=index, dtype='int64')
+        summary._errors = pd.Series(data["errors"], index=index, dtype='int64')
+        summary._total = data["total"]
+        return summary
@@ -49,6 +49,7 @@ setup(
         'matplotlib>=3.6.0',
         'seaborn>=0.12.0',
         'fpdf>=1.7.2',
+        'Pillow>=8.0.0',
     ],
     
     extras_require={
@@ -0,0 +1,136 @@
+"""
+Tests for pydqa4pm.reports.cache module.
+"""
+
+import os
+import shutil
+import pytest
+from pydqa4pm.core.dqa import Dqa4PM
+from pydqa4pm.core.report_data import DQAReportData
+from pydqa4pm.reports.cache import ResultCache
+from pydqa4pm.reports.store import ReportStore
+from pydqa4pm.utils.logger import Logger
+from pydqa4pm.utils import constants as C
+
+
+KEYS = ("case_id", "activity", "timestamp")
+
+
+class TestResultCache:
+    """Test suite for ResultCache."""
+
+    @pytest.fixture
+    def csv_path(self, temp_csv_file, temp_dir):
+        path = os.path.join(temp_dir, "log.csv")
+        shutil.copy(temp_csv_file, path)
+        return path
+
+    def test_key_depends_on_content_and_settings(self, csv_path, temp_dir, monkeypatch):
+        """Test the key changes with the content and the settings only."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        key = cache.key(csv_path, ",", *KEYS)
+        copy_path = os.path.join(temp_dir, "copy.csv")
+        shutil.copy(csv_path, copy_path)
+
+        assert cache.key(copy_path, ",", *KEYS) == key
+        assert cache.key(csv_path, ";", *KEYS) != key
+        assert cache.key(csv_path, ",", *KEYS, approximate=True) != key
+        monkeypatch.setattr(C, "CACHE_SCHEMA_VERSION", C.CACHE_SCHEMA_VERSION + 1)
+        assert cache.key(csv_path, ",", *KEYS) != key
+        monkeypatch.undo()
+
+        with open(copy_path, "a") as f:
+            f.write("C9,Start,2023-01-20 09:00:00\n")
+        assert cache.key(copy_path, ",", *KEYS) != key
+
+    def test_put_and_get(self, temp_dir):
+        """Test a stored result comes back with its charts and files."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        store = ReportStore(os.path.join(temp_dir, "store"))
+        store.initialize()
+        dqa = DQAReportData("log.csv", *KEYS)
+        dqa.RowCount = 42
+        dqa.chartPFIValCount = store.getPath(C.FILE_PFI_CHART)
+        with open(dqa.chartPFIValCount, "wb") as f:
+            f.write(b"png")
+        base = os.path.join(temp_dir, "log")
+        with open(base + C.SUFFIX_EVENTS, "w") as f:
+            f.write("events")
+
+        cache.put("k", dqa, store, base, [C.SUFFIX_EVENTS, C.SUFFIX_DUPLICATES])
+        store.finalize()
+        cached, outputs = cache.get("k")
+
+        assert cached.RowCount == 42
+        with open(cached.chartPFIValCount, "rb") as f:
+            assert f.read() == b"png"
+        assert list(outputs) == [C.SUFFIX_EVENTS]
+        assert cache.get("missing") is None
+
+    def test_unreadable_entry_is_a_miss(self, temp_dir, monkeypatch):
+        """Test entries of another schema or with a broken pickle are not read."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        store = ReportStore(os.path.join(temp_dir, "store"))
+        cache.put("old", DQAReportData("log.csv", *KEYS), store)
+        cache.put("broken", DQAReportData("log.csv", *KEYS), store)
+        with open(os.path.join(cache.path, "broken", "report_data.pkl"), "wb") as f:
+            f.write(b"not a pickle")
+
+        assert cache.get("broken") is None
+        assert cache.get("old") is not None
+        monkeypatch.setattr(C, "CACHE_SCHEMA_VERSION", C.CACHE_SCHEMA_VERSION + 1)
+        assert cache.get("old") is None
+
+    def test_lru_eviction(self, temp_dir):
+        """Test the least recently used entries are evicted first."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        store = ReportStore(os.path.join(temp_dir, "store"))
+        dqa = DQAReportData("log.csv", *KEYS)
+        for age, key in enumerate(("a", "b", "c")):
+            cache.put(key, dqa, store)
+            os.utime(os.path.join(cache.path, key), (age + 1, age + 1))
+        cache.get("a")
+
+        entry_size = sum(
+            os.path.getsize(os.path.join(cache.path, "c", name))
+            for name in os.listdir(os.path.join(cache.path, "c"))
+            if os.path.isfile(os.path.join(cache.path, "c", name))
+        )
+        cache._max_bytes = 2 * entry_size
+        assert cache.evict() == 1
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_fastpath_is_pruned(self, csv_path, temp_dir, monkeypatch):
+        """Test the hashes of changed, deleted or old files are dropped on eviction."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        paths = []
+        for i in range(3):
+            path = os.path.join(temp_dir, f"copy{i}.csv")
+            shutil.copy(csv_path, path)
+            cache.contentHash(path)
+            paths.append(os.path.abspath(path))
+        os.remove(paths[0])
+        with open(paths[1], "a") as f:
+            f.write("C9,Start,2023-01-20 09:00:00\n")
+        cache.contentHash(csv_path)
+
+        monkeypatch.setattr(C, "CACHE_FASTPATH_MAX", 1)
+        cache.evict()
+        assert list(cache._load_fastpath()) == [os.path.abspath(csv_path)]
+        assert [name for name in os.listdir(cache.path) if name.startswith(".")] == []
+
+    def test_process_uses_cache(self, csv_path, temp_dir):
+        """Test a second run on an unchanged file rebuilds the outputs from the cache."""
+        dqa = Dqa4PM(Logger("test"), cache=os.path.join(temp_dir, "cache"))
+        dqa.process(csv_path, ",", *KEYS)
+        report = os.path.join(temp_dir, "log" + C.SUFFIX_REPORT)
+        events = os.path.join(temp_dir, "log" + C.SUFFIX_EVENTS)
+        os.remove(report)
+        os.remove(events)
+
+        dqa.open_dataset = None  # The dataset must not be read again
+        dqa.process(csv_path, ",", *KEYS)
+        assert os.path.exists(report)
+        assert os.path.exists(events)
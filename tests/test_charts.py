@@ -0,0 +1,238 @@
+"""
+Tests for pydqa4pm.charts module.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import io
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+from PIL import Image, ImageChops, ImageStat
+
+from pydqa4pm.charts.base import Chart
+from pydqa4pm.charts.cache import ChartCache
+from pydqa4pm.charts.matplotlib_chart import MatplotlibChart
+from pydqa4pm.charts.seaborn_chart import SeabornChart
+from pydqa4pm.utils import constants as C
+
+
+@pytest.fixture
+def chart_data():
+    """Small category / value frame."""
+    return pd.DataFrame({
+        "label": ["A", "B", "C", "D"],
+        "value": [10, 25, 5, 40]
+    })
+
+
+def _render_all(folder, data, prefix):
+    """Render every chart type once, return the created files."""
+    seaborn = SeabornChart(8, 4)
+    matplotlib_chart = MatplotlibChart(8, 4)
+    return [
+        seaborn.CreateBarH(os.path.join(folder, f"{prefix}-sbh.png"), data, "label", "value"),
+        seaborn.CreateBarV(os.path.join(folder, f"{prefix}-sbv.png"), data, "label", "value"),
+        seaborn.CreateLine(os.path.join(folder, f"{prefix}-sl.png"), data, "label", "value"),
+        seaborn.CreateScatter(os.path.join(folder, f"{prefix}-ss.png"), data, "label", "value"),
+        matplotlib_chart.CreateBarH(os.path.join(folder, f"{prefix}-mbh.png"), data, "label", "value"),
+        matplotlib_chart.CreateBarV(os.path.join(folder, f"{prefix}-mbv.png"), data, "label", "value"),
+        matplotlib_chart.CreateLine(os.path.join(folder, f"{prefix}-ml.png"), data, "label", "value"),
+        matplotlib_chart.CreateScatter(os.path.join(folder, f"{prefix}-ms.png"), data, "label", "value"),
+        Chart(8, 4).CreateTable(os.path.join(folder, f"{prefix}-t.jpg"), data)
+    ]
+
+
+class TestCharts:
+    """Test suite for the chart classes."""
+
+    def test_charts_created(self, chart_data, temp_dir):
+        """Test every chart type writes its image."""
+        for path in _render_all(temp_dir, chart_data, "c"):
+            assert path != C.NO_FILE_CREATED
+            assert os.path.getsize(path) > 0
+
+    def test_no_global_state(self, chart_data, temp_dir):
+        """Test charts neither register pyplot figures nor change rcParams."""
+        plt.close("all")
+        before = dict(matplotlib.rcParams)
+
+        _render_all(temp_dir, chart_data, "g")
+
+        assert plt.get_fignums() == []
+        assert dict(matplotlib.rcParams) == before
+
+    def test_concurrent_rendering(self, chart_data, temp_dir):
+        """Test charts can be rendered in several threads at once."""
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda i: _render_all(temp_dir, chart_data, f"t{i}"), range(8)
+            ))
+
+        for paths in results:
+            for path in paths:
+                assert path != C.NO_FILE_CREATED
+                assert os.path.getsize(path) > 0
+
+    def test_table_split(self, temp_dir):
+        """Test a wide table is split into several sub-tables."""
+        data = pd.DataFrame({f"col{i}": [i, i * 2] for i in range(12)})
+        path = os.path.join(temp_dir, "wide.jpg")
+
+        assert Chart(10, 2).CreateTable(path, data, max_cols_per_view=5) == path
+        assert os.path.exists(path)
+
+    @pytest.mark.parametrize("method", ["CreateBarH", "CreateBarV", "CreateLine", "CreateScatter"])
+    def test_backend_parity(self, method):
+        """Test both chart backends draw the same image."""
+        data = pd.DataFrame({
+            "label": [100000, 100001, 100005, 100003],
+            "value": [30, 22, 10, 4]
+        })
+        images = []
+        for chart_class in (SeabornChart, MatplotlibChart):
+            buffer = io.BytesIO()
+            chart = chart_class(8, 4, quality=C.QUALITY_PRINT)
+            getattr(chart, method)(buffer, data, "label", "value", "Label", "Value")
+            buffer.seek(0)
+            images.append(Image.open(buffer).convert("L"))
+        
+        assert images[0].size == images[1].size
+        assert ImageStat.Stat(ImageChops.difference(*images)).mean[0] < 1
+    
+    def test_quality_profiles(self, chart_data):
+        """Test the quality profiles set the image format and resolution."""
+        sizes = {}
+        for quality in C.QUALITY_PROFILES:
+            buffer = io.BytesIO()
+            chart = SeabornChart(8, 4, quality=quality)
+            assert chart.CreateBarV(buffer, chart_data, "label", "value") is buffer
+            sizes[quality] = len(buffer.getvalue())
+            if chart.imageFormat == "png":
+                assert buffer.getvalue()[:4] == b"\x89PNG"
+            else:
+                assert buffer.getvalue()[:2] == b"\xff\xd8"
+        
+        assert sizes[C.QUALITY_DRAFT] < sizes[C.QUALITY_STANDARD] < sizes[C.QUALITY_PRINT]
+
+    def test_unknown_quality(self):
+        """Test an unknown quality profile is rejected."""
+        with pytest.raises(ValueError):
+            Chart(8, 4, quality="poster")
+
+    def test_density_chart(self, temp_dir):
+        """Test a density chart is drawn from binned points, missing values ignored."""
+        data = pd.DataFrame({
+            "x": [1.0, 2.0, 2.0, None, 5.0] * 1000,
+            "y": [3.0, 1.0, 1.0, 4.0, None] * 1000
+        })
+        path = os.path.join(temp_dir, "density.png")
+
+        assert Chart(8, 4).CreateDensity(path, data, "x", "y", bins=10) == path
+        assert os.path.getsize(path) > 0
+
+    def test_scatter_switches_to_density(self, temp_dir, monkeypatch):
+        """Test large scatter inputs are drawn as density charts."""
+        monkeypatch.setattr(C, "SCATTER_MAX_POINTS", 10)
+        calls = []
+        monkeypatch.setattr(SeabornChart, "CreateDensity",
+                            lambda self, filename, *args: calls.append(filename) or filename)
+        small = pd.DataFrame({"x": range(10), "y": range(10)})
+        large = pd.DataFrame({"x": range(11), "y": range(11)})
+
+        SeabornChart(8, 4).CreateScatter(os.path.join(temp_dir, "small.png"), small, "x", "y")
+        SeabornChart(8, 4).CreateScatter(os.path.join(temp_dir, "large.png"), large, "x", "y")
+
+        assert calls == [os.path.join(temp_dir, "large.png")]
+
+
+class TestChartCache:
+    """Test suite for ChartCache."""
+
+    def test_key_depends_on_data_and_settings(self, chart_data, temp_dir):
+        """Test the key changes with the data and the settings only."""
+        cache = ChartCache(os.path.join(temp_dir, "charts"))
+        key = cache.key(chart_data, chart="MatplotlibChart", size=[8, 4])
+
+        assert cache.key(chart_data.copy(), chart="MatplotlibChart", size=[8, 4]) == key
+        assert cache.key(chart_data, chart="MatplotlibChart", size=[10, 4]) != key
+        assert cache.key(chart_data, chart="SeabornChart", size=[8, 4]) != key
+        changed = chart_data.copy()
+        changed.loc[0, "value"] = 11
+        assert cache.key(changed, chart="MatplotlibChart", size=[8, 4]) != key
+        assert cache.key(chart_data.rename(columns={"value": "count"}),
+                         chart="MatplotlibChart", size=[8, 4]) != key
+
+    def test_lru_eviction(self, temp_dir):
+        """Test the least recently used images are evicted first."""
+        cache = ChartCache(os.path.join(temp_dir, "charts"))
+        for age, key in enumerate(("a", "b", "c")):
+            cache.put(key, b"0123456789")
+            os.utime(os.path.join(cache.path, key), (age + 1, age + 1))
+        cache.get("a")
+
+        cache._max_bytes = 20
+        assert cache.evict() == 1
+        assert cache.get("b") is None
+        assert cache.get("a") == b"0123456789"
+        assert cache.get("c") == b"0123456789"
+
+    def test_chart_served_from_cache(self, chart_data, temp_dir, monkeypatch):
+        """Test a chart drawn again from the same data is read from the cache."""
+        cache = ChartCache(os.path.join(temp_dir, "charts"))
+        first = os.path.join(temp_dir, "first.png")
+        second = os.path.join(temp_dir, "second.png")
+        buffer = io.BytesIO()
+        assert MatplotlibChart(8, 4, cache=cache).CreateBarV(first, chart_data, "label", "value") == first
+        assert MatplotlibChart(8, 4, cache=cache).CreateBarV(buffer, chart_data, "label", "value") is buffer
+        # A buffer has the format of the quality profile, not of the file extension
+        assert len(os.listdir(cache.path)) == 2
+
+        def _no_drawing(self):
+            raise AssertionError("chart drawn again")
+        monkeypatch.setattr(Chart, "_new_axes", _no_drawing)
+        cached_buffer = io.BytesIO()
+        assert MatplotlibChart(8, 4, cache=cache).CreateBarV(second, chart_data, "label", "value") == second
+        assert MatplotlibChart(8, 4, cache=cache).CreateBarV(cached_buffer, chart_data, "label", "value") is cached_buffer
+
+        with open(first, "rb") as f1, open(second, "rb") as f2:
+            assert f1.read() == f2.read()
+        assert cached_buffer.getvalue() == buffer.getvalue()
+        # Other settings are not in the cache
+        assert MatplotlibChart(8, 4, cache=cache).CreateBarV(
+            os.path.join(temp_dir, "other.png"), chart_data, "label", "value", color="red"
+        ) == C.NO_FILE_CREATED
+
+    def test_delegated_chart_stored_once(self, temp_dir, monkeypatch):
+        """Test a scatter chart drawn as a density chart is stored once."""
+        monkeypatch.setattr(C, "SCATTER_MAX_POINTS", 10)
+        cache = ChartCache(os.path.join(temp_dir, "charts"))
+        data = pd.DataFrame({"x": range(20), "y": range(20)})
+
+        path = os.path.join(temp_dir, "density.png")
+        assert MatplotlibChart(8, 4, cache=cache).CreateScatter(path, data, "x", "y") == path
+        assert len(os.listdir(cache.path)) == 1
+
+    def test_build_charts_uses_cache(self, temp_csv_file, temp_dir, monkeypatch):
+        """Test report charts rendered again from the same data come from the cache."""
+        from pydqa4pm.core.dqa import Dqa4PM
+        from pydqa4pm.reports.store import MemoryReportStore
+        from pydqa4pm.utils.logger import Logger
+        monkeypatch.setattr(C, "CHART_MAX_WORKERS", 1)
+        folder = os.path.join(temp_dir, "charts")
+        dqa = Dqa4PM(Logger("test"), chart_cache=folder)
+        report_data = dqa.make_dqa_checks(
+            dqa.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        )
+        first, second = MemoryReportStore(), MemoryReportStore()
+
+        assert dqa.build_charts(report_data, first) is True
+        cached = len(os.listdir(folder))
+        assert cached > 0
+        monkeypatch.setattr(Chart, "_new_axes", None)  # Charts must not be drawn again
+        assert dqa.build_charts(report_data, second) is True
+        assert len(os.listdir(folder)) == cached
+        assert second.getImage(report_data.chartPFIValCount) == first.getImage(report_data.chartPFIValCount)
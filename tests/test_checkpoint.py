@@ -0,0 +1,221 @@
+"""
+Tests for pydqa4pm.core.checkpoint module.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from pydqa4pm.core.checkpoint import Checkpoint
+from pydqa4pm.core.dqa import Dqa4PM
+from pydqa4pm.utils.logger import Logger
+from pydqa4pm.utils import constants as C
+
+
+KEYS = ("case_id", "activity", "timestamp")
+
+LINES = [
+    "case_id,activity,timestamp,resource\n",
+    "C1,A,2023-01-01 09:00:00,R1\n",
+    "C2,A,2023-01-01 09:30:00,R1\n",
+    "C1,B,2023-01-01 10:00:00,R2\n",
+    "C1,B,2023-01-01 10:00:00,R2\n",   # Duplicate
+    ",A,2023-01-01 11:00:00,R1\n",     # Missing PFI
+    "C2,B,2023-01-01 09:00:00,R2\n",   # Out of order, straddles the first run
+    "C3,A,bad,R3\n",
+    "C1,C,2023-01-02 10:00:00,R3\n",
+    "C3,B,2023-01-03 08:00:00,R1\n",
+]
+
+
+def generated_lines(rows, seed=0):
+    """
+    Generate the lines of a log with duplicates, near duplicates, out-of-order
+    events, bad timestamps, missing keys and attributes, timelines interleaved.
+    """
+    rng = np.random.default_rng(seed)
+    cases = rng.integers(0, rows // 10, rows)
+    stamps = pd.Timestamp("2023-01-01") + pd.to_timedelta(cases * 3600 + rng.integers(0, 3000, rows), unit="s")
+    df = pd.DataFrame({
+        "case_id": cases,
+        "activity": rng.choice(["A", "B", "C", "D"], rows),
+        "timestamp": stamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "resource": [f"R{c % 5}" for c in cases]
+    })
+    near = df.sample(rows // 50, random_state=seed).copy()
+    near["timestamp"] = (pd.to_datetime(near["timestamp"]) + pd.Timedelta(seconds=2)).dt.strftime("%Y-%m-%d %H:%M:%S")
+    bad = df.sample(10, random_state=seed + 1).assign(timestamp="bad")
+    missing = df.sample(5, random_state=seed + 2).assign(case_id=None)
+    df = pd.concat([df, df.sample(rows // 20, random_state=seed + 3), near, bad, missing])
+    df = df.sample(frac=1, random_state=seed)
+    return df.to_csv(index=False).splitlines(keepends=True)
+
+
+def assert_same_report(result, expected):
+    """Assert two report data of the same rows hold the same counts and sections."""
+    assert dict(result.toDict(), filename=None) == dict(expected.toDict(), filename=None)
+    for frame in ("waitingTimes", "activeCases", "attributesConsistency"):
+        assert getattr(result, frame).to_dict("list") == getattr(expected, frame).to_dict("list")
+
+
+class TestCheckpoint:
+    """Test suite for incremental assessment checkpoints."""
+
+    @pytest.fixture
+    def log_path(self, temp_dir):
+        return os.path.join(temp_dir, "log.csv")
+
+    def _write(self, path, lines, mode="w"):
+        with open(path, mode) as f:
+            f.writelines(lines)
+
+    def _full_run(self, lines, temp_dir):
+        full_path = os.path.join(temp_dir, "full.csv")
+        self._write(full_path, lines)
+        full = Dqa4PM(Logger("test"))
+        return full.make_dqa_checks(full.open_dataset(full_path, ",", *KEYS))
+
+    def test_incremental_report_matches_full_run(self, log_path, temp_dir):
+        """Test appending in several runs gives the report of a full run."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES[:4])
+        dqa.process_incremental(log_path, ",", *KEYS)
+        self._write(log_path, LINES[4:7], "a")
+        dqa.process_incremental(log_path, ",", *KEYS)
+        self._write(log_path, LINES[7:], "a")
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+
+        expected = self._full_run(LINES, temp_dir)
+        assert_same_report(result, expected)
+        assert result.negativeWaits.startswith("1 ")
+        assert result.PFICountPerSN.equals(expected.PFICountPerSN)
+        assert result.dateFormatsCheck.equals(expected.dateFormatsCheck)
+
+    def test_large_incremental_report_matches_full_run(self, log_path, temp_dir):
+        """Test the duplicates and distinct values stay exact on a larger log."""
+        lines = generated_lines(20000)
+        dqa = Dqa4PM(Logger("test"), incremental=True, output_format=C.FORMAT_JSON)
+        for start, end in ((0, 7001), (7001, 15000), (15000, len(lines))):
+            self._write(log_path, lines[start:end], "a" if start else "w")
+            result = dqa.process_incremental(log_path, ",", *KEYS)
+
+        expected = self._full_run(lines, temp_dir)
+        assert expected.toDict()["counts"]["nearDuplicates"] > 0
+        assert_same_report(result, expected)
+        assert result.attributesProfile.equals(expected.attributesProfile)
+
+    def test_header_only_first_run(self, log_path, temp_dir):
+        """Test the header read by a run without rows is not read again as a row."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES[:1])
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+        assert result.RowCount == 0
+
+        checkpoint = Checkpoint.load(os.path.join(temp_dir, "log" + C.SUFFIX_CHECKPOINT))
+        assert checkpoint.columns == ["case_id", "activity", "timestamp", "resource"]
+
+        self._write(log_path, LINES[1:], "a")
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+        assert_same_report(result, self._full_run(LINES, temp_dir))
+
+    def test_checkpoint_only_reads_new_rows(self, log_path):
+        """Test the checkpoint resumes at the end of the previous run."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES[:4])
+        dqa.process_incremental(log_path, ",", *KEYS)
+
+        checkpoint_path = os.path.join(os.path.dirname(log_path), "log" + C.SUFFIX_CHECKPOINT)
+        checkpoint = Checkpoint.load(checkpoint_path)
+        assert checkpoint.offset == os.path.getsize(log_path)
+        assert checkpoint.rowsRead == 3
+        assert checkpoint.matches(log_path, ",", *KEYS)
+
+        self._write(log_path, LINES[4:], "a")
+        dqa.process_incremental(log_path, ",", *KEYS)
+        assert Checkpoint.load(checkpoint_path).rowsRead == len(LINES) - 1
+
+    def test_partial_line_is_read_next_run(self, log_path):
+        """Test a last line still being written is left for the next run."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES[:4] + [LINES[4][:10]])
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+        assert result.RowCount == 3
+
+        checkpoint_path = os.path.join(os.path.dirname(log_path), "log" + C.SUFFIX_CHECKPOINT)
+        assert Checkpoint.load(checkpoint_path).offset == len("".join(LINES[:4]))
+
+        self._write(log_path, [LINES[4][10:]], "a")
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+        assert result.RowCount == 4
+        assert result.duplicates.startswith("1 ")
+
+    def test_rewritten_file_is_read_again(self, log_path):
+        """Test a checkpoint is not resumed once the file has been rewritten."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES)
+        dqa.process_incremental(log_path, ",", *KEYS)
+
+        self._write(log_path, LINES[:1] + LINES[2:])
+        checkpoint = Checkpoint.load(os.path.join(os.path.dirname(log_path), "log" + C.SUFFIX_CHECKPOINT))
+        assert checkpoint.matches(log_path, ",", *KEYS) is False
+
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+        assert result.RowCount == len(LINES) - 3
+
+    def test_all_sections_are_computed(self, log_path):
+        """Test the checks that need every event are computed."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES[:4])
+        dqa.process_incremental(log_path, ",", *KEYS)
+        self._write(log_path, LINES[4:], "a")
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+
+        assert result.notComputed == []
+        metrics = result.toDict()
+        assert metrics["counts"]["flaggedRows"] == 3
+        assert metrics["topWaitingPairs"] is not None
+        assert metrics["attributesConsistency"] is not None
+
+    def test_process_warns_ignored_options(self, log_path, capsys):
+        """Test the options that do not apply to the incremental mode are reported."""
+        self._write(log_path, LINES)
+        dqa = Dqa4PM(Logger("test"), incremental=True, approximate=True,
+                     export=C.EXPORT_FLAGGED, output_format=C.FORMAT_JSON)
+        dqa.process(log_path, ",", *KEYS)
+
+        captured = capsys.readouterr().out
+        assert "Option <approximate> is not supported with incremental mode" in captured
+        assert "Option <export> is not supported with incremental mode" in captured
+        assert "<sampling>" not in captured
+
+    def test_integer_ids_stay_integers(self, log_path):
+        """Test integer timeline and event IDs are reported as numbers."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, [
+            "case_id,activity,timestamp\n",
+            "10,1,2023-01-01 09:00:00\n",
+            "10,2,2023-01-01 10:00:00\n",
+            "7,1,2023-01-01 11:00:00\n",
+        ])
+        result = dqa.process_incremental(log_path, ",", *KEYS)
+
+        assert result.PFIMostFreq[C.FLD_COL_VALUECOUNT].tolist() == [10, 7]
+        assert result.SNValues[C.FLD_COL_VALUECOUNT].tolist() == [1, 2]
+        assert isinstance(result.toDict()["topPFI"][0][C.FLD_COL_VALUECOUNT], int)
+
+    def test_outputs_are_written_across_runs(self, log_path, temp_dir):
+        """Test the key rejects are appended and the events and duplicates files cover every run."""
+        dqa = Dqa4PM(Logger("test"), incremental=True)
+        self._write(log_path, LINES[:4])
+        dqa.process_incremental(log_path, ",", *KEYS)
+        self._write(log_path, LINES[4:], "a")
+        dqa.process_incremental(log_path, ",", *KEYS)
+
+        base = os.path.join(temp_dir, "log")
+        rejects = pd.read_csv(base + C.SUFFIX_3KEYS_REJECT, index_col=0)
+        assert rejects.index.tolist() == [4]
+        events = pd.read_csv(base + C.SUFFIX_EVENTS)
+        assert len(events) == 3
+        duplicates = pd.read_csv(base + C.SUFFIX_DUPLICATES)
+        assert duplicates[C.FLD_MULTIPLICITY].tolist() == [2]
+        assert not os.path.exists(base + C.SUFFIX_NEAR_DUP_REJECT)
@@ -71,14 +71,10 @@ class TestConstants:
     
     def test_temp_file_names_defined(self):
         """Test that temporary file names are defined."""
-        assert hasattr(C, 'FILE_FORMAT_TABLE')
-        assert hasattr(C, 'FILE_SAMPLES_TABLE')
         assert hasattr(C, 'FILE_PFI_CHART')
         assert hasattr(C, 'FILE_SNMOSTFQ_CHART')
     
     def test_temp_file_names_have_extension(self):
         """Test that temp file names have image extensions."""
-        assert C.FILE_FORMAT_TABLE.endswith('.jpg')
-        assert C.FILE_SAMPLES_TABLE.endswith('.jpg')
         assert C.FILE_PFI_CHART.endswith('.jpg')
 
@@ -4,6 +4,7 @@ Tests for pydqa4pm.core.datasource module.
 
 import os
 import pytest
+import numpy as np
 import pandas as pd
 from pydqa4pm.core.datasource import DataSource, check_date_format
 from pydqa4pm.utils import constants as C
@@ -139,6 +140,18 @@ class TestDataSourceAnalysis:
         activity_distinct = ds.countDistinctValues("activity")
         assert activity_distinct == 2  # Start, End
     
+    def test_column_accessors(self, temp_csv_with_nulls):
+        """Test the columns, column values and parsed timestamps exclude the removed rows."""
+        ds = DataSource(temp_csv_with_nulls, "case_id", "activity", "timestamp")
+        ds.open(",")
+        ds.missingValues()
+        
+        assert ds.columns == ["case_id", "activity", "timestamp"]
+        assert ds.getColumn("case_id").tolist() == ["C001", "C005"]
+        timestamps = ds.getTimestamps()
+        assert timestamps.dtype == "datetime64[ns]"
+        assert timestamps.tolist() == [pd.Timestamp("2023-01-15 09:00:00"), pd.Timestamp("2023-01-15 13:00:00")]
+    
     def test_count_unique_values(self, temp_csv_file):
         """Test counting unique values."""
         ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
@@ -219,4 +232,497 @@ class TestDataSourceRejects:
         assert ds.readRejectFilename.endswith("-read.rejects")
         assert ds.keysRejectFilename.endswith("-3keys.rejects")
         assert ds.uniqueEventsFilename.endswith("-events.csv")
+        assert ds.nearDuplicatesRejectFilename.endswith("-nearduplicates.rejects")
+
+
+
+class TestDataSourceWaitingTimes:
+    """Test DataSource waiting time per activity pair."""
+    
+    def test_waiting_times_per_pair(self, temp_csv_file):
+        """Test waiting times are aggregated per activity pair."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        waits = ds.getWaitingTimesPerPair()
+        assert len(waits) == 1
+        assert waits[C.FLD_SN_PREV][0] == "Start"
+        assert waits[C.FLD_SN_NEXT][0] == "End"
+        assert waits[C.FLD_WAIT_COUNT][0] == 2
+        assert waits[C.FLD_WAIT_MEDIAN][0] == 3600
+        assert waits[C.FLD_WAIT_ZERO][0] == 0
+    
+    def test_waiting_times_zero_and_negative(self, temp_dir):
+        """Test zero and out-of-order waiting times are counted."""
+        csv_path = os.path.join(temp_dir, "test_waits.csv")
+        pd.DataFrame({
+            "case_id": ["C001", "C002", "C001", "C001", "C002"],
+            "activity": ["Start", "Start", "Review", "End", "End"],
+            "timestamp": [
+                "2023-01-15 09:00:00",
+                "2023-01-15 09:30:00",
+                "2023-01-15 09:00:00",
+                "2023-01-15 08:00:00",
+                "not a date"
+            ]
+        }).to_csv(csv_path, index=False)
+        
+        ds = DataSource(csv_path, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        waits = ds.getWaitingTimesPerPair().set_index([C.FLD_SN_PREV, C.FLD_SN_NEXT])
+        assert len(waits) == 2
+        assert waits.loc[("Start", "Review"), C.FLD_WAIT_ZERO] == 1
+        assert waits.loc[("Review", "End"), C.FLD_WAIT_NEGATIVE] == 1
+        assert waits.loc[("Review", "End"), C.FLD_WAIT_MIN] == -3600
+    
+    def test_waiting_times_with_limit(self, temp_csv_file):
+        """Test waiting times with limit."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert len(ds.getWaitingTimesPerPair(limit=1)) <= 1
 
+
+class TestDataSourceActiveCases:
+    """Test DataSource open timelines over time."""
+    
+    def test_active_cases_over_time(self, temp_csv_file):
+        """Test open timelines are counted per bucket."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        active = ds.getActiveCasesOverTime(4)
+        assert len(active) == 4
+        assert C.FLD_TIME in active.columns
+        # C001 09-10h, C002 11-12h, C003 13h over buckets of 1 hour from 9h
+        assert active[C.FLD_ACTIVE_CASES].tolist() == [1, 1, 1, 2]
+    
+    def test_active_cases_no_valid_timestamp(self, temp_dir):
+        """Test an empty result when no timestamp can be parsed."""
+        csv_path = os.path.join(temp_dir, "test_bad_dates.csv")
+        pd.DataFrame({
+            "case_id": ["C001", "C002"],
+            "activity": ["Start", "End"],
+            "timestamp": ["bad", "date"]
+        }).to_csv(csv_path, index=False)
+        
+        ds = DataSource(csv_path, "case_id", "activity", "timestamp")
+        ds.open(",")
+        assert ds.getActiveCasesOverTime().empty
+
+
+class TestDataSourceAttributesConsistency:
+    """Test DataSource case-attribute consistency check."""
+    
+    @pytest.fixture
+    def attributes_csv(self, temp_dir):
+        """Create a CSV with one case-level and one event-level attribute."""
+        csv_path = os.path.join(temp_dir, "test_attrs.csv")
+        pd.DataFrame({
+            "case_id": ["C001", "C001", "C002", "C002", "C003"],
+            "activity": ["Start", "End", "Start", "End", "Start"],
+            "timestamp": ["2023-01-15 09:00:00"] * 5,
+            "customer": ["A", "A", "B", "B", "C"],
+            "resource": ["John", "Mary", "Paul", "Anna", "John"]
+        }).to_csv(csv_path, index=False)
+        return csv_path
+    
+    def test_attribute_levels(self, attributes_csv):
+        """Test attributes are classified as case or event level."""
+        ds = DataSource(attributes_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        ds.check3PKeys()
+        
+        levels = ds.checkAttributesConsistency().set_index(C.FLD_ATTRIBUTE)
+        assert levels.loc["customer", C.FLD_ATTR_LEVEL] == C.ATTR_LEVEL_CASE
+        assert levels.loc["customer", C.FLD_ATTR_VIOLATIONS] == 0
+        assert levels.loc["resource", C.FLD_ATTR_LEVEL] == C.ATTR_LEVEL_EVENT
+    
+    def test_attribute_violations_with_thread_pool(self, attributes_csv, monkeypatch):
+        """Test inconsistent timelines are counted when columns are split in blocks."""
+        monkeypatch.setattr(C, "ATTR_COLUMNS_PER_TASK", 1)
+        monkeypatch.setattr(C, "CASE_ATTRIBUTE_RATIO", 0.5)
+        df = pd.read_csv(attributes_csv)
+        df.loc[1, "customer"] = "Z"
+        df.to_csv(attributes_csv, index=False)
+        
+        ds = DataSource(attributes_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        ds.check3PKeys()
+        
+        levels = ds.checkAttributesConsistency(max_workers=2).set_index(C.FLD_ATTRIBUTE)
+        assert levels.loc["customer", C.FLD_ATTR_LEVEL] == C.ATTR_LEVEL_CASE
+        assert levels.loc["customer", C.FLD_ATTR_VIOLATIONS] == 1
+    
+    def test_no_attributes(self, temp_csv_with_nulls):
+        """Test an empty result when the log has no attribute."""
+        ds = DataSource(temp_csv_with_nulls, "case_id", "activity", "timestamp")
+        ds.open(",")
+        ds.check3PKeys()
+        assert ds.checkAttributesConsistency().empty
+
+
+class TestDataSourceNearDuplicates:
+    """Test DataSource near-duplicate events detection."""
+    
+    @pytest.fixture
+    def near_dups_csv(self, temp_dir):
+        """Create a CSV with events repeated a few seconds apart."""
+        csv_path = os.path.join(temp_dir, "test_near_dups.csv")
+        pd.DataFrame({
+            "case_id": ["C001", "C002", "C001", "C001", "C001", "C002"],
+            "activity": ["Start", "Start", "Start", "Start", "End", "Start"],
+            "timestamp": [
+                "2023-01-15 09:00:00",
+                "2023-01-15 09:00:00",
+                "2023-01-15 09:00:03",  # Near duplicate of row 0
+                "2023-01-15 09:00:00",  # Exact duplicate of row 0
+                "2023-01-15 09:00:04",  # Other event
+                "2023-01-15 09:10:00"   # Too far
+            ]
+        }).to_csv(csv_path, index=False)
+        return csv_path
+    
+    def test_near_duplicates_count(self, near_dups_csv):
+        """Test near duplicates are counted within tolerance."""
+        ds = DataSource(near_dups_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.checkNearDuplicatesCount(5) == 1
+        assert ds.checkNearDuplicatesCount(1) == 0
+        assert ds.checkNearDuplicatesCount(3600) == 2
+    
+    def test_near_duplicates_reject_file(self, near_dups_csv):
+        """Test near duplicates are written to the reject file."""
+        ds = DataSource(near_dups_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.dumpNearDuplicatesRejectFile(5) == 1
+        assert os.path.exists(ds.nearDuplicatesRejectFilename)
+        
+        rejects = pd.read_csv(ds.nearDuplicatesRejectFilename, index_col=0)
+        assert rejects.index.tolist() == [2]
+        assert C.REJECT_COL_NAME in rejects.columns
+
+
+class TestDataSourceProfileCache:
+    """Test DataSource shared value-count cache."""
+    
+    def test_value_counts_computed_once(self, temp_csv_file):
+        """Test distinct, unique and frequency queries share the same counts."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.countDistinctValues("case_id") == 3
+        counts = ds._value_counts["case_id"]
+        assert ds.countUniqueValues("case_id") == 3
+        assert len(ds.getCountValuesForField("case_id", 2)) == 2
+        assert not ds.getSNCountPerPFISize().empty
+        assert ds._value_counts["case_id"] is counts
+    
+    def test_cache_invalidated_by_missing_values(self, temp_csv_with_nulls):
+        """Test the cache is refreshed once rows with missing keys are dropped."""
+        ds = DataSource(temp_csv_with_nulls, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.countDistinctValues("activity") == 2
+        assert ds.getCountValuesForField("activity")[C.FLD_FREQ_VALUECOUNT].sum() == 4
+        ds.missingValues()
+        assert ds.getCountValuesForField("activity")[C.FLD_FREQ_VALUECOUNT].sum() == 2
+
+
+class TestDataSourceAttributesProfile:
+    """Test DataSource attribute profiling."""
+    
+    def test_profile_attributes(self, temp_dir):
+        """Test each attribute gets a type, null rate, cardinality and top values."""
+        csv_path = os.path.join(temp_dir, "test_profile.csv")
+        pd.DataFrame({
+            "case_id": ["C001", "C001", "C002", "C002"],
+            "activity": ["Start", "End", "Start", "End"],
+            "timestamp": ["2023-01-15 09:00:00"] * 4,
+            "amount": [100, 100, 200, 300],
+            "customer": ["A", None, "B", "B"]
+        }).to_csv(csv_path, index=False)
+        
+        ds = DataSource(csv_path, "case_id", "activity", "timestamp")
+        ds.open(",")
+        ds.check3PKeys()
+        
+        profile = ds.profileAttributes(max_workers=2).set_index(C.FLD_ATTRIBUTE)
+        assert list(profile.index) == ["amount", "customer"]
+        assert profile.loc["amount", C.FLD_ATTR_TYPE] == "integer"
+        assert profile.loc["amount", C.FLD_ATTR_DISTINCT] == 3
+        assert profile.loc["customer", C.FLD_ATTR_NULL_RATE] == 25.0
+        assert profile.loc["customer", C.FLD_ATTR_TOP_VALUES].startswith("B (2)")
+
+
+class TestDataSourceApproximate:
+    """Test DataSource streaming approximate distinct counts."""
+    
+    def test_approximate_distinct_values(self, temp_csv_with_nulls):
+        """Test sketches are built chunk by chunk on the key columns."""
+        ds = DataSource(temp_csv_with_nulls, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        sketches = ds.approximateDistinctValues(chunksize=2)
+        assert sketches["case_id"].count() == 2  # C001, C005 (rows with a missing key ignored)
+        assert sketches["activity"].count() == 1
+        assert sketches["timestamp"].count() == 2
+    
+    def test_key_sketches_built_on_load(self, temp_csv_with_nulls, monkeypatch):
+        """Test the key sketches are fed by the chunks of the load, without a second pass."""
+        monkeypatch.setattr(C, "CHUNK_SIZE", 2)
+        ds = DataSource(temp_csv_with_nulls, "case_id", "activity", "timestamp", approximate=True)
+        ds.open(",")
+        monkeypatch.setattr(ds, "iterChunks", None)
+        
+        distinct, top = ds.keySketches()
+        assert distinct["case_id"].count() == 2  # C001, C005 (rows with a missing key ignored)
+        assert top["activity"].topk(1)[C.FLD_FREQ_VALUECOUNT][0] == 2
+        assert ds.rowsCount() == 5
+    
+    def test_key_sketches_follow_sample(self, temp_csv_file):
+        """Test the key sketches only cover the sampled timelines."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp",
+                        sample_rate=0.5, approximate=True)
+        ds.open(",")
+        
+        distinct, _ = ds.keySketches()
+        assert distinct["case_id"].count() == ds._dataset["case_id"].nunique()
+    
+    def test_key_sketches_need_approximate_mode(self, temp_csv_file):
+        """Test the key sketches are not available in exact mode."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        with pytest.raises(ValueError):
+            ds.keySketches()
+    
+    def test_iter_chunks(self, temp_csv_file):
+        """Test the file is read in chunks of the key columns."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        chunks = list(ds.iterChunks(chunksize=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert list(chunks[0].columns) == ["case_id", "activity", "timestamp"]
+
+
+class TestDataSourceDuplicateGroups:
+    """Test DataSource duplicate groups export."""
+    
+    def test_duplicate_groups(self, temp_csv_with_duplicates):
+        """Test duplicate groups are listed with their multiplicity."""
+        ds = DataSource(temp_csv_with_duplicates, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        groups = ds.getDuplicateGroups()
+        assert len(groups) == 2
+        assert groups[C.FLD_MULTIPLICITY].tolist() == [2, 2]
+        assert set(groups["case_id"]) == {"C001", "C002"}
+    
+    def test_dump_duplicates_file(self, temp_csv_with_duplicates):
+        """Test the duplicates file is written."""
+        ds = DataSource(temp_csv_with_duplicates, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.dumpDuplicatesFile() == 2
+        assert os.path.exists(ds.duplicatesFilename)
+        assert len(pd.read_csv(ds.duplicatesFilename)) == 2
+    
+    def test_hash_collision_verified(self, temp_csv_with_duplicates):
+        """Test rows with colliding hashes but different keys are not duplicates."""
+        ds = DataSource(temp_csv_with_duplicates, "case_id", "activity", "timestamp")
+        ds.open(",")
+        ds._key_hashes = np.zeros(ds.rowsCount(), dtype=np.uint64)
+        
+        assert ds.checkDuplicatesCount() == 2
+        assert len(ds.getDuplicateGroups()) == 2
+
+
+class TestDataSourceKeyRejects:
+    """Test DataSource single-pass key null masking."""
+    
+    @pytest.fixture
+    def multi_nulls_csv(self, temp_dir):
+        """Create a CSV with rows missing several keys."""
+        csv_path = os.path.join(temp_dir, "test_multi_nulls.csv")
+        pd.DataFrame({
+            "case_id": ["C001", None, None, "C004"],
+            "activity": ["Start", None, "End", "End"],
+            "timestamp": ["2023-01-15 09:00:00", "2023-01-15 10:00:00", None, "2023-01-15 11:00:00"]
+        }).to_csv(csv_path, index=False)
+        return csv_path
+    
+    def test_reject_file_one_row_per_reject(self, multi_nulls_csv):
+        """Test a row missing several keys is written once with all its reasons."""
+        ds = DataSource(multi_nulls_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.dump3KeysRejectFile() == 2
+        rejects = pd.read_csv(ds.keysRejectFilename, index_col=0)
+        assert rejects.index.tolist() == [1, 2]
+        assert rejects[C.REJECT_COL_NAME][1] == "Timeline ID is Empty, Event ID is Empty"
+        assert rejects[C.REJECT_COL_NAME][2] == "Timeline ID is Empty, Timestamp is Empty"
+    
+    def test_missing_values_drops_rows_once(self, multi_nulls_csv):
+        """Test missing counts per key and rows dropped."""
+        ds = DataSource(multi_nulls_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.missingValues() == [2, 1, 1]
+        assert ds.rowsCount() == 2
+        assert ds.rejectRows == 2
+    
+    def test_empty_reject_file(self, temp_csv_file):
+        """Test an empty reject file is created when no key is missing."""
+        ds = DataSource(temp_csv_file, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.dump3KeysRejectFile() == 0
+        assert os.path.exists(ds.keysRejectFilename)
+
+
+class TestDataSourceQualityFlags:
+    """Test DataSource per-row quality flags and flagged export."""
+    
+    @pytest.fixture
+    def flags_csv(self, temp_dir):
+        """Create a CSV with one issue per row."""
+        csv_path = os.path.join(temp_dir, "test_flags.csv")
+        pd.DataFrame({
+            "case_id": ["C001", "C001", "C001", None, "C002", "C002", "C002"],
+            "activity": ["Start", "Start", "End", "Start", "Start", "Start", "End"],
+            "timestamp": [
+                "2023-01-15 09:00:00",
+                "2023-01-15 09:00:00",  # Duplicate
+                "2023-01-15 08:00:00",  # Out of order
+                "2023-01-15 09:00:00",  # Missing PFI
+                "2023-01-15 10:00:00",
+                "2023-01-15 10:00:02",  # Near duplicate
+                "yesterday"             # Bad timestamp
+            ]
+        }).to_csv(csv_path, index=False)
+        return csv_path
+    
+    def _run_checks(self, ds):
+        ds.missingValues()
+        ds.checkBPPIDateFormats()
+        ds.checkDuplicatesCount()
+        ds.checkNearDuplicatesCount()
+        ds.getWaitingTimesPerPair()
+    
+    def test_flags_set_by_checks(self, flags_csv):
+        """Test each check sets its bit on the faulty rows."""
+        ds = DataSource(flags_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        self._run_checks(ds)
+        
+        flags = ds.qualityFlags
+        assert flags.dtype == np.uint16
+        assert flags[0] == 0
+        assert flags[1] & C.FLAG_DUPLICATE
+        assert flags[2] & C.FLAG_OUT_OF_ORDER
+        assert flags[3] == C.FLAG_NULL_KEY
+        assert flags[5] == C.FLAG_NEAR_DUPLICATE
+        assert flags[6] == C.FLAG_BAD_TIMESTAMP
+        assert ds.countFlaggedRows() == 4
+    
+    def test_dump_flagged_dataset(self, flags_csv):
+        """Test the flagged export keeps every row, null keys included, with its flags."""
+        ds = DataSource(flags_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        self._run_checks(ds)
+        
+        assert ds.dumpFlaggedDataset(C.EXPORT_FLAGGED) == 7
+        flagged = pd.read_csv(ds.flaggedFilename)
+        assert C.FLD_QUALITY_FLAGS in flagged.columns
+        assert flagged[C.FLD_QUALITY_FLAGS].tolist()[3] == C.FLAG_NULL_KEY
+        assert flagged[C.FLD_QUALITY_FLAGS].tolist()[5] == C.FLAG_NEAR_DUPLICATE
+    
+    def test_dump_clean_dataset(self, flags_csv):
+        """Test the clean export drops every flagged row."""
+        ds = DataSource(flags_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        self._run_checks(ds)
+        
+        assert ds.dumpFlaggedDataset(C.EXPORT_CLEAN) == 2
+        clean = pd.read_csv(ds.cleanFilename)
+        assert C.FLD_QUALITY_FLAGS not in clean.columns
+
+
+class TestDataSourceSampling:
+    """Test DataSource case-preserving sampling and confidence intervals."""
+    
+    @pytest.fixture
+    def cases_csv(self, temp_dir):
+        """Create a CSV with 200 timelines of 5 events, one in ten duplicated."""
+        csv_path = os.path.join(temp_dir, "test_sampling.csv")
+        rows = []
+        for case in range(200):
+            for step in range(5):
+                rows.append((f"C{case:03d}", f"Step{step}", f"2023-01-15 {9 + step:02d}:00:00"))
+            if case % 10 == 0:
+                rows.append(rows[-1])
+        pd.DataFrame(rows, columns=["case_id", "activity", "timestamp"]).to_csv(csv_path, index=False)
+        return csv_path
+    
+    def test_full_rate_is_not_sampled(self, cases_csv):
+        """Test the default rate loads the whole file."""
+        ds = DataSource(cases_csv, "case_id", "activity", "timestamp")
+        ds.open(",")
+        
+        assert ds.isSampled is False
+        assert ds.rowsCount() == 1020
+    
+    def test_sample_keeps_whole_timelines(self, cases_csv):
+        """Test sampled timelines keep all their events."""
+        ds = DataSource(cases_csv, "case_id", "activity", "timestamp", sample_rate=0.3)
+        ds.open(",")
+        
+        assert ds.isSampled is True
+        assert 0 < ds.rowsCount() < 1020
+        sizes = ds._dataset.groupby("case_id").size()
+        assert sizes.isin([5, 6]).all()
+    
+    def test_sample_keeps_timelines_across_chunk_types(self, temp_dir, monkeypatch):
+        """Test a timeline is kept whole when a missing ID changes the type of one chunk."""
+        monkeypatch.setattr(C, "CHUNK_SIZE", 101)
+        csv_path = os.path.join(temp_dir, "test_sampling_types.csv")
+        # First chunk: the first event of every timeline and a row without ID
+        # (IDs read as floats); second chunk: the last events (IDs read as integers)
+        lines = ["case_id,activity,timestamp"]
+        lines += [f"{case},Start,2023-01-15 09:00:00" for case in range(1, 101)]
+        lines.append(",Start,2023-01-15 09:30:00")
+        lines += [f"{case},End,2023-01-15 10:00:00" for case in range(1, 101)]
+        with open(csv_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        
+        ds = DataSource(csv_path, "case_id", "activity", "timestamp", sample_rate=0.5)
+        ds.open(",")
+        
+        sizes = ds._dataset.dropna(subset=["case_id"]).groupby("case_id").size()
+        assert 0 < len(sizes) < 100
+        assert (sizes == 2).all()
+    
+    def test_sample_is_deterministic(self, cases_csv):
+        """Test the same rate selects the same timelines."""
+        first = DataSource(cases_csv, "case_id", "activity", "timestamp", sample_rate=0.3)
+        first.open(",")
+        second = DataSource(cases_csv, "case_id", "activity", "timestamp", sample_rate=0.3)
+        second.open(",")
+        
+        assert first._dataset["case_id"].tolist() == second._dataset["case_id"].tolist()
+    
+    def test_confidence_interval_contains_ratio(self, cases_csv):
+        """Test the interval brackets the sampled duplicate ratio."""
+        ds = DataSource(cases_csv, "case_id", "activity", "timestamp", sample_rate=0.5)
+        ds.open(",")
+        ds.checkDuplicatesCount()
+        
+        ratio, low, high = ds.flagConfidenceInterval(C.FLAG_DUPLICATE)
+        assert ratio == pytest.approx(ds.countFlaggedRows() / ds.rowsCount())
+        assert 0 <= low <= ratio <= high <= 1
+        assert high > low
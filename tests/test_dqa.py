@@ -6,6 +6,7 @@ import os
 import pytest
 from pydqa4pm.core.dqa import Dqa4PM
 from pydqa4pm.utils.logger import Logger
+from pydqa4pm.utils import constants as C
 
 
 class TestDqa4PM:
@@ -56,6 +57,164 @@ class TestDqa4PM:
         
         assert report_data is not None
     
+    def test_make_dqa_checks_approximate(self, temp_csv_file):
+        """Test distinct counts are estimated in approximate mode."""
+        dqa = Dqa4PM(Logger("test"), approximate=True)
+        ds = dqa.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa.make_dqa_checks(ds)
+        
+        assert report_data.AllChecksOK is True
+        assert report_data.uniques == [3, 2, 5]
+        assert report_data.distinctError > 0
+        assert report_data.distinctPFI.startswith("~3 / 5")
+        assert report_data.SNValues[C.FLD_COL_VALUECOUNT][0] == "Start"
+        assert report_data.SNValues[C.FLD_FREQ_VALUECOUNT][0] == 3
+        assert report_data.notComputed == [C.SECTION_TIMELINE_SIZES, C.SECTION_ATTRIBUTES_PROFILE]
+        assert report_data.PFICountPerSN.empty
+        # No exact value counts of the keys
+        assert ds._value_counts == {}
+    
+    def test_make_dqa_checks_approximate_error(self, temp_csv_file):
+        """Test the sketches are sized from the requested error."""
+        dqa = Dqa4PM(Logger("test"), approximate=True, error=0.05)
+        ds = dqa.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa.make_dqa_checks(ds)
+        
+        default = Dqa4PM(Logger("test"), approximate=True)
+        expected = default.make_dqa_checks(
+            default.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        )
+        assert ds.error == 0.05
+        assert expected.distinctError < report_data.distinctError <= 0.05
+    
+    def test_make_dqa_checks_sampled(self, temp_csv_with_duplicates):
+        """Test ratios get confidence intervals in sampling mode."""
+        dqa = Dqa4PM(Logger("test"), sample_rate=0.99)
+        ds = dqa.open_dataset(temp_csv_with_duplicates, ",", "case_id", "activity", "timestamp")
+        report_data = dqa.make_dqa_checks(ds)
+        
+        assert report_data.AllChecksOK is True
+        assert report_data.sampleRate == 0.99
+        assert set(report_data.confidenceIntervals) == {
+            C.METRIC_MISSING, C.METRIC_BAD_TIMESTAMPS, C.METRIC_DUPLICATES, C.METRIC_NEAR_DUPLICATES
+        }
+        assert report_data.getConfidenceDisplay(C.METRIC_DUPLICATES).endswith("%]")
+    
+    def test_process_with_clean_export(self, temp_csv_with_duplicates, temp_dir):
+        """Test the clean dataset is exported after the checks."""
+        import shutil
+        temp_csv = os.path.join(temp_dir, "test.csv")
+        shutil.copy(temp_csv_with_duplicates, temp_csv)
+        
+        dqa = Dqa4PM(Logger("test"), export=C.EXPORT_CLEAN)
+        dqa.process(temp_csv, ",", "case_id", "activity", "timestamp")
+        
+        clean_file = os.path.join(temp_dir, "test" + C.SUFFIX_CLEAN)
+        assert os.path.exists(clean_file)
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_build_charts_workers(self, dqa_instance, temp_csv_file, temp_dir, monkeypatch, workers):
+        """Test charts are rendered in a process pool or in the current process."""
+        from pydqa4pm.reports.store import ReportStore
+        monkeypatch.setattr(C, "CHART_MAX_WORKERS", workers)
+        monkeypatch.setattr(C, "CHART_POOL_MIN_TASKS", 1)
+        ds = dqa_instance.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa_instance.make_dqa_checks(ds)
+        store = ReportStore(os.path.join(temp_dir, "store"))
+        store.initialize()
+        
+        assert dqa_instance.build_charts(report_data, store) is True
+        for path in (report_data.chartPFIValCount, report_data.chartSNValCount,
+                     report_data.chartAggSNPerPFISIze):
+            assert os.path.exists(path)
+        store.finalize()
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_build_charts_in_memory(self, dqa_instance, temp_csv_file, monkeypatch, workers):
+        """Test charts rendered to a memory store are kept as buffers."""
+        from pydqa4pm.reports.store import MemoryReportStore
+        monkeypatch.setattr(C, "CHART_MAX_WORKERS", workers)
+        monkeypatch.setattr(C, "CHART_POOL_MIN_TASKS", 1)
+        ds = dqa_instance.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa_instance.make_dqa_checks(ds)
+        store = MemoryReportStore()
+        
+        assert dqa_instance.build_charts(report_data, store) is True
+        for name in (report_data.chartPFIValCount, report_data.chartSNValCount,
+                     report_data.chartAggSNPerPFISIze):
+            assert not os.path.exists(name)
+            assert store.getImage(name)[:2] == b"\xff\xd8"  # JPEG
+    
+    @pytest.mark.parametrize("cpus, min_tasks", [(1, 1), (4, 100)])
+    def test_build_charts_without_pool(self, dqa_instance, temp_csv_file, monkeypatch, cpus, min_tasks):
+        """Test no process pool is started on a single CPU or for a few charts."""
+        from pydqa4pm.core import dqa as dqa_module
+        from pydqa4pm.reports.store import MemoryReportStore
+        monkeypatch.setattr(dqa_module, "_available_cpus", lambda: cpus)
+        monkeypatch.setattr(dqa_module, "ProcessPoolExecutor", None)  # Must not be started
+        monkeypatch.setattr(C, "CHART_POOL_MIN_TASKS", min_tasks)
+        ds = dqa_instance.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa_instance.make_dqa_checks(ds)
+        store = MemoryReportStore()
+        
+        assert dqa_instance.build_charts(report_data, store) is True
+        assert store.getImage(report_data.chartPFIValCount)[:2] == b"\xff\xd8"
+    
+    def test_report_print_quality(self, temp_csv_file, temp_dir):
+        """Test a report with lossless PNG charts is built from a memory store."""
+        from pydqa4pm.reports.store import MemoryReportStore
+        dqa = Dqa4PM(Logger("test"), quality=C.QUALITY_PRINT)
+        ds = dqa.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa.make_dqa_checks(ds)
+        store = MemoryReportStore()
+        
+        assert dqa.build_charts(report_data, store) is True
+        assert report_data.chartPFIValCount.endswith(".png")
+        report_name = os.path.join(temp_dir, "print-report.pdf")
+        dqa.generate_report(report_data, report_name, store)
+        
+        with open(report_name, "rb") as f:
+            assert b"/FlateDecode" in f.read()
+    
+    @pytest.mark.parametrize("backend", C.CHART_BACKENDS)
+    def test_build_charts_backend(self, temp_csv_file, monkeypatch, backend):
+        """Test the charts are drawn by the chart class of the selected backend."""
+        from pydqa4pm.reports.store import MemoryReportStore
+        monkeypatch.setattr(C, "CHART_MAX_WORKERS", 1)
+        dqa = Dqa4PM(Logger("test"), chart_backend=backend)
+        ds = dqa.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa.make_dqa_checks(ds)
+        store = MemoryReportStore()
+        
+        assert dqa._chart_class().__module__.endswith(backend + "_chart")
+        assert dqa.build_charts(report_data, store) is True
+        assert store.getImage(report_data.chartPFIValCount)[:2] == b"\xff\xd8"
+    
+    def test_unknown_chart_backend(self, temp_csv_file):
+        """Test an unknown chart backend makes the chart generation fail."""
+        from pydqa4pm.reports.store import MemoryReportStore
+        dqa = Dqa4PM(Logger("test"), chart_backend="plotly")
+        ds = dqa.open_dataset(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        report_data = dqa.make_dqa_checks(ds)
+        
+        assert dqa.build_charts(report_data, MemoryReportStore()) is False
+    
+    def test_process_json_format(self, temp_csv_file, temp_dir, monkeypatch):
+        """Test the JSON format writes the metrics without charts or PDF report."""
+        import json
+        dqa = Dqa4PM(Logger("test"), output_format=C.FORMAT_JSON)
+        monkeypatch.setattr(dqa, "build_charts", None)  # Charts must not be rendered
+        monkeypatch.setattr(dqa, "generate_report", None)
+        dqa.process(temp_csv_file, ",", "case_id", "activity", "timestamp")
+        
+        base = os.path.join(temp_dir, "test_data")
+        assert not os.path.exists(base + C.SUFFIX_REPORT)
+        with open(base + C.SUFFIX_METRICS, encoding="utf-8") as f:
+            metrics = json.load(f)
+        assert metrics["keys"] == {"PFI": "case_id", "SN": "activity", "T": "timestamp"}
+        assert metrics["rows"] > 0
+        assert metrics["timelineSizes"]
+    
     def test_create_alternative_data(self, dqa_instance, temp_csv_file, temp_dir):
         """Test creating alternative data files."""
         # Create CSV in temp dir
@@ -5,6 +5,8 @@ These tests verify the complete workflow from end to end.
 """
 
 import os
+import subprocess
+import sys
 import pytest
 import tempfile
 import shutil
@@ -13,6 +15,10 @@ from pydqa4pm.reports import ReportStore, PDFReportBuilder
 from pydqa4pm.utils import constants as C
 
 
+# Repository root, the working directory of the fresh interpreters
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
 class TestEndToEndWorkflow:
     """End-to-end workflow tests."""
     
@@ -186,4 +192,17 @@ class TestImportStructure:
         assert __version__ is not None
         assert isinstance(__version__, str)
         assert "." in __version__
-
+    
+    @pytest.mark.parametrize("modules", [
+        "pydqa4pm",
+        "pydqa4pm.core.dqa, pydqa4pm.reports, pydqa4pm.reports.cache"
+    ])
+    def test_import_is_lazy(self, modules):
+        """Test the plotting and PDF libraries are not loaded by the package imports."""
+        code = (
+            f"import sys, {modules}\n"
+            "print(','.join(m for m in ('matplotlib', 'seaborn', 'fpdf', 'PIL') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, cwd=PROJECT_ROOT)
+        assert result.stdout.strip() == ""
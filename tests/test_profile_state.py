@@ -0,0 +1,196 @@
+"""
+Tests for pydqa4pm.core.profile_state module.
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from pydqa4pm.core.profile_state import ProfileState, profileShards
+from pydqa4pm.core.dqa import Dqa4PM
+from pydqa4pm.utils.logger import Logger
+from pydqa4pm.utils import constants as C
+
+
+KEYS = ("case_id", "activity", "timestamp")
+
+
+def assert_same_report(result, expected):
+    """Assert two report data hold the same counts and sections."""
+    assert result.toDict() == expected.toDict()
+    for frame in ("waitingTimes", "activeCases", "attributesConsistency"):
+        assert getattr(result, frame).to_dict("list") == getattr(expected, frame).to_dict("list")
+
+
+def write_log(folder, rows=3000, shards=4, seed=0):
+    """
+    Write a generated log and its shards, in file order.
+
+    The events are shuffled so that the timelines are spread over the
+    shards, with duplicates, near duplicates, out-of-order events, bad
+    timestamps, missing keys and case-level and event-level attributes.
+    """
+    rng = np.random.default_rng(seed)
+    cases = rng.integers(0, rows // 10, rows)
+    stamps = pd.Timestamp("2023-01-01") + pd.to_timedelta(cases * 3600 + rng.integers(0, 3000, rows), unit="s")
+    df = pd.DataFrame({
+        "case_id": cases,
+        "activity": rng.choice(["A", "B", "C", "D"], rows),
+        "timestamp": stamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "amount": rng.choice([1.0, 2.5, np.nan], rows),
+        "region": [f"R{c % 5}" for c in cases]
+    })
+    near = df.sample(rows // 50, random_state=seed).copy()
+    near["timestamp"] = (pd.to_datetime(near["timestamp"]) + pd.Timedelta(seconds=2)).dt.strftime("%Y-%m-%d %H:%M:%S")
+    bad = df.sample(10, random_state=seed + 1).assign(timestamp="bad")
+    missing = df.sample(5, random_state=seed + 2).assign(activity=None)
+    df = pd.concat([df, df.sample(rows // 20, random_state=seed + 3), near, bad, missing])
+    df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    df.loc[df.sample(10, random_state=seed + 4).index, "region"] = "X"
+
+    full = os.path.join(folder, "generated.csv")
+    df.to_csv(full, index=False)
+    paths = []
+    for i, part in enumerate(np.array_split(np.arange(len(df)), shards)):
+        path = os.path.join(folder, f"generated{i}.csv")
+        df.iloc[part].to_csv(path, index=False)
+        paths.append(path)
+    return full, paths
+
+
+@pytest.fixture
+def shards(temp_dir):
+    """Split a log into 3 shard files, with timelines and duplicates across shards."""
+    df = pd.DataFrame({
+        "case_id": ["C1", "C1", "C2", "C1", None, "C2", "C3", "C2", "C3", "C1"],
+        "activity": ["A", "B", "A", "C", "A", "B", "A", "B", "B", "C"],
+        "timestamp": [
+            "2023-01-01 09:00:00", "2023-01-01 10:00:00", "2023-01-02 09:00:00",
+            "2023-01-01 11:00:00", "2023-01-03 09:00:00", "2023-01-02 10:00:00",
+            "03/01/2023 09:00:00", "2023-01-02 10:00:00", "bad",
+            "2023-01-01 11:00:00"
+        ],
+        "resource": ["R1", "R2", "R1", "R3", "R1", "R2", "R1", "R2", "R3", "R3"]
+    })
+    full = os.path.join(temp_dir, "full.csv")
+    df.to_csv(full, index=False)
+    paths = []
+    for i, (start, end) in enumerate([(0, 3), (3, 7), (7, 10)]):
+        path = os.path.join(temp_dir, f"shard{i}.csv")
+        df.iloc[start:end].to_csv(path, index=False)
+        paths.append(path)
+    return full, paths
+
+
+class TestProfileState:
+    """Test suite for ProfileState."""
+
+    def test_merge_equals_concatenated_file(self, shards):
+        """Test merging the shard states gives the report of the whole file."""
+        full, paths = shards
+        whole = ProfileState.fromFile(full, ",", *KEYS)
+        merged = ProfileState.mergeAll([ProfileState.fromFile(p, ",", *KEYS) for p in paths])
+
+        assert merged.shards == 3
+        assert_same_report(merged.toReportData(full), whole.toReportData(full))
+        assert merged.duplicates == 2
+        assert merged.missings == [1, 0, 0]
+
+    def test_merge_is_associative(self, shards):
+        """Test the grouping of the merges does not change the result."""
+        _, paths = shards
+        a, b, c = (ProfileState.fromFile(p, ",", *KEYS) for p in paths)
+        left = ProfileState.mergeAll([a, b]).merge(c)
+        a, b, c = (ProfileState.fromFile(p, ",", *KEYS) for p in paths)
+        right = ProfileState.mergeAll([a]).merge(b.merge(c))
+
+        assert_same_report(left.toReportData("log"), right.toReportData("log"))
+
+    def test_merge_different_columns_raises(self, shards, temp_dir):
+        """Test states of files with other columns cannot be merged."""
+        _, paths = shards
+        other = os.path.join(temp_dir, "other.csv")
+        pd.read_csv(paths[0]).drop(columns=["resource"]).to_csv(other, index=False)
+
+        state = ProfileState.fromFile(paths[0], ",", *KEYS)
+        with pytest.raises(ValueError):
+            state.merge(ProfileState.fromFile(other, ",", *KEYS))
+
+    def test_save_and_load(self, shards, temp_dir):
+        """Test a state survives a round trip through a JSON file."""
+        full, _ = shards
+        state = ProfileState.fromFile(full, ",", *KEYS)
+        path = os.path.join(temp_dir, "state.json")
+        state.save(path)
+
+        assert ProfileState.load(path).to_dict() == state.to_dict()
+
+    def test_report_data_matches_checks(self, shards):
+        """Test the merged report matches the checks on the whole file."""
+        full, paths = shards
+        dqa = Dqa4PM(Logger("test"))
+        ds = dqa.open_dataset(full, ",", *KEYS)
+        expected = dqa.make_dqa_checks(ds)
+
+        result = profileShards(paths, ",", *KEYS, max_workers=2).toReportData(full)
+
+        assert_same_report(result, expected)
+        assert result.PFICountPerSN.equals(expected.PFICountPerSN)
+        assert result.attributes == expected.attributes
+
+    def test_timelines_across_shards_match_checks(self, temp_dir):
+        """Test every section on a log whose timelines span the shards."""
+        full, paths = write_log(temp_dir)
+        dqa = Dqa4PM(Logger("test"))
+        ds = dqa.open_dataset(full, ",", *KEYS)
+        expected = dqa.make_dqa_checks(ds)
+
+        state = ProfileState.mergeAll([ProfileState.fromFile(p, ",", *KEYS) for p in paths])
+        result = ProfileState.from_dict(state.to_dict()).toReportData(full)
+
+        assert expected.toDict()["counts"]["nearDuplicates"] > 0
+        assert expected.toDict()["counts"]["negativeWaits"] > 0
+        assert_same_report(result, expected)
+        assert result.attributesProfile.equals(expected.attributesProfile)
+        assert state.getDuplicateGroups().to_dict("list") == ds.getDuplicateGroups().to_dict("list")
+
+    def test_process_shards(self, shards, temp_dir):
+        """Test the merged report is generated next to the first shard."""
+        _, paths = shards
+        dqa = Dqa4PM(Logger("test"))
+        report_data = dqa.process_shards(paths, ",", *KEYS)
+
+        assert report_data is not None
+        assert os.path.exists(os.path.join(temp_dir, "shard0-merged-report.pdf"))
+
+    def test_all_sections_are_computed(self, shards):
+        """Test the per-timeline checks are computed on the merged state."""
+        _, paths = shards
+        result = ProfileState.mergeAll(
+            [ProfileState.fromFile(path, ",", *KEYS) for path in paths]
+        ).toReportData("merged")
+
+        assert result.notComputed == []
+        assert result.isComputed(C.SECTION_ACTIVE_CASES)
+        assert result.toDict()["counts"]["zeroWaits"] == 2
+
+    def test_integer_ids_stay_integers(self, temp_dir):
+        """Test integer timeline IDs are reported as numbers."""
+        path = os.path.join(temp_dir, "ids.csv")
+        with open(path, "w") as f:
+            f.write("case_id,activity,timestamp\n10,A,2023-01-01\n10,B,2023-01-02\n7,A,2023-01-03\n")
+        result = ProfileState.fromFile(path, ",", *KEYS).toReportData(path)
+
+        assert result.PFIMostFreq[C.FLD_COL_VALUECOUNT].tolist() == [10, 7]
+
+    def test_process_shards_warns_ignored_options(self, shards, capsys):
+        """Test the options that do not apply to shards are reported."""
+        _, paths = shards
+        dqa = Dqa4PM(Logger("test"), sample_rate=0.5, export=C.EXPORT_FLAGGED,
+                     output_format=C.FORMAT_JSON)
+        assert dqa.process_shards(paths, ",", *KEYS) is not None
+
+        captured = capsys.readouterr().out
+        assert "Option <sampling> is not supported with shards" in captured
+        assert "Option <export> is not supported with shards" in captured
+        assert "<approximate>" not in captured
@@ -5,7 +5,7 @@ Tests for pydqa4pm.reports module.
 import os
 import pytest
 import tempfile
-from pydqa4pm.reports.store import ReportStore
+from pydqa4pm.reports.store import ReportStore, MemoryReportStore
 from pydqa4pm.reports.pdf_builder import PDFReportBuilder
 from pydqa4pm.core.report_data import DQAReportData
 from pydqa4pm.utils import constants as C
@@ -60,6 +60,33 @@ class TestReportStore:
         assert store.isStoreFolderExist() is False
 
 
+class TestMemoryReportStore:
+    """Test suite for MemoryReportStore class."""
+    
+    def test_memory_store_images(self):
+        """Test images are kept in buffers and released on finalize."""
+        store = MemoryReportStore()
+        assert store.initialize() is True
+        assert store.inMemory is True
+        
+        name = store.putImage(store.getPath("chart.jpg"), b"data")
+        assert store.getImage(name) == b"data"
+        assert not os.path.exists(name)
+        
+        store.finalize()
+        assert store.getImage(name) is None
+    
+    def test_disk_store_images(self, temp_dir):
+        """Test the disk store writes the images to its folder."""
+        store = ReportStore(temp_dir)
+        name = store.putImage(store.getPath("chart.jpg"), b"data")
+        
+        assert store.inMemory is False
+        assert os.path.exists(name)
+        assert store.getImage(name) == b"data"
+        assert store.getImage("other.jpg") is None
+
+
 class TestDQAReportData:
     """Test suite for DQAReportData class."""
     
@@ -127,6 +154,63 @@ class TestDQAReportData:
         assert "25" in result
         assert "100" in result
         assert "25.0%" in result
+    
+    def test_report_data_to_dict(self):
+        """Test toDict() returns the raw counts, ratios and frames as JSON values."""
+        import json
+        import pandas as pd
+        data = DQAReportData("test.csv", "pfi", "sn", "t")
+        data.RowCount = 200
+        data.duplicates = 50
+        data.missings = [1, 2, 3]
+        data.PFIMostFreq = pd.DataFrame({C.FLD_COL_VALUECOUNT: ["c1"], C.FLD_FREQ_VALUECOUNT: [4]})
+        data.activeCases = pd.DataFrame({
+            C.FLD_TIME: pd.to_datetime(["2024-01-01"]), C.FLD_ACTIVE_CASES: [1]
+        })
+        data.confidenceIntervals = {C.METRIC_DUPLICATES: (0.25, 0.2, 0.3)}
+        
+        metrics = json.loads(json.dumps(data.toDict()))
+        assert metrics["rows"] == 200
+        assert metrics["counts"]["duplicates"] == 50
+        assert metrics["ratios"]["duplicates"] == 0.25
+        assert metrics["missings"] == {"PFI": 1, "SN": 2, "T": 3}
+        assert metrics["topPFI"] == [{C.FLD_COL_VALUECOUNT: "c1", C.FLD_FREQ_VALUECOUNT: 4}]
+        assert metrics["topWaitingPairs"] == []
+        assert metrics["confidenceIntervals"][C.METRIC_DUPLICATES]["lower"] == 0.2
+    
+    def test_report_data_topk_error_display(self):
+        """Test approximate top-k values are labelled with their maximum overestimate."""
+        import pandas as pd
+        data = DQAReportData("test.csv", "pfi", "sn", "t")
+        data.PFIMostFreq = pd.DataFrame({
+            C.FLD_COL_VALUECOUNT: ["c1", "c2"],
+            C.FLD_FREQ_VALUECOUNT: [10, 5],
+            C.FLD_FREQ_ERROR: [0, 3]
+        })
+        data.SNValues = pd.DataFrame({C.FLD_COL_VALUECOUNT: ["Start"], C.FLD_FREQ_VALUECOUNT: [4]})
+        
+        assert data.topPFI[C.FLD_COL_VALUECOUNT].tolist() == ["c1", "c2 (+3 max)"]
+        assert C.FLD_FREQ_ERROR not in data.topPFI.columns
+        assert "+3" in data.getFrequencyErrorDisplay(data.PFIMostFreq)
+        assert data.topSN is data.SNValues
+        assert data.getFrequencyErrorDisplay(data.SNValues) == ""
+    
+    def test_report_data_not_computed(self):
+        """Test sections not computed are shown as such, and are None in toDict()."""
+        data = DQAReportData("test.csv", "pfi", "sn", "t")
+        data.RowCount = 100
+        data.nearDuplicates = 0
+        data.notComputed = [C.SECTION_NEAR_DUPLICATES, C.SECTION_TIMELINE_SIZES]
+        
+        assert data.isComputed(C.SECTION_FLAGGED_ROWS) is True
+        assert data.nearDuplicates == C.NOT_COMPUTED
+        assert data.flaggedRows.startswith("0 / 100")
+        metrics = data.toDict()
+        assert metrics["notComputed"] == [C.SECTION_NEAR_DUPLICATES, C.SECTION_TIMELINE_SIZES]
+        assert metrics["counts"]["nearDuplicates"] is None
+        assert metrics["ratios"]["nearDuplicates"] is None
+        assert metrics["counts"]["flaggedRows"] == 0
+        assert metrics["timelineSizes"] is None
 
 
 class TestPDFReportBuilder:
@@ -180,6 +264,83 @@ class TestPDFReportBuilder:
         
         assert os.path.exists(output_path)
         assert os.path.getsize(output_path) > 0
+    
+    def test_builder_image_from_memory(self, temp_dir):
+        """Test an image of a memory store is embedded without a file."""
+        import pandas as pd
+        from pydqa4pm.charts.seaborn_chart import SeabornChart
+        import io
+        
+        buffer = io.BytesIO()
+        data = pd.DataFrame({"label": ["A", "B"], "value": [1, 2]})
+        assert SeabornChart(4, 3).CreateBarH(buffer, data, "label", "value") is buffer
+        store = MemoryReportStore()
+        name = store.putImage(store.getPath("chart.jpg"), buffer.getvalue())
+        
+        builder = PDFReportBuilder(store)
+        builder.add_page()
+        builder.insert_image("Chart", name)
+        output_path = os.path.join(temp_dir, "memory_report.pdf")
+        builder.output(output_path, 'F')
+        
+        with open(output_path, "rb") as f:
+            assert b"/DCTDecode" in f.read()
+
+
+class TestPDFReportBuilderTables:
+    """Test suite for the tables drawn with PDF cells."""
+    
+    def _output(self, builder, temp_dir):
+        output_path = os.path.join(temp_dir, "table_report.pdf")
+        builder.output(output_path, 'F')
+        with open(output_path, "rb") as f:
+            return f.read()
+    
+    def test_table_text_is_searchable(self, temp_dir):
+        """Test the table values are written as text, not as an image."""
+        import pandas as pd
+        builder = PDFReportBuilder()
+        builder.set_compression(False)
+        builder.add_page()
+        builder.insert_table("Formats", pd.DataFrame({"Format": ["%Y-%m-%d"], "GoodRows": [42]}))
+        
+        content = self._output(builder, temp_dir)
+        assert b"(GoodRows)" in content
+        assert b"(42)" in content
+    
+    def test_wide_table_is_split(self, temp_dir):
+        """Test a wide table is split into sub-tables of max_cols_per_view columns."""
+        import pandas as pd
+        builder = PDFReportBuilder()
+        builder.set_compression(False)
+        builder.add_page()
+        builder.insert_table("Wide", pd.DataFrame({f"col{i}": [i] for i in range(12)}), 5)
+        
+        content = self._output(builder, temp_dir)
+        for i in range(12):
+            assert f"(col{i})".encode() in content
+        # Each of the 3 sub-tables starts a new line of cells
+        positions = [content.index(f"(col{i})".encode()) for i in (0, 5, 10)]
+        assert positions == sorted(positions)
+    
+    def test_long_table_breaks_pages(self, temp_dir):
+        """Test a long table continues on the next pages."""
+        import pandas as pd
+        builder = PDFReportBuilder()
+        builder.add_page()
+        builder.insert_table("Long", pd.DataFrame({"value": range(200)}))
+        
+        assert builder.page_no() > 1
+    
+    def test_long_text_is_shortened(self):
+        """Test a cell text wider than its column is shortened."""
+        builder = PDFReportBuilder()
+        builder.add_page()
+        builder.set_font('Arial', '', C.TABLE_FONT_SIZE)
+        
+        text = builder._fit_text("x" * 500, 20)
+        assert text.endswith("...")
+        assert builder.get_string_width(text) <= 20
 
 
 class TestPDFReportBuilderAlias:
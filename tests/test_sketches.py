@@ -0,0 +1,118 @@
+"""
+Tests for pydqa4pm.utils.sketches module.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pydqa4pm.utils.sketches import HyperLogLog, SpaceSaving, hash_values
+from pydqa4pm.utils import constants as C
+
+
+class TestHyperLogLog:
+    """Test suite for HyperLogLog sketch."""
+    
+    def test_empty_sketch(self):
+        """Test an empty sketch estimates zero."""
+        assert HyperLogLog().count() == 0
+    
+    def test_small_exact_count(self):
+        """Test small cardinalities are estimated accurately."""
+        hll = HyperLogLog(error=0.01)
+        hll.update(["a", "b", "c", "a", None])
+        assert hll.count() == 3
+    
+    @pytest.mark.parametrize("n", [5000, 200000])
+    def test_estimate_within_error(self, n):
+        """Test estimates stay within a few standard errors."""
+        hll = HyperLogLog(error=0.01)
+        hll.update(np.arange(n).astype(str))
+        assert abs(hll.count() - n) / n < 4 * hll.relativeError
+    
+    def test_precision_from_error(self):
+        """Test the sketch is sized from the target error."""
+        assert HyperLogLog(error=0.01).relativeError <= 0.01
+        assert HyperLogLog(error=0.05).precision < HyperLogLog(error=0.01).precision
+    
+    def test_merge_equals_whole_stream(self):
+        """Test merging chunk sketches gives the sketch of the whole stream."""
+        values = np.arange(30000).astype(str)
+        whole = HyperLogLog(error=0.02)
+        whole.update(values)
+        
+        left, right = HyperLogLog(error=0.02), HyperLogLog(error=0.02)
+        left.update(values[:20000])
+        right.update(values[10000:])
+        assert left.merge(right).count() == whole.count()
+    
+    def test_merge_different_precision(self):
+        """Test merging sketches of different sizes is rejected."""
+        with pytest.raises(ValueError):
+            HyperLogLog(precision=10).merge(HyperLogLog(precision=12))
+    
+    def test_serialization_roundtrip(self):
+        """Test to_dict/from_dict preserves the estimate."""
+        hll = HyperLogLog(error=0.05)
+        hll.update(np.arange(1000))
+        restored = HyperLogLog.from_dict(hll.to_dict())
+        assert restored.precision == hll.precision
+        assert restored.count() == hll.count()
+    
+    def test_hash_values_stable(self):
+        """Test equal values give equal hashes."""
+        hashes = hash_values(["x", "y", "x"])
+        assert hashes.dtype == np.uint64
+        assert hashes[0] == hashes[2]
+        assert hashes[0] != hashes[1]
+
+
+class TestSpaceSaving:
+    """Test suite for SpaceSaving summary."""
+    
+    def test_exact_when_under_capacity(self):
+        """Test frequencies are exact while the summary is not full."""
+        top = SpaceSaving(capacity=10)
+        top.update(["a", "b", "a", None])
+        top.update(["a", "c"])
+        
+        result = top.topk(2)
+        assert result[C.FLD_COL_VALUECOUNT][0] == "a"
+        assert result[C.FLD_FREQ_VALUECOUNT][0] == 3
+        assert top.maxError == 0
+        assert top.total == 5
+    
+    def test_heavy_hitters_within_error(self):
+        """Test heavy hitters are found with bounded overestimates on a skewed stream."""
+        rng = np.random.default_rng(0)
+        values = rng.zipf(1.5, 50000).astype(str)
+        top = SpaceSaving(capacity=50)
+        for i in range(0, len(values), 5000):
+            top.update(values[i:i + 5000])
+        
+        exact = pd.Series(values).value_counts()
+        result = top.topk(5).set_index(C.FLD_COL_VALUECOUNT)
+        assert list(result.index) == list(exact.index[:5])
+        for value, row in result.iterrows():
+            assert exact[value] <= row[C.FLD_FREQ_VALUECOUNT] <= exact[value] + row[C.FLD_FREQ_ERROR]
+        assert top.maxError <= top.total / top.capacity
+    
+    def test_merge(self):
+        """Test merging summaries of two stream halves."""
+        left, right = SpaceSaving(capacity=10), SpaceSaving(capacity=10)
+        left.update(["a", "a", "b"])
+        right.update(["a", "c"])
+        
+        merged = left.merge(right).topk(1)
+        assert merged[C.FLD_COL_VALUECOUNT][0] == "a"
+        assert merged[C.FLD_FREQ_VALUECOUNT][0] == 3
+        assert left.total == 5
+    
+    def test_serialization_roundtrip(self):
+        """Test to_dict/from_dict preserves the counters and their errors."""
+        top = SpaceSaving(capacity=2)
+        top.update(["a", "a", "b", "c"])
+        restored = SpaceSaving.from_dict(top.to_dict())
+        
+        assert restored.topk(2).to_dict("list") == top.topk(2).to_dict("list")
+        assert restored.maxError == top.maxError
+        assert restored.total == 4